@@ -0,0 +1,42 @@
+"""product deal_until with time zone
+
+Revision ID: 7d2c1b9e4f60
+Revises: 5a8e0f3d7b21
+Create Date: 2026-10-20 10:03:17.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2c1b9e4f60"
+down_revision: Union[str, None] = "5a8e0f3d7b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # stored values are in UTC
+    op.alter_column(
+        "product",
+        "deal_until",
+        type_=postgresql.TIMESTAMP(timezone=True),
+        existing_type=postgresql.TIMESTAMP(),
+        existing_nullable=True,
+        postgresql_using="deal_until AT TIME ZONE 'UTC'",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "product",
+        "deal_until",
+        type_=postgresql.TIMESTAMP(),
+        existing_type=postgresql.TIMESTAMP(timezone=True),
+        existing_nullable=True,
+        postgresql_using="deal_until AT TIME ZONE 'UTC'",
+    )
@@ -0,0 +1,83 @@
+"""
+Benchmarks saving of parsed sales: measures time and amount of
+database round trips spent on saving generated products.
+All changes are rolled back, so it's safe to run against a local database
+"""
+
+import _base  # noqa: F401 sets up path and config mode
+import asyncio
+import time
+import uuid
+from argparse import ArgumentParser
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from core.ioc import Resolve
+from gateways.db import SqlAlchemyClient
+from main import close_connections, ping_gateways
+from products.models import (
+    Product,
+    ProductCategory,
+    ProductDeliveryMethod,
+    ProductPlatform,
+    RegionalPrice,
+)
+from products.repositories import ProductsRepository
+
+
+def generate_products(count: int, regions: int) -> list[Product]:
+    run_id = uuid.uuid4().hex[:8]
+    return [
+        Product(
+            name=f"bench-{run_id}-{i}",
+            image_url="https://example.com/image.png",
+            orig_url=f"https://example.com/{run_id}/{i}",
+            discount=50,
+            category=ProductCategory.GAMES,
+            platform=ProductPlatform.XBOX,
+            delivery_method=ProductDeliveryMethod.KEY,
+            prices=[
+                RegionalPrice(
+                    base_price=Decimal(1000 + i), region_code=f"r{r}", original_curr="usd"
+                )
+                for r in range(regions)
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+async def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("-n", "--count", type=int, default=1000)
+    arg_parser.add_argument("-r", "--regions", type=int, default=3)
+    args = arg_parser.parse_args()
+    await ping_gateways()
+    client = Resolve(SqlAlchemyClient)
+    round_trips = 0
+
+    def count_round_trip(*_):
+        nonlocal round_trips
+        round_trips += 1
+
+    event.listen(client.engine.sync_engine, "before_cursor_execute", count_round_trip)
+    products = generate_products(args.count, args.regions)
+    try:
+        async with client.session_factory() as session:
+            repo = ProductsRepository(session)
+            started_at = time.perf_counter()
+            await repo.bulk_save_ignore_conflict(products)
+            elapsed = time.perf_counter() - started_at
+            await session.rollback()
+    finally:
+        await close_connections()
+    print(
+        f"Saved {args.count} products with {args.regions} prices each "
+        f"in {elapsed:.2f}s ({args.count / elapsed:.0f} products/s). "
+        f"Round trips: {round_trips} ({round_trips / args.count:.2f} per product)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
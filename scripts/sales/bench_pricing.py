@@ -0,0 +1,57 @@
+"""
+Benchmarks calculation of xbox prices: compares pricing with calculator per price
+against batched calculation per region
+"""
+
+import _base  # noqa: F401 sets up path and config mode
+import random
+import time
+from argparse import ArgumentParser
+from decimal import Decimal
+
+from pydantic_extra_types.currency_code import Currency
+
+from gateways.currency_converter.schemas import PriceUnitDTO
+from products.domain.services import XboxPriceCalculator
+from products.models import XboxParseRegions
+
+
+def generate_prices(count: int) -> list[PriceUnitDTO]:
+    return [
+        PriceUnitDTO(
+            value=Decimal(random.randint(1, 10000)) / 100,
+            currency_code=Currency("USD"),
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("-n", "--count", type=int, default=100_000)
+    args = arg_parser.parse_args()
+    prices = generate_prices(args.count)
+    with_gp = [random.random() < 0.5 for _ in range(args.count)]
+    for region in XboxParseRegions:
+        kwargs = [
+            {"with_gp": gp} if region == XboxParseRegions.US else {} for gp in with_gp
+        ]
+        started_at = time.perf_counter()
+        single = [
+            XboxPriceCalculator(price).calc_for_region(region, **kw)
+            for price, kw in zip(prices, kwargs)
+        ]
+        single_elapsed = time.perf_counter() - started_at
+        started_at = time.perf_counter()
+        batched = XboxPriceCalculator.calc_many(region, prices, with_gp)
+        batched_elapsed = time.perf_counter() - started_at
+        assert single == batched, "Batched calculation differs from single one"
+        print(
+            f"{region}: {args.count} prices. Per price: {single_elapsed:.3f}s, "
+            f"batched: {batched_elapsed:.3f}s "
+            f"({single_elapsed / batched_elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
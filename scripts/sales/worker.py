@@ -0,0 +1,22 @@
+"""
+Long-running sales worker: consumes sales update jobs enqueued by the API
+"""
+
+import _base  # noqa: F401 sets up path and config mode
+import asyncio
+
+from core.ioc import Resolve
+from gateways.gamesparser import SalesWorker
+from main import close_connections, ping_gateways
+
+
+async def main():
+    await ping_gateways()
+    try:
+        await Resolve(SalesWorker).run()
+    finally:
+        await close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -104,6 +104,176 @@ class _SentryCfg(BaseModel):
     dsn: HttpUrl
 
 
+class _Profiling(BaseModel):
+    enabled: bool = Field(default=True)
+    # presence of that header in admin's request triggers profiling
+    trigger_header: str = Field(default="X-Profile")
+    sampling_interval_ms: float = Field(default=1, gt=0)
+    ttl: ParsableTimedelta = Field(default=timedelta(hours=1))
+
+
+class _AdmissionClassLimits(BaseModel):
+    max_in_flight: int = Field(gt=0)
+    # requests over that amount are rejected immediately
+    max_queued: int = Field(ge=0)
+
+
+class _Admission(BaseModel):
+    enabled: bool = Field(default=True)
+    # total amount of requests handled concurrently
+    max_in_flight: int = Field(default=100, gt=0)
+    queue_timeout_ms: int = Field(default=2000, ge=0)
+    retry_after_sec: int = Field(default=5, ge=0)
+    webhook: _AdmissionClassLimits = Field(
+        default=_AdmissionClassLimits(max_in_flight=50, max_queued=100)
+    )
+    checkout: _AdmissionClassLimits = Field(
+        default=_AdmissionClassLimits(max_in_flight=40, max_queued=40)
+    )
+    admin: _AdmissionClassLimits = Field(
+        default=_AdmissionClassLimits(max_in_flight=10, max_queued=10)
+    )
+    catalog: _AdmissionClassLimits = Field(
+        default=_AdmissionClassLimits(max_in_flight=60, max_queued=30)
+    )
+
+
+class _SlowQueryLog(BaseModel):
+    # statements which take longer are logged. Set to null to disable logging
+    threshold_ms: int | None = Field(default=500, gt=0)
+    buffer_size: int = Field(default=200, gt=0)
+    # share of slow SELECT statements for which plan is captured
+    explain_sample_rate: float = Field(default=0, ge=0, le=1)
+
+
+class _DBTimeouts(BaseModel):
+    # null means that server default is used
+    statement_timeout_ms: int | None = Field(default=None, ge=0)
+    lock_timeout_ms: int | None = Field(default=None, ge=0)
+
+
+class _MaintenanceBatches(BaseModel):
+    # range of primary keys (or amount of rows if job finds them by another index)
+    # processed by maintenance job in a single transaction
+    batch_size: int = Field(default=1000, gt=0)
+    # pause between transactions, so that storefront queries and replicas keep up
+    pause_ms: int = Field(default=50, ge=0)
+
+
+class _Database(BaseModel):
+    slow_query_log: _SlowQueryLog = Field(default=_SlowQueryLog())
+    # timeouts applied to transactions depending on where unit of work is used
+    storefront_timeouts: _DBTimeouts = Field(
+        default=_DBTimeouts(statement_timeout_ms=3000, lock_timeout_ms=1000)
+    )
+    admin_timeouts: _DBTimeouts = Field(
+        default=_DBTimeouts(statement_timeout_ms=30000, lock_timeout_ms=5000)
+    )
+    batch_timeouts: _DBTimeouts = Field(
+        default=_DBTimeouts(statement_timeout_ms=600000, lock_timeout_ms=10000)
+    )
+    maintenance_batches: _MaintenanceBatches = Field(default=_MaintenanceBatches())
+
+
+class _DetailsFetching(BaseModel):
+    concurrency: int = Field(gt=0)
+    # token bucket, applied to every host separately
+    rate_per_sec: float = Field(gt=0)
+    burst: int = Field(gt=0)
+    max_retries: int = Field(default=3, ge=0)
+    backoff_base_sec: float = Field(default=1, gt=0)
+    backoff_max_sec: float = Field(default=30, gt=0)
+
+
+class _SalesWorker(BaseModel):
+    # lease of the crashed worker (or it's job) expires after this time
+    lease_ttl_sec: int = Field(default=60, gt=0)
+    heartbeat_interval_sec: int = Field(default=15, gt=0)
+    # how long worker blocks waiting for a job in queue
+    poll_timeout_sec: int = Field(default=5, gt=0)
+    # jobs which weren't started within this time are dropped
+    pending_job_ttl_sec: int = Field(default=60 * 60 * 24, gt=0)
+    # all platforms are updated if last update is older. Set to null to disable
+    run_every_hours: float | None = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def check_heartbeat_interval(self):
+        if self.heartbeat_interval_sec >= self.lease_ttl_sec:
+            raise ValueError("Heartbeat interval should be less than lease ttl")
+        return self
+
+
+class _SalesSnapshot(BaseModel):
+    # in record mode scraped sales and details pages are written to the snapshot,
+    # in replay mode they are read from it without network access
+    mode: t.Literal["record", "replay"]
+    # directory of the snapshot
+    path: Path
+
+
+class _SalesSharding(BaseModel):
+    # amount of processes which parse sales. Null means the number of cores
+    processes: int | None = Field(default=None, gt=0)
+    # psn pages parsed by a process at a time
+    psn_pages_per_shard: int = Field(default=4, gt=0)
+    # xbox deal list items parsed by a process at a time
+    xbox_items_per_shard: int = Field(default=500, gt=0)
+    # token bucket of psn pages requests, split between processes
+    psn_rate_per_sec: float = Field(default=4, gt=0)
+    psn_burst: int = Field(default=4, gt=0)
+
+
+class _SalesParser(BaseModel):
+    xbox_details: _DetailsFetching = Field(
+        default=_DetailsFetching(concurrency=8, rate_per_sec=5, burst=5)
+    )
+    psn_details: _DetailsFetching = Field(
+        default=_DetailsFetching(concurrency=4, rate_per_sec=2, burst=2)
+    )
+    # amount of parsed details written in a single transaction
+    update_chunk_size: int = Field(default=200, gt=0)
+    # approximate amount of parsed sales saved in a single transaction
+    import_batch_size: int = Field(default=200, gt=0)
+    # amount of batches buffered between stages of the import
+    pipeline_queue_size: int = Field(default=2, gt=0)
+    # progress of the update is published at most once per interval
+    progress_flush_interval_sec: float = Field(default=2, gt=0)
+    worker: _SalesWorker = Field(default=_SalesWorker())
+    snapshot: _SalesSnapshot | None = None
+    # parsing is spread across processes if set
+    sharding: _SalesSharding | None = None
+
+
+class _ExchangeRatesSync(BaseModel):
+    # how often steam rates are fetched and applied. Set to null to disable
+    interval: ParsableTimedelta | None = Field(default=None)
+    # steam rates are cached for that time, so that api isn't requested on every read
+    cache_ttl: ParsableTimedelta = Field(default=timedelta(minutes=30))
+    # rates (eg.: "usd/rub") which are applied to prices. Other rates are only cached
+    apply_rates: list[str] = Field(default=[])
+    # rate is applied only if it moved more than that percent since it was set
+    threshold_percent: float = Field(default=1, ge=0)
+
+
+class _Scheduler(BaseModel):
+    # lease of the job run expires after this time if it's process crashed
+    lease_ttl_sec: int = Field(default=60, gt=0)
+    heartbeat_interval_sec: int = Field(default=15, gt=0)
+    # runs are delayed for a random time up to jitter,
+    # so that processes don't compete for the lease at the same moment
+    jitter_sec: float = Field(default=5, ge=0)
+    # cron expression (UTC) of deactivation of parsed products without discount
+    deactivate_expired_sales_cron: str = "0 3 * * *"
+    # cron expression (UTC) of steam catalog sync from GamesForFarm. Null disables it
+    steam_catalog_sync_cron: str | None = None
+
+    @model_validator(mode="after")
+    def check_heartbeat_interval(self):
+        if self.heartbeat_interval_sec >= self.lease_ttl_sec:
+            raise ValueError("Heartbeat interval should be less than lease ttl")
+        return self
+
+
 class _ClientsConfig(BaseModel):
     steam_api: _SteamAPIClient
     tg_api: _TelegramAPIClient
@@ -115,11 +285,17 @@ class Config(BaseSettings):
     api_version: str = "1.0.0"
     mode: ConfigMode
     server: _Server = Field(default=_Server())
+    profiling: _Profiling = Field(default=_Profiling())
+    admission: _Admission = Field(default=_Admission())
     smtp: _SMTP
     clients: _ClientsConfig
     tokens: _Tokens
     payments: _Payments
     pg_dsn: PostgresDsn
+    db: _Database = Field(default=_Database())
+    sales_parser: _SalesParser = Field(default=_SalesParser())
+    exchange_rates_sync: _ExchangeRatesSync = Field(default=_ExchangeRatesSync())
+    scheduler: _Scheduler = Field(default=_Scheduler())
     redis_dsn: RedisDsn
 
     @classmethod
@@ -0,0 +1,114 @@
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from logging import getLogger
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.batches import BatchExecutor
+from core.tasks import BackgroundJobs
+from products.domain.services import ProductsService
+
+
+class FakeRedis:
+    """In-memory redis which supports commands used by services"""
+
+    def __init__(self):
+        self.store: dict = {}
+        self.ttls: dict[str, int | None] = {}
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None):
+        self.store[key] = value
+        self.ttls[key] = ex
+
+    async def exists(self, *keys: str) -> int:
+        return sum(key in self.store for key in keys)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(self.store.get(key, {}))
+
+    async def hset(self, key: str, mapping: dict) -> None:
+        self.store.setdefault(key, {}).update(mapping)
+
+
+@pytest.fixture
+def redis_client() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def uow() -> MagicMock:
+    """Unit of work shared by all transactions, repositories are mocked per test"""
+    uow = MagicMock()
+    uow.commit = AsyncMock()
+    uow.rollback = AsyncMock()
+    return uow
+
+
+@pytest.fixture
+def uow_factory(uow: MagicMock) -> MagicMock:
+    """Passed to services instead of unit of work.
+    Every call opens a transaction, so call_count is the amount of them.
+    Like the real one, transaction is committed unless it failed"""
+
+    @asynccontextmanager
+    async def transaction(*_):
+        try:
+            yield uow
+        except BaseException:
+            await uow.rollback()
+            raise
+        await uow.commit()
+
+    return MagicMock(side_effect=transaction)
+
+
+@pytest.fixture
+def make_products_service(
+    uow_factory: MagicMock, redis_client: FakeRedis
+) -> Callable[..., ProductsService]:
+    """Dependencies which aren't passed are mocks"""
+
+    def make(**dependencies) -> ProductsService:
+        return ProductsService(
+            **{
+                "uow": uow_factory,
+                "logger": getLogger(),
+                "currency_converter": MagicMock(),
+                "steam_api": MagicMock(),
+                "sales_jobs": MagicMock(),
+                "redis_client": redis_client,
+                "settings": MagicMock(),
+                **dependencies,
+            }
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_background_jobs(uow_factory: MagicMock) -> Callable[..., BackgroundJobs]:
+    """Dependencies which aren't passed are mocks"""
+
+    def make(**dependencies) -> BackgroundJobs:
+        return BackgroundJobs(
+            **{
+                "uow": uow_factory,
+                "logger": getLogger(),
+                "sales_jobs": MagicMock(),
+                "products_service": MagicMock(),
+                "redis_client": MagicMock(),
+                "batches": BatchExecutor(uow_factory, getLogger()),
+                "scheduler": MagicMock(),
+                "steam_catalog": MagicMock(),
+                **dependencies,
+            }
+        )
+
+    return make
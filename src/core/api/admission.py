@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import itertools
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from enum import IntEnum
+from logging import Logger
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RouteClass(IntEnum):
+    """Class of the route. Lower value means higher priority when waiting in queue"""
+
+    WEBHOOK = 0
+    CHECKOUT = 1
+    ADMIN = 2
+    CATALOG = 3
+
+
+@dataclass(frozen=True)
+class RouteClassLimits:
+    max_in_flight: int
+    max_queued: int
+
+
+class AdmissionRejectedError(Exception):
+    pass
+
+
+type _Waiter = tuple[int, int, RouteClass, asyncio.Future[None]]
+
+
+class AdmissionLimiter:
+    """Caps amount of requests handled concurrently both in total and per route class.
+    Requests which can't be admitted immediately wait in a short bounded queue,
+    waiters of higher priority classes are admitted first when capacity is freed"""
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        limits: Mapping[RouteClass, RouteClassLimits],
+        queue_timeout_sec: float,
+    ):
+        self._max_in_flight = max_in_flight
+        self._limits = limits
+        self._queue_timeout = queue_timeout_sec
+        self._total_in_flight = 0
+        self._in_flight = dict.fromkeys(RouteClass, 0)
+        self._queued = dict.fromkeys(RouteClass, 0)
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()  # keeps FIFO order within the same priority
+
+    def in_flight(self, route_class: RouteClass) -> int:
+        return self._in_flight[route_class]
+
+    def queued(self, route_class: RouteClass) -> int:
+        return self._queued[route_class]
+
+    def _can_admit(self, route_class: RouteClass) -> bool:
+        return (
+            self._total_in_flight < self._max_in_flight
+            and self._in_flight[route_class] < self._limits[route_class].max_in_flight
+        )
+
+    def _admit(self, route_class: RouteClass) -> None:
+        self._total_in_flight += 1
+        self._in_flight[route_class] += 1
+
+    def _wake_waiters(self) -> None:
+        skipped: list[_Waiter] = []
+        while self._waiters and self._total_in_flight < self._max_in_flight:
+            waiter = heapq.heappop(self._waiters)
+            *_, route_class, fut = waiter
+            if fut.done():  # timed out or cancelled
+                continue
+            if not self._can_admit(route_class):
+                skipped.append(waiter)
+                continue
+            self._admit(route_class)
+            fut.set_result(None)
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
+
+    async def acquire(self, route_class: RouteClass) -> None:
+        """Raises AdmissionRejectedError if queue of the class is full
+        or request wasn't admitted within queue timeout"""
+        # waiters are woken up every time capacity is freed, so if there is
+        # free capacity for the class, nobody of the same or higher priority can use it
+        if self._can_admit(route_class):
+            self._admit(route_class)
+            return
+        if self._queued[route_class] >= self._limits[route_class].max_queued:
+            raise AdmissionRejectedError
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, (route_class.value, next(self._seq), route_class, fut)
+        )
+        self._queued[route_class] += 1
+        try:
+            await asyncio.wait_for(fut, self._queue_timeout)
+        except TimeoutError:
+            # slot may be granted right before timeout fires
+            if fut.done() and not fut.cancelled():
+                return
+            raise AdmissionRejectedError
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(route_class)
+            raise
+        finally:
+            self._queued[route_class] -= 1
+
+    def release(self, route_class: RouteClass) -> None:
+        self._total_in_flight -= 1
+        self._in_flight[route_class] -= 1
+        self._wake_waiters()
+
+
+def route_classifier(api_prefix: str) -> Callable[[Scope], RouteClass | None]:
+    """Returns function which determines class of the request by it's path and method.
+    None means that request isn't subject to admission control"""
+    exempt = api_prefix + "/stream"  # long-lived requests
+    # requests which place orders, payments of them are confirmed by webhooks
+    checkout_paths = {
+        api_prefix + "/orders/in-app",
+        api_prefix + "/orders/steam/top-up",
+        api_prefix + "/orders/steam/gift",
+    }
+    rules = (
+        (api_prefix + "/payments", RouteClass.WEBHOOK),
+        (api_prefix + "/profiles", RouteClass.ADMIN),
+        (api_prefix + "/slow-queries", RouteClass.ADMIN),
+    )
+    # catalog is modified by admins only
+    catalog_prefixes = (api_prefix + "/products", api_prefix + "/news")
+
+    def classify(scope: Scope) -> RouteClass | None:
+        path: str = scope["path"]
+        if path.startswith(exempt):
+            return None
+        if scope["method"] == "POST" and path in checkout_paths:
+            return RouteClass.CHECKOUT
+        for prefix, route_class in rules:
+            if path.startswith(prefix):
+                return route_class
+        if path.startswith(catalog_prefixes) and scope["method"] not in (
+            "GET",
+            "HEAD",
+            "OPTIONS",
+        ):
+            return RouteClass.ADMIN
+        return RouteClass.CATALOG
+
+    return classify
+
+
+class AdmissionMiddleware:
+    """Sheds requests which exceed capacity of their route class with 503 and Retry-After,
+    so that overloaded service degrades gracefully instead of timing out everywhere"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: AdmissionLimiter,
+        classifier: Callable[[Scope], RouteClass | None],
+        retry_after_sec: int,
+        logger: Logger,
+    ):
+        self._app = app
+        self._limiter = limiter
+        self._classify = classifier
+        self._retry_after = str(retry_after_sec)
+        self._logger = logger
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_class = self._classify(scope) if scope["type"] == "http" else None
+        if route_class is None:
+            await self._app(scope, receive, send)
+            return
+        try:
+            await self._limiter.acquire(route_class)
+        except AdmissionRejectedError:
+            self._logger.warning(
+                "Shed %s request %s %s: in flight %d, queued %d",
+                route_class.name.lower(),
+                scope["method"],
+                scope["path"],
+                self._limiter.in_flight(route_class),
+                self._limiter.queued(route_class),
+            )
+            await JSONResponse(
+                {"detail": "Service is temporarily overloaded. Please try again later"},
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": self._retry_after},
+            )(scope, receive, send)
+            return
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            self._limiter.release(route_class)
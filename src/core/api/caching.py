@@ -25,6 +25,19 @@ def _get_cache_headers(max_age: int, etag: str) -> dict[str, str]:
     return {"Cache-Control": f"max-age={max_age}", "Etag": etag}
 
 
+def _get_tag_prefix(tag: str) -> str:
+    return f"cache:{tag}:"
+
+
+async def invalidate_cache_tag(redis: RedisClient, tag: str) -> int:
+    """Drops cached responses of all endpoints cached with the tag.
+    Returns amount of dropped responses"""
+    keys = [key async for key in redis.scan_iter(_get_tag_prefix(tag) + "*", 500)]
+    if not keys:
+        return 0
+    return await redis.unlink(*keys)
+
+
 def _locate_param(
     sig: inspect.Signature, dep: inspect.Parameter, to_inject: list[inspect.Parameter]
 ) -> inspect.Parameter:
@@ -39,7 +52,9 @@ def _locate_param(
     return param
 
 
-def cache(ttl: int = 300):
+def cache(ttl: int = 300, tag: str | None = None):
+    """Caches responses of the endpoint. Responses of endpoints with the same tag
+    can be dropped at once with invalidate_cache_tag"""
     injected_request = inspect.Parameter(
         name="__cache_request",
         annotation=Request,
@@ -53,6 +68,8 @@ def cache(ttl: int = 300):
 
     def decorator[T](func: Callable[..., T]):
         ns = f"{func.__module__}.{func.__name__}"
+        if tag is not None:
+            ns = _get_tag_prefix(tag) + ns
         sig = get_typed_signature(func)
         to_inject: list[inspect.Parameter] = []
         request_param = _locate_param(sig, injected_request, to_inject)
@@ -0,0 +1,32 @@
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_current_scope: ContextVar[Scope | None] = ContextVar("current_scope", default=None)
+
+
+def get_current_route() -> str | None:
+    """Returns route of the request which is currently handled (if any).
+    Route template (eg.: /products/detail/{product_id}) is used when request is already routed"""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+class RequestContextMiddleware:
+    """Makes scope of the current request accessible from any place down the call stack"""
+
+    def __init__(self, app: ASGIApp):
+        self._app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
@@ -3,6 +3,7 @@ from fastapi import HTTPException, Header, Request, status, Depends
 from config import Config
 from core.ioc import Resolve
 from core.api.pagination import PaginationParams
+from core.uow import TimeoutsProfile, current_timeouts_profile
 
 
 def restrict_content_type(required_ct: str):
@@ -27,3 +28,12 @@ def get_session_key(req: Request):
 
 
 SessionKeyDep = Annotated[str, Depends(get_session_key)]
+
+
+def db_timeouts(profile: TimeoutsProfile):
+    """Sets timeouts profile for units of work used during request handling"""
+
+    async def set_timeouts_profile():
+        current_timeouts_profile.set(profile)
+
+    return Depends(set_timeouts_profile)
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Any
+
+from core.api.schemas import BaseDTO
+from core.ioc import Resolve
+from core.scheduler import JobsScheduler, JobState
+from gateways.db.sqlalchemy_gateway import SlowQueryLog
+
+
+class ScheduledJobDTO(BaseDTO):
+    name: str
+    schedule: str | None
+    state: JobState | None
+    runner: str | None
+    slot_at: datetime | None
+    started_at: datetime | None
+    finished_at: datetime | None
+    duration_sec: float | None
+    error: str | None
+    next_run_at: datetime | None
+
+
+class SlowQueryDTO(BaseDTO):
+    statement: str
+    params: Any
+    duration_ms: float
+    repo_method: str | None
+    route: str | None
+    occurred_at: datetime
+    plan: Any
+
+
+async def list_slow_queries() -> list[SlowQueryDTO]:
+    """Returns most recent slow queries executed by current worker (newest first)"""
+    return [
+        SlowQueryDTO.model_validate(entry) for entry in Resolve(SlowQueryLog).recent()
+    ]
+
+
+async def list_scheduled_jobs() -> list[ScheduledJobDTO]:
+    """Returns status of the last run of every background job across all workers"""
+    return [
+        ScheduledJobDTO.model_validate(status)
+        for status in await Resolve(JobsScheduler).statuses()
+    ]
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+import uuid
+from datetime import timedelta
+from logging import Logger
+from types import FrameType
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import Config
+from core.ioc import Resolve
+from core.services.exceptions import ServiceError
+from gateways.db import RedisClient
+from users.dependencies import get_optional_user_id, oauth2_scheme, require_admin
+from users.domain.services import UsersService
+
+type _FrameKey = tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """Periodically samples stack of the thread which created profiler (event loop thread)
+    from a separate thread. Note that all coroutines which are running in the loop
+    during profiling get into the samples, not only the profiled one"""
+
+    def __init__(self, interval_sec: float):
+        self._interval = interval_sec
+        self._target_thread_id = threading.get_ident()
+        self._frames_index: dict[_FrameKey, int] = {}
+        self._samples: list[list[int]] = []
+        self._weights: list[float] = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._started_at = 0.0
+        self._duration = 0.0
+
+    def _frame_idx(self, frame: FrameType) -> int:
+        code = frame.f_code
+        key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+        idx = self._frames_index.get(key)
+        if idx is None:
+            idx = self._frames_index[key] = len(self._frames_index)
+        return idx
+
+    def _take_sample(self) -> list[int] | None:
+        frame = sys._current_frames().get(self._target_thread_id)
+        stack: list[int] = []
+        while frame is not None:
+            stack.append(self._frame_idx(frame))
+            frame = frame.f_back
+        if not stack:
+            return None
+        stack.reverse()  # speedscope expects stacks ordered from root to leaf
+        return stack
+
+    def _run(self):
+        last_sample_at = time.perf_counter()
+        while not self._stopped.wait(self._interval):
+            stack = self._take_sample()
+            now = time.perf_counter()
+            if stack is not None:
+                self._samples.append(stack)
+                self._weights.append(now - last_sample_at)
+            last_sample_at = now
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self._duration = time.perf_counter() - self._started_at
+
+    def to_speedscope(self, name: str) -> dict:
+        """Exports collected samples in speedscope format (https://www.speedscope.app)"""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "gameshop",
+            "shared": {
+                "frames": [
+                    {"name": qualname, "file": filename, "line": lineno}
+                    for qualname, filename, lineno in self._frames_index
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self._duration,
+                    "samples": self._samples,
+                    "weights": self._weights,
+                }
+            ],
+        }
+
+
+def _build_storage_key(profile_id: str) -> str:
+    return "profiles:" + profile_id
+
+
+class ProfilingMiddleware:
+    """Profiles requests which contain trigger header. Such requests are allowed for admins only.
+    Collected profile is saved in redis and it's id is returned in X-Profile-Id header.
+    Requests without trigger header are passed through as is"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        trigger_header: str,
+        sampling_interval: timedelta,
+        ttl: timedelta,
+        storage: RedisClient,
+        logger: Logger,
+    ):
+        self._app = app
+        self._trigger_header = trigger_header.lower().encode()
+        self._interval = sampling_interval.total_seconds()
+        self._ttl = ttl
+        self._storage = storage
+        self._logger = logger
+        # stack of the loop thread is shared, so only one request can be profiled at a time
+        self._lock = asyncio.Lock()
+
+    def _is_triggered(self, scope: Scope) -> bool:
+        return any(name == self._trigger_header for name, _ in scope["headers"])
+
+    async def _authorize(self, scope: Scope) -> Response | None:
+        req = Request(scope)
+        users_service = Resolve(UsersService)
+        try:
+            token = await oauth2_scheme(req)
+            user_id = await get_optional_user_id(token, users_service)
+            await require_admin(user_id, users_service, Resolve(Config))
+        except HTTPException as e:
+            return JSONResponse({"detail": e.detail}, e.status_code, e.headers)
+        except ServiceError as e:
+            return JSONResponse({"detail": str(e)}, status.HTTP_401_UNAUTHORIZED)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_triggered(scope):
+            await self._app(scope, receive, send)
+            return
+        if err_resp := await self._authorize(scope):
+            await err_resp(scope, receive, send)
+            return
+        if self._lock.locked():
+            await JSONResponse(
+                {"detail": "Another request is being profiled. Try again later"},
+                status.HTTP_409_CONFLICT,
+            )(scope, receive, send)
+            return
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        async with self._lock:
+            profiler = SamplingProfiler(self._interval)
+            profiler.start()
+            try:
+                await self._app(scope, receive, send_wrapper)
+            finally:
+                profiler.stop()
+                name = f"{scope['method']} {scope['path']}"
+                await self._storage.set(
+                    _build_storage_key(profile_id),
+                    json.dumps(profiler.to_speedscope(name)),
+                    self._ttl,
+                )
+                self._logger.info("Saved profile %s for %s", profile_id, name)
+
+
+async def get_profile(profile_id: str) -> Response:
+    """Returns profile in speedscope format which can be opened at https://www.speedscope.app"""
+    profile = await Resolve(RedisClient).get(_build_storage_key(profile_id))
+    if profile is None:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND, f"Profile {profile_id} not found or expired"
+        )
+    return Response(profile, media_type="application/json")
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import FileResponse
 from config import Config
 from core.ioc import Resolve
 from core.api.sse import message_stream
+from core.api.dependencies import db_timeouts
+from core.uow import TimeoutsProfile
+from core.api.profiling import get_profile
+from core.api.diagnostics import list_scheduled_jobs, list_slow_queries
 from core.utils import FILES_UPLOAD_DIR
 from products.handlers import router as product_router
 from users.handlers import router as users_router
@@ -10,10 +14,16 @@ from news.handlers import router as news_router
 from orders.handlers import router as orders_router
 from shopping.handlers import cart_router, wishlist_router
 from payments.handlers import router as payments_router
+from users.dependencies import require_admin
 
 major_version = Resolve(Config).api_version[0]
 
-api_router = APIRouter(prefix=f"/api/v{major_version}", tags=[f"api_v{major_version}"])
+api_router = APIRouter(
+    prefix=f"/api/v{major_version}",
+    tags=[f"api_v{major_version}"],
+    # tight timeouts by default, admin routes extend them (see require_admin)
+    dependencies=[db_timeouts(TimeoutsProfile.STOREFRONT)],
+)
 
 api_router.include_router(product_router)
 api_router.include_router(users_router)
@@ -23,6 +33,24 @@ api_router.include_router(cart_router)
 api_router.include_router(wishlist_router)
 api_router.include_router(payments_router)
 api_router.add_api_route("/stream", message_stream)
+api_router.add_api_route(
+    "/profiles/{profile_id}",
+    get_profile,
+    dependencies=[Depends(require_admin)],
+    tags=["profiling"],
+)
+api_router.add_api_route(
+    "/slow-queries",
+    list_slow_queries,
+    dependencies=[Depends(require_admin)],
+    tags=["profiling"],
+)
+api_router.add_api_route(
+    "/scheduled-jobs",
+    list_scheduled_jobs,
+    dependencies=[Depends(require_admin)],
+    tags=["profiling"],
+)
 
 router = APIRouter()
 router.include_router(api_router)
@@ -1 +1,5 @@
-from .handlers import message_stream as message_stream, send_message as send_message
+from .handlers import (
+    message_stream as message_stream,
+    send_event as send_event,
+    send_message as send_message,
+)
@@ -1,23 +1,49 @@
 import asyncio
+from pydantic import BaseModel
 from sse_starlette import EventSourceResponse, ServerSentEvent
 from core.api.schemas import MessageDTO
 
 
-message_queue = asyncio.Queue()
+# every connected client has it's own queue, so that each of them gets all messages
+_SUBSCRIBER_QUEUE_SIZE = 100
+_subscribers: set[asyncio.Queue[MessageDTO | ServerSentEvent]] = set()
+
+
+def _publish(msg: MessageDTO | ServerSentEvent):
+    """Messages are dropped if nobody listens. Slow client loses the oldest ones"""
+    for queue in _subscribers:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(msg)
 
 
 async def send_message(msg: MessageDTO):
-    await message_queue.put(msg)
+    _publish(msg)
+
+
+async def send_event(event: str, data: BaseModel):
+    """Sends named event, so that clients may listen only for events they're interested in"""
+    _publish(ServerSentEvent(data=data.model_dump_json(), event=event))
 
 
 async def message_queue_consumer():
-    while True:
-        msg = await message_queue.get()
-        if not isinstance(msg, MessageDTO):
-            raise TypeError(
-                "Invalid message in queue: %s. Expected MessageDTO instance" % msg
-            )
-        yield ServerSentEvent(data=msg.model_dump_json())
+    queue: asyncio.Queue[MessageDTO | ServerSentEvent] = asyncio.Queue(
+        maxsize=_SUBSCRIBER_QUEUE_SIZE
+    )
+    _subscribers.add(queue)
+    try:
+        while True:
+            msg = await queue.get()
+            if isinstance(msg, ServerSentEvent):
+                yield msg
+                continue
+            if not isinstance(msg, MessageDTO):
+                raise TypeError(
+                    "Invalid message in queue: %s. Expected MessageDTO instance" % msg
+                )
+            yield ServerSentEvent(data=msg.model_dump_json())
+    finally:
+        _subscribers.discard(queue)
 
 
 async def message_stream():
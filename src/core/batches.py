@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from logging import Logger
+
+from core.uow import AbstractUnitOfWork, TimeoutsProfile
+
+# inclusive bounds of the primary key
+type IdsBounds = tuple[int, int]
+# half-open range of the primary key: [start, end)
+type IdsRange = tuple[int, int]
+
+
+@dataclass(slots=True)
+class BatchJobReport:
+    name: str
+    affected: int = 0
+    batches: int = 0
+    duration_sec: float = 0
+    max_batch_duration_sec: float = 0
+
+
+class BatchExecutor:
+    """Runs maintenance job over the table in bounded ranges of the primary key
+    (or in batches of limited size, see run_limited).
+    Every batch is processed in a separate transaction with a pause between them,
+    so that locks are held briefly and storefront queries and replicas keep up"""
+
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        logger: Logger,
+        batch_size: int = 1000,
+        pause_sec: float = 0.05,
+    ):
+        self._uow = uow
+        self._logger = logger
+        self._batch_size = batch_size
+        self._pause_sec = pause_sec
+
+    async def _run_batch(
+        self,
+        report: BatchJobReport,
+        process: Callable[[AbstractUnitOfWork], Awaitable[int]],
+    ) -> int:
+        if report.batches:
+            await asyncio.sleep(self._pause_sec)
+        started_at = time.monotonic()
+        async with self._uow(TimeoutsProfile.BATCH) as uow:
+            affected = await process(uow)
+        report.affected += affected
+        report.batches += 1
+        report.max_batch_duration_sec = max(
+            report.max_batch_duration_sec, time.monotonic() - started_at
+        )
+        return affected
+
+    def _finish(self, report: BatchJobReport, started_at: float) -> BatchJobReport:
+        report.duration_sec = time.monotonic() - started_at
+        if report.batches:
+            self._logger.info(
+                "%s: %d rows affected in %d batches, took %.2fs (max batch %.2fs)",
+                report.name,
+                report.affected,
+                report.batches,
+                report.duration_sec,
+                report.max_batch_duration_sec,
+            )
+        return report
+
+    async def run(
+        self,
+        name: str,
+        get_bounds: Callable[[AbstractUnitOfWork], Awaitable[IdsBounds | None]],
+        process: Callable[[AbstractUnitOfWork, IdsRange], Awaitable[int]],
+    ) -> BatchJobReport:
+        """Processes ids within bounds (None if there is nothing to process).
+        Process returns amount of affected rows of the range"""
+        report = BatchJobReport(name)
+        started_at = time.monotonic()
+        async with self._uow(TimeoutsProfile.BATCH) as uow:
+            bounds = await get_bounds(uow)
+        if bounds is not None:
+            min_id, max_id = bounds
+            for start in range(min_id, max_id + 1, self._batch_size):
+                ids_range = (start, start + self._batch_size)
+                await self._run_batch(report, lambda uow: process(uow, ids_range))
+        return self._finish(report, started_at)
+
+    async def run_limited(
+        self,
+        name: str,
+        process: Callable[[AbstractUnitOfWork, int], Awaitable[int]],
+    ) -> BatchJobReport:
+        """Runs batches until one of them affects less rows than the limit.
+        Fits jobs which find rows by an index other than the primary key:
+        process updates at most limit rows, which stop matching the job after that"""
+        report = BatchJobReport(name)
+        started_at = time.monotonic()
+        while True:
+            affected = await self._run_batch(
+                report, lambda uow: process(uow, self._batch_size)
+            )
+            if affected < self._batch_size:
+                break
+        return self._finish(report, started_at)
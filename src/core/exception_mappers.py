@@ -52,6 +52,11 @@ class HTTPExceptionsMapper:
         service_exc.EntityOperationRestrictedByRefError: status.HTTP_403_FORBIDDEN,
         service_exc.ExternalGatewayError: status.HTTP_500_INTERNAL_SERVER_ERROR,
     }
+    _UNAVAILABLE_STATUSES = (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        status.HTTP_504_GATEWAY_TIMEOUT,
+    )
+    _RETRY_AFTER_SEC = 5
 
     def __init__(
         self,
@@ -66,9 +71,17 @@ class HTTPExceptionsMapper:
         self._tg_client = tg_client
         self._support_tg_chat_id = support_tg_chat_id
         self._server_addr = hostname
+        # imported here to avoid circular import, because db exceptions depend on this module
+        from gateways.db import exceptions as db_exc
+
+        self._exception_mapping: Mapping[type[Exception], int] = {
+            **self._EXCEPTION_MAPPING,
+            db_exc.QueryTimeoutError: status.HTTP_504_GATEWAY_TIMEOUT,
+            db_exc.LockTimeoutError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        }
 
     async def _handle(self, _: Request, exc: Exception):
-        status_code: int | None = self._EXCEPTION_MAPPING.get(type(exc), None)
+        status_code: int | None = self._exception_mapping.get(type(exc), None)
         if status_code is None:
             status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
             self._logger.error("Unknown exception in handler: %s", exc, exc_info=True)
@@ -77,10 +90,16 @@ class HTTPExceptionsMapper:
                     self._support_tg_chat_id,
                     f"Unexpected exception occured on server: {self._server_addr} ! Error: {exc}",
                 )
-        message: str = str(exc) if status_code < 500 else "Internal server error."
-        return JSONResponse({"detail": message}, status_code)
+        headers = None
+        if status_code in self._UNAVAILABLE_STATUSES:
+            self._logger.warning("Service is unavailable due to: %r", exc)
+            message = "Service is temporarily overloaded. Please try again later"
+            headers = {"Retry-After": str(self._RETRY_AFTER_SEC)}
+        else:
+            message = str(exc) if status_code < 500 else "Internal server error."
+        return JSONResponse({"detail": message}, status_code, headers)
 
     def setup_handlers(self) -> None:
-        for exc_class in self._EXCEPTION_MAPPING:
+        for exc_class in self._exception_mapping:
             self._app.add_exception_handler(exc_class, self._handle)
         self._app.add_exception_handler(Exception, self._handle)
@@ -1,12 +1,15 @@
+from datetime import timedelta
 from pathlib import Path
 from logging import Logger
 import typing as t
 from functools import lru_cache
 
-from httpx import AsyncClient
+from httpx import AsyncBaseTransport, AsyncClient
 import punq
 from fastapi import Depends
-from core.cmd_executor import CommandExecutor
+from core.api.context import get_current_route
+from core.batches import BatchExecutor
+from core.scheduler import CronSchedule, IntervalSchedule, JobsScheduler
 from core.tasks import BackgroundJobs
 from mailing.domain.services import MailingService
 from orders.repositories import TopUpFeeManager
@@ -17,9 +20,22 @@ from payments.domain.interfaces import (
 )
 from payments.domain.services import PaymentsService
 from payments.payment_gateways import PaymentSystemFactoryImpl
-from products.domain.interfaces import CommandExecutorI, CurrencyConverterI
+from products.domain.interfaces import CurrencyConverterI, SalesJobsQueueI
+from products.sales_jobs import SalesJobsQueue
+from products.models import ProductPlatform
 from gateways.steam import GamesForFarmAPIClient, NSGiftsAPIClient
 from gateways.currency_converter import CurrencyConverter
+from gateways.gamesparser import (
+    FetchPolicy,
+    SalesParser,
+    SalesProgressTracker,
+    SalesSnapshot,
+    ShardedParsingPool,
+    ShardingPolicy,
+    SalesUpdater,
+    SalesWorker,
+    SnapshotMode,
+)
 from shopping.domain.interfaces import (
     CartManagerFactoryI,
     SessionCopierI,
@@ -32,6 +48,7 @@ from shopping.repositories import (
     WishlistManagerFactory,
 )
 from core.logger import setup_logger
+from core.utils import RateLimitedTransport
 from core.exception_mappers import (
     HTTPExceptionsMapper,
     TelegramClientI as ExceptionMapperTelegramClientI,
@@ -42,6 +59,8 @@ from gateways.db.exceptions import (
 )
 from shopping.sessions import RedisSessionCreator, RedisSessionManager, SessionCreatorI
 from gateways.db import SqlAlchemyClient, RedisClient
+from gateways.db.redis_gateway import HotSettings
+from gateways.db.sqlalchemy_gateway import SlowQueryLog
 from gateways.tg_client import TelegramClient
 from news.domain.services import NewsService
 from orders.domain.services import OrdersService
@@ -59,7 +78,7 @@ from users.hashing import BcryptHasher, SHA256Hasher
 from users.tokens import JwtTokenProvider, SecureTokenProvider
 from mailing.templates import EmailTemplates
 from config import Config, init_config
-from core.uow import AbstractUnitOfWork, SqlAlchemyUnitOfWork
+from core.uow import AbstractUnitOfWork, SqlAlchemyUnitOfWork, TimeoutsProfile
 
 
 @lru_cache(1)
@@ -103,6 +122,9 @@ def _init_container() -> punq.Container:
         hostname=cfg.server.host,
     )
     container.register(RedisClient, instance=redis_client)
+    hot_settings = HotSettings(redis_client, logger)
+    register_for_cleanup(hot_settings)
+    container.register(HotSettings, instance=hot_settings)
     db = SqlAlchemyClient(
         str(cfg.pg_dsn), exception_mapper=PostgresExceptionsMapper, future=True
     )
@@ -122,11 +144,33 @@ def _init_container() -> punq.Container:
         **cfg.smtp.model_dump(),
     )
     container.register(SqlAlchemyClient, instance=db)
+    slow_query_log_cfg = cfg.db.slow_query_log
+    slow_query_log = SlowQueryLog(
+        logger,
+        threshold_ms=slow_query_log_cfg.threshold_ms or 0,
+        buffer_size=slow_query_log_cfg.buffer_size,
+        explain_sample_rate=slow_query_log_cfg.explain_sample_rate,
+        route_getter=get_current_route,
+    )
+    if slow_query_log_cfg.threshold_ms is not None:
+        slow_query_log.attach(db.engine)
+    container.register(SlowQueryLog, instance=slow_query_log)
     container.register(Config, instance=cfg)
     container.register(
         AbstractUnitOfWork,
         SqlAlchemyUnitOfWork,
         session_factory=db.session_factory,
+        timeouts={
+            TimeoutsProfile.STOREFRONT: cfg.db.storefront_timeouts,
+            TimeoutsProfile.ADMIN: cfg.db.admin_timeouts,
+            TimeoutsProfile.BATCH: cfg.db.batch_timeouts,
+        },
+    )
+    container.register(
+        BatchExecutor,
+        BatchExecutor,
+        batch_size=cfg.db.maintenance_batches.batch_size,
+        pause_sec=cfg.db.maintenance_batches.pause_ms / 1000,
     )
     container.register(UsersEmailTemplatesI, EmailTemplates)
     container.register(
@@ -136,7 +180,11 @@ def _init_container() -> punq.Container:
         ExceptionMapperTelegramClientI, TelegramClient, token=cfg.clients.tg_api.token
     )
     container.register(PaymentEmailTemplatesI, EmailTemplates)
-    container.register(ProductsService, scope=punq.Scope.singleton)
+    container.register(
+        ProductsService,
+        scope=punq.Scope.singleton,
+        steam_rates_ttl_sec=int(cfg.exchange_rates_sync.cache_ttl.total_seconds()),
+    )
     container.register(NewsService, scope=punq.Scope.singleton)
     container.register(TopUpFeeManagerI, TopUpFeeManager)
     container.register(
@@ -157,7 +205,6 @@ def _init_container() -> punq.Container:
     )
     container.register(CartManagerFactoryI, CartManagerFactory)
     container.register(WishlistManagerFactoryI, WishlistManagerFactory)
-    container.register(CommandExecutorI, CommandExecutor)
     container.register(SessionCopierI, SessionCopier)
     container.register(CurrencyConverterI, CurrencyConverter)
     container.register(ShoppingService, scope=punq.Scope.singleton)
@@ -176,11 +223,125 @@ def _init_container() -> punq.Container:
         scope=punq.Scope.singleton,
     )
     container.register(PaymentSystemFactoryI, PaymentSystemFactoryImpl)
-    container.register(GamesForFarmAPIClient, GamesForFarmAPIClient)
+    container.register(
+        GamesForFarmAPIClient,
+        GamesForFarmAPIClient,
+        import_batch_size=cfg.sales_parser.import_batch_size,
+    )
     container.register(
         SessionCreatorI, RedisSessionCreator, ttl=cfg.server.sessions.ttl
     )
-    container.register(BackgroundJobs, BackgroundJobs)
+    scheduler_cfg = cfg.scheduler
+    scheduler = JobsScheduler(
+        redis_client,
+        logger,
+        lease_ttl_sec=scheduler_cfg.lease_ttl_sec,
+        heartbeat_interval_sec=scheduler_cfg.heartbeat_interval_sec,
+    )
+    register_for_cleanup(scheduler)
+    container.register(JobsScheduler, instance=scheduler)
+    rates_sync_cfg = cfg.exchange_rates_sync
+    container.register(
+        BackgroundJobs,
+        BackgroundJobs,
+        deactivate_sales_schedule=CronSchedule(
+            scheduler_cfg.deactivate_expired_sales_cron
+        ),
+        jitter_sec=scheduler_cfg.jitter_sec,
+        steam_catalog_sync_schedule=(
+            CronSchedule(scheduler_cfg.steam_catalog_sync_cron)
+            if scheduler_cfg.steam_catalog_sync_cron
+            else None
+        ),
+        rates_sync_schedule=(
+            IntervalSchedule(rates_sync_cfg.interval)
+            if rates_sync_cfg.interval
+            else None
+        ),
+        apply_rates=rates_sync_cfg.apply_rates,
+        rates_threshold_percent=rates_sync_cfg.threshold_percent,
+    )
+    sales_parser_cfg = cfg.sales_parser
+    snapshot = (
+        SalesSnapshot(
+            sales_parser_cfg.snapshot.path, SnapshotMode(sales_parser_cfg.snapshot.mode)
+        )
+        if sales_parser_cfg.snapshot
+        else None
+    )
+    details_clients: list[AsyncClient] = []
+    fetch_policies: list[FetchPolicy] = []
+    for platform, details_cfg in (
+        (ProductPlatform.XBOX, sales_parser_cfg.xbox_details),
+        (ProductPlatform.PSN, sales_parser_cfg.psn_details),
+    ):
+        transport: AsyncBaseTransport = RateLimitedTransport(
+            details_cfg.rate_per_sec, details_cfg.burst
+        )
+        if snapshot is not None:
+            transport = snapshot.details_transport(platform, transport)
+        client = AsyncClient(transport=transport)
+        register_for_cleanup(client)
+        details_clients.append(client)
+        fetch_policies.append(
+            FetchPolicy(**details_cfg.model_dump(exclude={"rate_per_sec", "burst"}))
+        )
+    container.register(
+        SalesProgressTracker,
+        SalesProgressTracker,
+        scope=punq.Scope.singleton,
+        flush_interval_sec=sales_parser_cfg.progress_flush_interval_sec,
+    )
+    sharding: ShardingPolicy | None = None
+    if sharding_cfg := sales_parser_cfg.sharding:
+        parsing_pool = ShardedParsingPool(sharding_cfg.processes)
+        register_for_cleanup(parsing_pool)
+        sharding = ShardingPolicy(
+            parsing_pool,
+            sharding_cfg.psn_pages_per_shard,
+            sharding_cfg.xbox_items_per_shard,
+            sharding_cfg.psn_rate_per_sec,
+            sharding_cfg.psn_burst,
+        )
+    container.register(
+        SalesParser,
+        SalesParser,
+        scope=punq.Scope.singleton,
+        xbox_details_client=details_clients[0],
+        psn_details_client=details_clients[1],
+        xbox_fetch_policy=fetch_policies[0],
+        psn_fetch_policy=fetch_policies[1],
+        update_chunk_size=sales_parser_cfg.update_chunk_size,
+        import_batch_size=sales_parser_cfg.import_batch_size,
+        pipeline_queue_size=sales_parser_cfg.pipeline_queue_size,
+        snapshot=snapshot,
+        sharding=sharding,
+    )
+    worker_cfg = sales_parser_cfg.worker
+    container.register(
+        SalesJobsQueueI,
+        SalesJobsQueue,
+        scope=punq.Scope.singleton,
+        lease_ttl_sec=worker_cfg.lease_ttl_sec,
+        pending_job_ttl_sec=worker_cfg.pending_job_ttl_sec,
+    )
+    container.register(
+        SalesUpdater,
+        SalesUpdater,
+        update_chunk_size=sales_parser_cfg.update_chunk_size,
+    )
+    container.register(
+        SalesWorker,
+        SalesWorker,
+        lease_ttl_sec=worker_cfg.lease_ttl_sec,
+        heartbeat_interval_sec=worker_cfg.heartbeat_interval_sec,
+        poll_timeout_sec=worker_cfg.poll_timeout_sec,
+        run_every=(
+            timedelta(hours=worker_cfg.run_every_hours)
+            if worker_cfg.run_every_hours
+            else None
+        ),
+    )
     return container
 
 
@@ -0,0 +1,308 @@
+import asyncio
+import os
+import random
+import socket
+import time
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+from logging import Logger
+from typing import Any, Protocol
+
+from redis.asyncio import Redis
+
+from gateways.db.redis_gateway import LeaseLostError, RedisLease
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+# minute, hour, day of month, month, day of week (0 and 7 are sunday)
+_CRON_FIELDS_BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+def _state_key(job_name: str) -> str:
+    return f"scheduler:job:{job_name}"
+
+
+def _lease_key(job_name: str) -> str:
+    return f"scheduler:job:{job_name}:lease"
+
+
+class Schedule(Protocol):
+    def next_after(self, dt: datetime) -> datetime:
+        """Returns the nearest run time which is later than dt"""
+        ...
+
+
+class IntervalSchedule:
+    """Run times are multiples of the interval since epoch,
+    so that all processes agree on them regardless of when they were started"""
+
+    def __init__(self, interval: timedelta):
+        if interval <= timedelta(0):
+            raise ValueError("Interval should be positive")
+        self._interval = interval
+
+    def next_after(self, dt: datetime) -> datetime:
+        return _EPOCH + ((dt - _EPOCH) // self._interval + 1) * self._interval
+
+    def __str__(self) -> str:
+        return f"every {self._interval}"
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        bounds, _, step = part.partition("/")
+        if bounds == "*":
+            start, end = low, high
+        elif "-" in bounds:
+            start, end = map(int, bounds.split("-", 1))
+        else:
+            # "5/15" means every 15 starting from 5
+            start = int(bounds)
+            end = high if step else start
+        if not low <= start <= end <= high or (step and int(step) < 1):
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Standard 5 fields cron expression (minute hour day month weekday) in UTC.
+    Like in cron, day matches either day of month or day of week
+    if both of them are restricted"""
+
+    def __init__(self, expression: str):
+        self._expression = expression
+        fields = _CRON_ALIASES.get(expression, expression).split()
+        if len(fields) != len(_CRON_FIELDS_BOUNDS):
+            raise ValueError(f"Invalid cron expression: {expression}")
+        self._minutes, self._hours, self._days, self._months, weekdays = (
+            _parse_cron_field(field, low, high)
+            for field, (low, high) in zip(fields, _CRON_FIELDS_BOUNDS)
+        )
+        # python weekday starts from monday
+        self._weekdays = frozenset((day - 1) % 7 for day in weekdays)
+        self._any_day, self._any_weekday = fields[2] == "*", fields[4] == "*"
+        # expression which never matches (eg.: 30th of february) fails early
+        self.next_after(_EPOCH)
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_matches = dt.day in self._days
+        weekday_matches = dt.weekday() in self._weekdays
+        if self._any_day or self._any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    def next_after(self, dt: datetime) -> datetime:
+        dt = dt.astimezone(UTC).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # leap day is the rarest one which can match
+        until = dt + timedelta(days=366 * 8)
+        while dt < until:
+            if dt.month not in self._months:
+                month_start = dt.replace(day=1, hour=0, minute=0)
+                dt = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self._hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self._minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression never matches: {self._expression}")
+
+    def __str__(self) -> str:
+        return self._expression
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduledJob:
+    name: str
+    run: Callable[[], Coroutine[Any, Any, Any]]
+    # None means that job runs continuously in a single process
+    # and is restarted when it exits or fails
+    schedule: Schedule | None = None
+    # start of every run is delayed for a random time up to jitter
+    jitter_sec: float = 0
+
+
+class JobState(StrEnum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass(slots=True)
+class JobStatus:
+    name: str
+    schedule: str | None
+    state: JobState | None = None
+    # process which made the last run
+    runner: str | None = None
+    # scheduled time covered by the last run
+    slot_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    duration_sec: float | None = None
+    error: str | None = None
+    next_run_at: datetime | None = None
+
+
+def _parse_dt(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+class JobsScheduler:
+    """Runs background jobs once across all processes of the deployment.
+    Every run is guarded by the job lease. Scheduled time covered by the last run
+    is stored in redis, so that process which acquires the lease after another one
+    made the run skips it. Runs missed while all processes were down are merged
+    into a single one. Failures are logged and stored in job status,
+    they don't stop the job"""
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        logger: Logger,
+        lease_ttl_sec: float = 60,
+        heartbeat_interval_sec: float = 15,
+        retry_delay_sec: float = 5,
+    ):
+        self._redis = redis_client
+        self._logger = logger
+        self._lease_ttl = lease_ttl_sec
+        self._heartbeat_interval = heartbeat_interval_sec
+        self._retry_delay = retry_delay_sec
+        self._runner_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add(self, job: ScheduledJob) -> None:
+        if job.name in self._jobs:
+            raise ValueError(f"Job {job.name} is already added")
+        self._jobs[job.name] = job
+
+    def start(self) -> None:
+        for job in self._jobs.values():
+            self._tasks.append(asyncio.create_task(self._supervise(job)))
+
+    async def _load_status(self, job: ScheduledJob) -> JobStatus:
+        state = await self._redis.hgetall(_state_key(job.name))  # type: ignore
+        status = JobStatus(
+            name=job.name,
+            schedule=str(job.schedule) if job.schedule else None,
+            state=JobState(state["state"]) if state.get("state") else None,
+            runner=state.get("runner") or None,
+            slot_at=_parse_dt(state.get("slot_at")),
+            started_at=_parse_dt(state.get("started_at")),
+            finished_at=_parse_dt(state.get("finished_at")),
+            duration_sec=(
+                float(state["duration_sec"]) if state.get("duration_sec") else None
+            ),
+            error=state.get("error") or None,
+        )
+        if job.schedule is not None:
+            status.next_run_at = job.schedule.next_after(
+                status.slot_at or datetime.now(UTC)
+            )
+        return status
+
+    async def _save_status(self, job: ScheduledJob, **fields: str) -> None:
+        await self._redis.hset(_state_key(job.name), mapping=fields)  # type: ignore
+
+    async def statuses(self) -> list[JobStatus]:
+        return [await self._load_status(job) for job in self._jobs.values()]
+
+    async def _supervise(self, job: ScheduledJob) -> None:
+        while True:
+            try:
+                if job.schedule is None:
+                    await self._run_continuous(job)
+                else:
+                    await self._run_scheduled(job, job.schedule)
+            except Exception as e:
+                # failure of redis shouldn't stop the job
+                self._logger.exception("Scheduling of job %s failed: %s", job.name, e)
+                await asyncio.sleep(self._retry_delay)
+
+    async def _run_scheduled(self, job: ScheduledJob, schedule: Schedule) -> None:
+        """Waits for the next run time and makes the run unless it's already made"""
+        last_slot_at = (await self._load_status(job)).slot_at
+        now = datetime.now(UTC)
+        due_at = schedule.next_after(last_slot_at or now)
+        delay_sec = (due_at - now).total_seconds()
+        await asyncio.sleep(max(delay_sec, 0) + random.uniform(0, job.jitter_sec))
+        lease = RedisLease(self._redis, _lease_key(job.name), self._lease_ttl)
+        if not await lease.acquire(self._runner_id):
+            # job is run by another process
+            await asyncio.sleep(self._heartbeat_interval)
+            return
+        try:
+            last_slot_at = (await self._load_status(job)).slot_at
+            if last_slot_at is not None and last_slot_at >= due_at:
+                return
+            now = datetime.now(UTC)
+            await self._run_leased(job, lease, slot_at=max(due_at, now))
+        finally:
+            await lease.release(self._runner_id)
+
+    async def _run_continuous(self, job: ScheduledJob) -> None:
+        lease = RedisLease(self._redis, _lease_key(job.name), self._lease_ttl)
+        if not await lease.acquire(self._runner_id):
+            await asyncio.sleep(self._heartbeat_interval)
+            return
+        try:
+            await self._run_leased(job, lease, slot_at=datetime.now(UTC))
+        finally:
+            await lease.release(self._runner_id)
+        # job isn't expected to exit
+        await asyncio.sleep(self._retry_delay)
+
+    async def _run_leased(
+        self, job: ScheduledJob, lease: RedisLease, slot_at: datetime
+    ) -> None:
+        started_at = datetime.now(UTC)
+        await self._save_status(
+            job,
+            state=JobState.RUNNING,
+            runner=self._runner_id,
+            slot_at=slot_at.isoformat(),
+            started_at=started_at.isoformat(),
+            finished_at="",
+            duration_sec="",
+            error="",
+        )
+        started = time.monotonic()
+        state, error = JobState.SUCCEEDED, ""
+        try:
+            await lease.run_while_held(
+                self._runner_id, job.run(), self._heartbeat_interval
+            )
+        except LeaseLostError:
+            state, error = JobState.FAILED, "Job lease was lost"
+            self._logger.warning("Job %s lost lease", job.name)
+        except Exception as e:
+            state, error = JobState.FAILED, str(e) or type(e).__name__
+            self._logger.exception("Job %s failed: %s", job.name, e)
+        duration_sec = time.monotonic() - started
+        await self._save_status(
+            job,
+            state=state,
+            finished_at=datetime.now(UTC).isoformat(),
+            duration_sec=str(duration_sec),
+            error=error,
+        )
+        self._logger.info("Job %s %s in %.2fs", job.name, state.value, duration_sec)
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -1,37 +1,157 @@
 import asyncio
+from collections.abc import Sequence
+from datetime import UTC, datetime
 from logging import Logger
-from core.uow import AbstractUnitOfWork
+from core.api.schemas import MessageDTO
+from core.api.sse import send_event, send_message
+from core.batches import BatchExecutor, IdsRange
+from core.scheduler import CronSchedule, JobsScheduler, Schedule, ScheduledJob
+from core.uow import AbstractUnitOfWork, TimeoutsProfile
+from products.domain.interfaces import SalesJobsQueueI
+from gateways.db import RedisClient
+from gateways.steam import GamesForFarmAPIClient
+from products.domain.services import PRODUCTS_CACHE_TAG, ProductsService
 
 
 class BackgroundJobs:
-    def __init__(self, uow: AbstractUnitOfWork, logger: Logger):
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        logger: Logger,
+        sales_jobs: SalesJobsQueueI,
+        products_service: ProductsService,
+        redis_client: RedisClient,
+        batches: BatchExecutor,
+        scheduler: JobsScheduler,
+        steam_catalog: GamesForFarmAPIClient,
+        deactivate_sales_schedule: Schedule = CronSchedule("0 3 * * *"),
+        jitter_sec: float = 0,
+        steam_catalog_sync_schedule: Schedule | None = None,
+        rates_sync_schedule: Schedule | None = None,
+        apply_rates: Sequence[str] = (),
+        rates_threshold_percent: float = 1,
+    ):
         self._uow = uow
         self._logger = logger
+        self._sales_jobs = sales_jobs
+        self._products_service = products_service
+        self._redis_client = redis_client
+        self._batches = batches
+        self._scheduler = scheduler
+        self._steam_catalog = steam_catalog
+        self._deactivate_sales_schedule = deactivate_sales_schedule
+        self._jitter_sec = jitter_sec
+        self._steam_catalog_sync_schedule = steam_catalog_sync_schedule
+        self._rates_sync_schedule = rates_sync_schedule
+        self._apply_rates = apply_rates
+        self._rates_threshold_percent = rates_threshold_percent
 
-    async def delete_expired_sales(self):
-        """Deletes only parsed products which have expired discount"""
-        timeout_sec = 60 * 60 * 24  # once per day
-        while True:
-            async with self._uow() as uow:
-                deleted_count = await uow.products_repo.delete_parsed_without_discount()
-                self._logger.info("removed %d parsed products", deleted_count)
-            await asyncio.sleep(timeout_sec)
+    async def deactivate_expired_sales(self):
+        """Deactivates only parsed products which have expired discount.
+        Products are updated in batches by ranges of ids, so that rows used by
+        the storefront aren't locked for the whole update"""
+
+        async def deactivate(uow: AbstractUnitOfWork, ids_range: IdsRange) -> int:
+            return await uow.products_repo.deactivate_parsed_without_discount(ids_range)
+
+        report = await self._batches.run(
+            "deactivate_expired_sales",
+            lambda uow: uow.products_repo.get_ids_bounds(),
+            deactivate,
+        )
+        self._logger.info("deactivated %d parsed products", report.affected)
 
     async def reset_expired_discount(self, *, exit_after_update: bool = False):
-        """Periodically updates products with expired discount.
+        """Resets discount of the products when their deals expire.
+        Wakes up at the nearest expiration found by the deal_until index, but at least
+        once per max timeout, so that deals added meanwhile by other processes are
+        picked up. Expired products are found by the same index and reset in batches.
+        Cached product responses are dropped after reset.
         If exit_after_update is set to True - don't run an infinite loop
         and exit after first cleanup"""
-        timeout_sec = 60 * 60 * 6  # 6 hours
+        # caching depends on the container, which depends on that module
+        from core.api.caching import invalidate_cache_tag
+
+        async def reset(uow: AbstractUnitOfWork, limit: int) -> int:
+            reset_ids = await uow.products_repo.update_where_expired_discount(
+                limit, deal_until=None, discount=0
+            )
+            return len(reset_ids)
+
+        max_timeout_sec = 60
         while True:
-            async with self._uow() as uow:
-                updated_count = await uow.products_repo.update_where_expired_discount(
-                    deal_until=None, discount=0
-                )
-                self._logger.info("reset discount for %d products", updated_count)
+            report = await self._batches.run_limited("reset_expired_discount", reset)
+            async with self._uow(TimeoutsProfile.BATCH) as uow:
+                next_expiry = await uow.products_repo.get_next_deal_expiry()
+            if report.affected:
+                self._logger.info("reset discount for %d products", report.affected)
+                await invalidate_cache_tag(self._redis_client, PRODUCTS_CACHE_TAG)
             if exit_after_update:
                 return
+            timeout_sec = max_timeout_sec
+            if next_expiry is not None:
+                if next_expiry.tzinfo is None:
+                    # column without time zone stores UTC
+                    next_expiry = next_expiry.replace(tzinfo=UTC)
+                until_expiry = (next_expiry - datetime.now(UTC)).total_seconds()
+                timeout_sec = min(max(until_expiry, 0), max_timeout_sec)
             await asyncio.sleep(timeout_sec)
 
+    async def relay_sales_events(self):
+        """Forwards messages and progress published by the sales worker to the SSE stream"""
+        timeout_sec = 5  # before resubscribing after connection failure
+        while True:
+            try:
+                async for event in self._sales_jobs.listen_events():
+                    if isinstance(event, MessageDTO):
+                        await send_message(event)
+                    else:
+                        await send_event("sales_progress", event)
+            except Exception as e:
+                self._logger.warning("Sales events subscription failed: %s", e)
+            await asyncio.sleep(timeout_sec)
+
+    async def sync_exchange_rates(self):
+        """Fetches steam exchange rates and applies changed ones.
+        Prices are rescaled in chunks, so requests aren't blocked by the update"""
+        applied = await self._products_service.sync_steam_exchange_rates(
+            self._apply_rates, self._rates_threshold_percent
+        )
+        if applied:
+            self._logger.info("applied steam exchange rates: %s", applied)
+
     def start_all(self):
-        asyncio.create_task(self.reset_expired_discount())
-        asyncio.create_task(self.delete_expired_sales())
+        """Jobs are run by the scheduler once across all processes,
+        except relaying of events, which is done for the SSE clients of every process"""
+        asyncio.create_task(self.relay_sales_events())
+        # wakes up at the nearest deal expiry, so runs continuously
+        self._scheduler.add(
+            ScheduledJob("reset_expired_discount", self.reset_expired_discount)
+        )
+        self._scheduler.add(
+            ScheduledJob(
+                "deactivate_expired_sales",
+                self.deactivate_expired_sales,
+                self._deactivate_sales_schedule,
+                self._jitter_sec,
+            )
+        )
+        if self._rates_sync_schedule is not None:
+            self._scheduler.add(
+                ScheduledJob(
+                    "sync_exchange_rates",
+                    self.sync_exchange_rates,
+                    self._rates_sync_schedule,
+                    self._jitter_sec,
+                )
+            )
+        if self._steam_catalog_sync_schedule is not None:
+            self._scheduler.add(
+                ScheduledJob(
+                    "sync_steam_catalog",
+                    self._steam_catalog.fetch_and_save,
+                    self._steam_catalog_sync_schedule,
+                    self._jitter_sec,
+                )
+            )
+        self._scheduler.start()
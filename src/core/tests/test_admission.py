@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from core.api.admission import (
+    AdmissionLimiter,
+    AdmissionRejectedError,
+    RouteClass,
+    RouteClassLimits,
+    route_classifier,
+)
+
+
+def make_limiter(
+    max_in_flight: int = 1, max_queued: int = 2, queue_timeout_sec: float = 1
+) -> AdmissionLimiter:
+    return AdmissionLimiter(
+        max_in_flight,
+        {rc: RouteClassLimits(max_in_flight, max_queued) for rc in RouteClass},
+        queue_timeout_sec,
+    )
+
+
+class TestAdmissionLimiter:
+    @pytest.mark.asyncio
+    async def test_higher_priority_admitted_first(self):
+        limiter = make_limiter()
+        await limiter.acquire(RouteClass.CATALOG)
+        admitted: list[RouteClass] = []
+
+        async def request(route_class: RouteClass):
+            await limiter.acquire(route_class)
+            admitted.append(route_class)
+            limiter.release(route_class)
+
+        catalog = asyncio.create_task(request(RouteClass.CATALOG))
+        await asyncio.sleep(0)
+        webhook = asyncio.create_task(request(RouteClass.WEBHOOK))
+        await asyncio.sleep(0)
+        limiter.release(RouteClass.CATALOG)
+        await asyncio.gather(catalog, webhook)
+        assert admitted == [RouteClass.WEBHOOK, RouteClass.CATALOG]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejected(self):
+        limiter = make_limiter(max_queued=0)
+        await limiter.acquire(RouteClass.CATALOG)
+        with pytest.raises(AdmissionRejectedError):
+            await limiter.acquire(RouteClass.CATALOG)
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        limiter = make_limiter(queue_timeout_sec=0.01)
+        await limiter.acquire(RouteClass.CHECKOUT)
+        with pytest.raises(AdmissionRejectedError):
+            await limiter.acquire(RouteClass.CHECKOUT)
+        assert limiter.queued(RouteClass.CHECKOUT) == 0
+        limiter.release(RouteClass.CHECKOUT)
+        await limiter.acquire(RouteClass.CHECKOUT)
+        assert limiter.in_flight(RouteClass.CHECKOUT) == 1
+
+    @pytest.mark.asyncio
+    async def test_class_cap_does_not_block_other_classes(self):
+        limiter = AdmissionLimiter(
+            2,
+            {rc: RouteClassLimits(1, 1) for rc in RouteClass},
+            queue_timeout_sec=0.01,
+        )
+        await limiter.acquire(RouteClass.CATALOG)
+        await limiter.acquire(RouteClass.ADMIN)
+        assert limiter.in_flight(RouteClass.ADMIN) == 1
+
+
+@pytest.mark.parametrize(
+    ["method", "path", "expected"],
+    [
+        ("POST", "/api/v1/payments/paypalych", RouteClass.WEBHOOK),
+        ("POST", "/api/v1/orders/in-app", RouteClass.CHECKOUT),
+        ("POST", "/api/v1/orders/steam/gift", RouteClass.CHECKOUT),
+        ("GET", "/api/v1/orders/list-for-user", RouteClass.CATALOG),
+        ("POST", "/api/v1/cart/add", RouteClass.CATALOG),
+        ("POST", "/api/v1/users/signin", RouteClass.CATALOG),
+        ("GET", "/api/v1/products/detail/1", RouteClass.CATALOG),
+        ("POST", "/api/v1/products/create", RouteClass.ADMIN),
+        ("GET", "/api/v1/stream", None),
+    ],
+)
+def test_route_classifier(method: str, path: str, expected: RouteClass | None):
+    classify = route_classifier("/api/v1")
+    assert classify({"type": "http", "method": method, "path": path}) == expected
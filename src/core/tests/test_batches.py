@@ -0,0 +1,84 @@
+from collections.abc import Callable
+from logging import getLogger
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.batches import BatchExecutor
+
+
+@pytest.fixture
+def executor(uow_factory: MagicMock) -> BatchExecutor:
+    return BatchExecutor(uow_factory, getLogger(), batch_size=10, pause_sec=0)
+
+
+def recording_process(
+    uow_factory: MagicMock, processed: list[tuple[int, tuple[int, int]]]
+) -> Callable:
+    """Ranges are recorded along with the number of transaction they're processed in"""
+
+    async def process(_, ids_range: tuple[int, int]) -> int:
+        processed.append((uow_factory.call_count, ids_range))
+        start, end = ids_range
+        return end - start
+
+    return process
+
+
+class TestBatchExecutor:
+    @pytest.mark.asyncio
+    async def test_ranges_committed_separately(self, uow, uow_factory, executor):
+        processed: list[tuple[int, tuple[int, int]]] = []
+        report = await executor.run(
+            "job",
+            AsyncMock(return_value=(5, 29)),
+            recording_process(uow_factory, processed),
+        )
+        # first transaction reads bounds
+        assert processed == [(2, (5, 15)), (3, (15, 25)), (4, (25, 35))]
+        assert uow.commit.await_count == 4
+        assert report.batches == 3
+        assert report.affected == 30
+        assert report.duration_sec >= report.max_batch_duration_sec
+
+    @pytest.mark.asyncio
+    async def test_single_id(self, uow_factory, executor):
+        processed: list[tuple[int, tuple[int, int]]] = []
+        report = await executor.run(
+            "job",
+            AsyncMock(return_value=(7, 7)),
+            recording_process(uow_factory, processed),
+        )
+        assert processed == [(2, (7, 17))]
+        assert report.batches == 1
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_process(self, uow_factory, executor):
+        processed: list[tuple[int, tuple[int, int]]] = []
+        report = await executor.run(
+            "job",
+            AsyncMock(return_value=None),
+            recording_process(uow_factory, processed),
+        )
+        assert processed == []
+        assert uow_factory.call_count == 1
+        assert (report.batches, report.affected) == (0, 0)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_stops_job(self, uow, executor):
+        fail_second = AsyncMock(side_effect=[10, RuntimeError("lock timeout")])
+        with pytest.raises(RuntimeError):
+            await executor.run("job", AsyncMock(return_value=(0, 100)), fail_second)
+        # previous batches stay committed
+        assert uow.commit.await_count == 2
+        assert uow.rollback.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_limited_batches_run_until_last_one_is_incomplete(
+        self, uow, executor
+    ):
+        process = AsyncMock(side_effect=[10, 10, 3])
+        report = await executor.run_limited("job", process)
+        assert [call.args[1] for call in process.await_args_list] == [10, 10, 10]
+        assert uow.commit.await_count == 3
+        assert (report.batches, report.affected) == (3, 23)
@@ -0,0 +1,76 @@
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.tasks import BackgroundJobs
+
+
+class StopLoop(Exception): ...
+
+
+@pytest.fixture
+def make_jobs(uow: MagicMock, make_background_jobs) -> Callable[..., BackgroundJobs]:
+    def make(reset_ids: list[int], next_expiry: datetime | None) -> BackgroundJobs:
+        uow.products_repo.update_where_expired_discount = AsyncMock(
+            return_value=reset_ids
+        )
+        uow.products_repo.get_next_deal_expiry = AsyncMock(return_value=next_expiry)
+        return make_background_jobs()
+
+    return make
+
+
+class TestResetExpiredDiscount:
+    @pytest.mark.asyncio
+    async def test_caches_dropped_after_reset(self, uow, make_jobs):
+        jobs = make_jobs([1, 2], None)
+        with patch(
+            "core.api.caching.invalidate_cache_tag", AsyncMock()
+        ) as invalidate_mock:
+            await jobs.reset_expired_discount(exit_after_update=True)
+        uow.products_repo.update_where_expired_discount.assert_awaited_once_with(
+            1000, deal_until=None, discount=0
+        )
+        invalidate_mock.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_nothing_reset(self, make_jobs):
+        jobs = make_jobs([], None)
+        with patch(
+            "core.api.caching.invalidate_cache_tag", AsyncMock()
+        ) as invalidate_mock:
+            await jobs.reset_expired_discount(exit_after_update=True)
+        invalidate_mock.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ["expires_in", "expected_timeout"],
+        [
+            (timedelta(seconds=10), 10),
+            (timedelta(hours=1), 60),
+            (timedelta(seconds=-5), 0),
+            (None, 60),
+        ],
+    )
+    async def test_wakes_up_at_next_expiry(
+        self, make_jobs, expires_in, expected_timeout
+    ):
+        next_expiry = None if expires_in is None else datetime.now(UTC) + expires_in
+        jobs = make_jobs([], next_expiry)
+        sleep = AsyncMock(side_effect=StopLoop)
+        with patch("core.tasks.asyncio.sleep", sleep), pytest.raises(StopLoop):
+            await jobs.reset_expired_discount()
+        [timeout] = sleep.call_args.args
+        assert timeout == pytest.approx(expected_timeout, abs=1)
+
+    @pytest.mark.asyncio
+    async def test_naive_expiry_treated_as_utc(self, make_jobs):
+        next_expiry = (datetime.now(UTC) + timedelta(seconds=10)).replace(tzinfo=None)
+        jobs = make_jobs([], next_expiry)
+        sleep = AsyncMock(side_effect=StopLoop)
+        with patch("core.tasks.asyncio.sleep", sleep), pytest.raises(StopLoop):
+            await jobs.reset_expired_discount()
+        [timeout] = sleep.call_args.args
+        assert timeout == pytest.approx(10, abs=1)
@@ -0,0 +1,127 @@
+import json
+
+import httpx
+import pytest
+
+from core.utils import (
+    CacheValidators,
+    buffered,
+    chunkify,
+    chunkify_async,
+    conditional_get,
+    iter_json_object_items,
+)
+
+
+@pytest.mark.parametrize(
+    ["seq", "chunk_size", "expected"],
+    [
+        ([], 2, []),
+        ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2], 5, [[1, 2]]),
+    ],
+)
+def test_chunkify(seq: list[int], chunk_size: int, expected: list[list[int]]):
+    assert list(chunkify(seq, chunk_size)) == expected
+
+
+@pytest.mark.asyncio
+async def test_chunkify_async():
+    async def source():
+        for i in range(5):
+            yield i
+
+    chunks = [chunk async for chunk in chunkify_async(source(), 2)]
+    assert chunks == [[0, 1], [2, 3], [4]]
+
+
+async def _text_chunks(text: str, chunk_size: int):
+    for i in range(0, len(text), chunk_size):
+        yield text[i : i + chunk_size]
+
+
+class TestIterJsonObjectItems:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+    @pytest.mark.parametrize("indent", [None, 2])
+    async def test_items_parsed_across_chunks(self, chunk_size: int, indent):
+        goods = {
+            str(i): {"name": f'Game "{i}" {{}}', "price": i * 1.5, "tags": [i]}
+            for i in range(50)
+        }
+        doc = {"status": 1, "meta": {"goods": []}, "goods": goods, "total": 123456}
+        text = json.dumps(doc, indent=indent)
+        items = [
+            item
+            async for item in iter_json_object_items(
+                _text_chunks(text, chunk_size), "goods"
+            )
+        ]
+        assert dict(items) == goods
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("text", ['{"goods": {}}', "{}", '{"other": 1}'])
+    async def test_no_items(self, text: str):
+        chunks = _text_chunks(text, 3)
+        items = [item async for item in iter_json_object_items(chunks, "goods")]
+        assert items == []
+
+    @pytest.mark.asyncio
+    async def test_truncated_document(self):
+        with pytest.raises(ValueError):
+            async for _ in iter_json_object_items(
+                _text_chunks('{"goods": {"1": {"name": "Ga', 4), "goods"
+            ):
+                pass
+
+
+class TestBuffered:
+    @pytest.mark.asyncio
+    async def test_yields_all_items(self):
+        async def source():
+            for i in range(5):
+                yield i
+
+        assert [item async for item in buffered(source(), 2)] == list(range(5))
+
+    @pytest.mark.asyncio
+    async def test_source_error_propagated(self):
+        async def source():
+            yield 1
+            raise RuntimeError("source failed")
+
+        received = []
+        with pytest.raises(RuntimeError, match="source failed"):
+            async for item in buffered(source(), 2):
+                received.append(item)
+        assert received == [1]
+
+
+class TestConditionalGet:
+    @staticmethod
+    def _client(etag: str) -> httpx.AsyncClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.headers.get("if-none-match") == etag:
+                return httpx.Response(304)
+            return httpx.Response(200, headers={"etag": etag}, text="page")
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_returns_none_when_not_modified(self):
+        async with self._client('"v1"') as client:
+            resp = await conditional_get(client, "https://example.com")
+            assert resp is not None
+            validators = CacheValidators.from_response(resp)
+            assert validators == CacheValidators(etag='"v1"')
+            assert await conditional_get(client, "https://example.com", validators) is None
+
+    @pytest.mark.asyncio
+    async def test_returns_response_when_modified(self):
+        async with self._client('"v2"') as client:
+            resp = await conditional_get(
+                client, "https://example.com", CacheValidators(etag='"v1"')
+            )
+        assert resp is not None
+        assert resp.text == "page"
@@ -0,0 +1,155 @@
+import asyncio
+from logging import getLogger
+
+import pytest
+
+from gateways.db.redis_gateway import HotSettings
+
+
+class FakePubSub:
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self._redis.subscribers.remove(self._queue)
+
+    async def subscribe(self, channel: str):
+        self._redis.subscribers.append(self._queue)
+        self._queue.put_nowait({"type": "subscribe", "data": 1})
+
+    async def listen(self):
+        while True:
+            msg = await self._queue.get()
+            if isinstance(msg, Exception):
+                raise msg
+            yield msg
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._commands: list = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_): ...
+
+    def set(self, key: str, value):
+        self._commands.append(lambda: self._redis.store.__setitem__(key, str(value)))
+
+    def hset(self, key: str, field: str, value):
+        self._commands.append(
+            lambda: self._redis.store.setdefault(key, {}).__setitem__(field, value)
+        )
+
+    def publish(self, channel: str, key: str):
+        self._commands.append(lambda: self._redis.publish(key))
+
+    async def execute(self):
+        for command in self._commands:
+            command()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict = {}
+        self.reads = 0
+        self.subscribers: list[asyncio.Queue] = []
+
+    async def get(self, key: str):
+        self.reads += 1
+        return self.store.get(key)
+
+    async def hgetall(self, key: str):
+        self.reads += 1
+        return dict(self.store.get(key, {}))
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def pipeline(self, transaction: bool):
+        return FakePipeline(self)
+
+    def publish(self, key: str):
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "data": key})
+
+    def disconnect(self):
+        for queue in self.subscribers:
+            queue.put_nowait(ConnectionError("Connection lost"))
+
+
+async def make_subscribed(redis: FakeRedis) -> HotSettings:
+    settings = HotSettings(redis, getLogger(), resubscribe_delay_sec=0.01)  # type: ignore
+    # first read starts subscription, values aren't cached until it's established
+    await settings.get("key")
+    while not settings._subscribed:
+        await asyncio.sleep(0)
+    return settings
+
+
+class TestHotSettings:
+    @pytest.mark.asyncio
+    async def test_not_cached_before_subscription(self):
+        redis = FakeRedis()
+        settings = HotSettings(redis, getLogger())  # type: ignore
+        try:
+            await settings.get("key")
+            await settings.get("key")
+            assert redis.reads == 2
+        finally:
+            await settings.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cached_reads_make_no_calls(self):
+        redis = FakeRedis()
+        redis.store.update({"fee": "5", "rates": {"usd/rub": "90"}})
+        settings = await make_subscribed(redis)
+        try:
+            reads = redis.reads
+            for _ in range(3):
+                assert await settings.get("fee") == "5"
+                assert await settings.hget("rates", "usd/rub") == "90"
+            assert redis.reads == reads + 2
+        finally:
+            await settings.aclose()
+
+    @pytest.mark.asyncio
+    async def test_change_propagated_to_other_process(self):
+        redis = FakeRedis()
+        redis.store["fee"] = "5"
+        reader, writer = await make_subscribed(redis), await make_subscribed(redis)
+        try:
+            assert await reader.get("fee") == "5"
+            await writer.set("fee", 7)
+            assert await writer.get("fee") == "7"
+            # invalidation is delivered asynchronously
+            await asyncio.sleep(0)
+            assert await reader.get("fee") == "7"
+        finally:
+            await reader.aclose()
+            await writer.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cache_dropped_when_subscription_lost(self):
+        redis = FakeRedis()
+        redis.store["fee"] = "5"
+        settings = await make_subscribed(redis)
+        try:
+            assert await settings.get("fee") == "5"
+            redis.disconnect()
+            # change isn't published while subscription is lost
+            redis.store["fee"] = "7"
+            await asyncio.sleep(0)
+            assert not settings._subscribed
+            assert await settings.get("fee") == "7"
+            # subscription is restored
+            await asyncio.sleep(0.05)
+            assert settings._subscribed
+        finally:
+            await settings.aclose()
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from gateways.db.redis_gateway import LeaseLostError, RedisLease
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    async def set(self, key: str, value: str, nx: bool = False, px: int | None = None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    def register_script(self, script: str):
+        async def run_script(keys: list[str], args: list):
+            if self.store.get(keys[0]) != args[0]:
+                return 0
+            if "DEL" in script:
+                del self.store[keys[0]]
+            return 1
+
+        return run_script
+
+
+class TestRedisLease:
+    @pytest.mark.asyncio
+    async def test_acquire_is_exclusive(self):
+        lease = RedisLease(FakeRedis(), "lease", ttl_sec=1)  # type: ignore
+        assert await lease.acquire("a")
+        assert not await lease.acquire("b")
+        assert not await lease.release("b")
+        assert await lease.release("a")
+        assert await lease.acquire("b")
+
+    @pytest.mark.asyncio
+    async def test_run_while_held_returns_result(self):
+        lease = RedisLease(FakeRedis(), "lease", ttl_sec=1)  # type: ignore
+        await lease.acquire("a")
+
+        async def job():
+            await asyncio.sleep(0.03)
+            return 42
+
+        assert await lease.run_while_held("a", job(), heartbeat_interval_sec=0.01) == 42
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_cancels_coroutine(self):
+        redis = FakeRedis()
+        lease = RedisLease(redis, "lease", ttl_sec=1)  # type: ignore
+        await lease.acquire("a")
+        cancelled = False
+
+        async def job():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        async def take_over():
+            await asyncio.sleep(0.02)
+            redis.store["lease"] = "b"
+
+        asyncio.create_task(take_over())
+        with pytest.raises(LeaseLostError):
+            await lease.run_while_held("a", job(), heartbeat_interval_sec=0.01)
+        assert cancelled
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from logging import getLogger
+
+import pytest
+
+from core.scheduler import (
+    CronSchedule,
+    IntervalSchedule,
+    JobsScheduler,
+    JobState,
+    ScheduledJob,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict = {}
+
+    async def set(self, key: str, value: str, nx: bool = False, px: int | None = None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    async def hgetall(self, key: str):
+        return dict(self.store.get(key, {}))
+
+    async def hset(self, key: str, mapping: dict):
+        self.store.setdefault(key, {}).update(mapping)
+
+    def register_script(self, script: str):
+        async def run_script(keys: list[str], args: list):
+            if self.store.get(keys[0]) != args[0]:
+                return 0
+            if "DEL" in script:
+                del self.store[keys[0]]
+            return 1
+
+        return run_script
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_INTERVAL = timedelta(milliseconds=50)
+
+
+def make_schedulers(redis: FakeRedis, count: int) -> list[JobsScheduler]:
+    return [
+        JobsScheduler(
+            redis,  # type: ignore
+            getLogger(),
+            heartbeat_interval_sec=0.01,
+            retry_delay_sec=0.01,
+        )
+        for _ in range(count)
+    ]
+
+
+async def run_for(schedulers: list[JobsScheduler], seconds: float) -> None:
+    for scheduler in schedulers:
+        scheduler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        for scheduler in schedulers:
+            await scheduler.aclose()
+
+
+def dt(s: str) -> datetime:
+    return datetime.fromisoformat(s).replace(tzinfo=UTC)
+
+
+class TestSchedules:
+    @pytest.mark.parametrize(
+        ["expression", "after", "expected"],
+        [
+            ("*/15 * * * *", "2025-03-10 10:07:30", "2025-03-10 10:15"),
+            ("0 3 * * *", "2025-03-10 03:00", "2025-03-11 03:00"),
+            ("30 9-17/4 * * *", "2025-03-10 13:31", "2025-03-10 17:30"),
+            # monday
+            ("0 0 * * 1", "2025-03-11 00:00", "2025-03-17 00:00"),
+            # sunday
+            ("0 0 * * 7", "2025-03-11 00:00", "2025-03-16 00:00"),
+            # either 1st day of month or monday
+            ("0 0 1 * 1", "2025-03-25 00:00", "2025-03-31 00:00"),
+            ("0 0 29 2 *", "2025-01-01 00:00", "2028-02-29 00:00"),
+            ("@monthly", "2025-12-15 00:00", "2026-01-01 00:00"),
+        ],
+    )
+    def test_cron_next_after(self, expression: str, after: str, expected: str):
+        assert CronSchedule(expression).next_after(dt(after)) == dt(expected)
+
+    @pytest.mark.parametrize(
+        "expression", ["* * * *", "60 * * * *", "*/0 * * * *", "0 0 30 2 *"]
+    )
+    def test_invalid_cron(self, expression: str):
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+
+    def test_interval_aligned_to_epoch(self):
+        schedule = IntervalSchedule(timedelta(hours=1))
+        assert schedule.next_after(dt("2025-03-10 10:07")) == dt("2025-03-10 11:00")
+        assert schedule.next_after(dt("2025-03-10 11:00")) == dt("2025-03-10 12:00")
+
+
+class TestJobsScheduler:
+    @pytest.mark.asyncio
+    async def test_run_once_per_slot_across_processes(self):
+        redis = FakeRedis()
+        slots: list[int] = []
+
+        async def job():
+            slots.append((datetime.now(UTC) - _EPOCH) // _INTERVAL)
+
+        schedulers = make_schedulers(redis, 3)
+        for scheduler in schedulers:
+            scheduler.add(ScheduledJob("job", job, IntervalSchedule(_INTERVAL)))
+        await run_for(schedulers, 0.3)
+        assert len(slots) >= 3
+        assert len(slots) == len(set(slots))
+        [status] = await schedulers[0].statuses()
+        assert status.state == JobState.SUCCEEDED
+        assert status.duration_sec is not None
+        assert status.next_run_at and status.slot_at
+        assert status.next_run_at > status.slot_at
+
+    @pytest.mark.asyncio
+    async def test_failure_doesnt_stop_job(self):
+        redis = FakeRedis()
+        runs = 0
+
+        async def job():
+            nonlocal runs
+            runs += 1
+            raise RuntimeError("Database is unavailable")
+
+        [scheduler] = make_schedulers(redis, 1)
+        scheduler.add(ScheduledJob("job", job, IntervalSchedule(_INTERVAL)))
+        scheduler.start()
+        try:
+            # scheduler isn't closed in the middle of the run
+            async with asyncio.timeout(1):
+                while runs < 2 or (await scheduler.statuses())[0].error is None:
+                    await asyncio.sleep(0.01)
+        finally:
+            await scheduler.aclose()
+        [status] = await scheduler.statuses()
+        assert status.state == JobState.FAILED
+        assert status.error == "Database is unavailable"
+
+    @pytest.mark.asyncio
+    async def test_continuous_job_run_by_single_process(self):
+        redis = FakeRedis()
+        runners: list[int] = []
+
+        def make_job(i: int):
+            async def job():
+                runners.append(i)
+                await asyncio.Event().wait()
+
+            return job
+
+        schedulers = make_schedulers(redis, 2)
+        for i, scheduler in enumerate(schedulers):
+            scheduler.add(ScheduledJob("job", make_job(i)))
+        await run_for(schedulers, 0.1)
+        assert len(runners) == 1
+        [status] = await schedulers[1].statuses()
+        assert status.state == JobState.RUNNING
+        assert status.next_run_at is None
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from core.api.sse import handlers, send_event
+
+
+class Progress(BaseModel):
+    done: int
+
+
+async def subscribe():
+    stream = handlers.message_queue_consumer()
+    # subscriber is registered when the stream is started
+    first = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    return stream, first
+
+
+class TestMessageStream:
+    @pytest.mark.asyncio
+    async def test_every_subscriber_gets_event(self):
+        (stream_1, first_1), (stream_2, first_2) = [
+            await subscribe() for _ in range(2)
+        ]
+        await send_event("progress", Progress(done=1))
+        for event in await asyncio.gather(first_1, first_2):
+            assert (event.event, event.data) == ("progress", '{"done":1}')
+        await stream_1.aclose()
+        await stream_2.aclose()
+        assert not handlers._subscribers
+
+    @pytest.mark.asyncio
+    async def test_events_dropped_without_subscribers(self):
+        await send_event("progress", Progress(done=1))
+        stream, first = await subscribe()
+        await send_event("progress", Progress(done=2))
+        assert (await first).data == '{"done":2}'
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_loses_oldest_events(self, monkeypatch):
+        monkeypatch.setattr(handlers, "_SUBSCRIBER_QUEUE_SIZE", 2)
+        stream, first = await subscribe()
+        for done in range(3):
+            await send_event("progress", Progress(done=done))
+        assert (await first).data == '{"done":1}'
+        assert (await anext(stream)).data == '{"done":2}'
+        await stream.aclose()
@@ -1,8 +1,11 @@
 import abc
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
+from contextvars import ContextVar
+from enum import StrEnum
 import typing as t
 from logging import Logger
 
+from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -22,6 +25,24 @@ class AcceptsSessionI(t.Protocol):
     def __init__(self, session): ...
 
 
+class TimeoutsProfile(StrEnum):
+    STOREFRONT = "storefront"
+    ADMIN = "admin"
+    BATCH = "batch"
+
+
+class DBTimeoutsI(t.Protocol):
+    statement_timeout_ms: int | None
+    lock_timeout_ms: int | None
+
+
+# profile used by units of work which were created without explicitly specified timeouts.
+# Usually set per route
+current_timeouts_profile: ContextVar[TimeoutsProfile | None] = ContextVar(
+    "current_timeouts_profile", default=None
+)
+
+
 class AbstractUnitOfWork[S](abc.ABC):
     exception_mapper: AbstractDatabaseExceptionMapper
 
@@ -36,9 +57,14 @@ class AbstractUnitOfWork[S](abc.ABC):
     steam_gifts_repo: orders_i.SteamGiftsRepositoryI
     orders_repo: orders_i.AllOrdersRepositoryI
 
-    def __init__(self, session_factory: Callable[[], S]):
+    def __init__(
+        self,
+        session_factory: Callable[[], S],
+        timeouts_profile: TimeoutsProfile | None = None,
+    ):
         self._session_factory = session_factory
         self._session: S | None = None
+        self._timeouts_profile = timeouts_profile or current_timeouts_profile.get()
 
     async def __aenter__(self) -> t.Self:
         self._session = self._session_factory()
@@ -46,7 +72,7 @@ class AbstractUnitOfWork[S](abc.ABC):
         return self
 
     @abc.abstractmethod
-    def __call__(self) -> t.Self: ...
+    def __call__(self, timeouts: TimeoutsProfile | None = None) -> t.Self: ...
 
     async def __aexit__(self, exc_type, exc_value, _):
         await self.rollback()
@@ -71,23 +97,56 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork[AsyncSession]):
         exception_mapper: AbstractDatabaseExceptionMapper,
         session_factory: Callable[[], AsyncSession],
         logger: Logger,
+        timeouts: Mapping[TimeoutsProfile, DBTimeoutsI],
+        timeouts_profile: TimeoutsProfile | None = None,
     ) -> None:
         self._logger = logger
         self.exception_mapper = exception_mapper
-        super().__init__(session_factory)
+        self._timeouts = timeouts
+        super().__init__(session_factory, timeouts_profile)
 
     def _handle_exc(self, exc: Exception) -> t.NoReturn:
         if isinstance(exc, (DatabaseError, ServiceError)):
             raise exc
         self.exception_mapper.map_and_raise(getattr(exc, "orig", None) or exc)
 
-    def __call__(self) -> t.Self:
+    def __call__(self, timeouts: TimeoutsProfile | None = None) -> t.Self:
         # create new instance to be able to share in async code
         self = self.__class__(
-            self.exception_mapper, self._session_factory, self._logger
+            self.exception_mapper,
+            self._session_factory,
+            self._logger,
+            self._timeouts,
+            timeouts,
         )
         return self
 
+    async def __aenter__(self) -> t.Self:
+        await super().__aenter__()
+        assert self._session is not None
+        if self._timeouts_profile is not None:
+            try:
+                await self._set_timeouts(self._timeouts[self._timeouts_profile])
+            except SQLAlchemyError as e:
+                await self._session.close()
+                self._handle_exc(e)
+        return self
+
+    async def _set_timeouts(self, timeouts: DBTimeoutsI) -> None:
+        """Sets timeouts for the current transaction only. Single round trip is used for all of them"""
+        assert self._session is not None
+        settings = {
+            "statement_timeout": timeouts.statement_timeout_ms,
+            "lock_timeout": timeouts.lock_timeout_ms,
+        }
+        columns = [
+            func.set_config(name, str(value), True)
+            for name, value in settings.items()
+            if value is not None
+        ]
+        if columns:
+            await self._session.execute(select(*columns))
+
     def _init_repos(self):
         # initializing repositories using created session
         self.users_repo = self._register_repo(users_repos.UsersRepository)
@@ -5,16 +5,23 @@ from .enums import (
     IntWithLabel as IntWithLabel,
 )
 from .httpx_utils import (
+    CacheValidators as CacheValidators,
     JWTAuth as JWTAuth,
+    RateLimitedTransport as RateLimitedTransport,
+    TokenBucket as TokenBucket,
     log_response as log_response,
     log_request as log_request,
+    conditional_get as conditional_get,
 )
 from .helpers import (
     run_coroutine_sync as run_coroutine_sync,
     normalize_s as normalize_s,
     measure_time_async as measure_time_async,
     chunkify as chunkify,
+    chunkify_async as chunkify_async,
+    buffered as buffered,
 )
+from .json_stream import iter_json_object_items as iter_json_object_items
 from .files import (
     save_upload_file as save_upload_file,
     resolve_file_url as resolve_file_url,
@@ -1,5 +1,13 @@
 import asyncio
-from collections.abc import Callable, Generator, Sequence
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    Callable,
+    Generator,
+    Sequence,
+)
+from contextlib import aclosing
+from dataclasses import dataclass
 from functools import wraps
 from logging import Logger
 import time
@@ -26,12 +34,12 @@ def normalize_s(s: str) -> str:
 
 
 def measure_time_async[T](func: Callable[..., Coroutine[Any, Any, T]]):
-    from core.ioc import Resolve
-
-    logger = Resolve(Logger)
-
     @wraps(func)
     async def wrapper(*args, **kwargs) -> T:
+        # resolved lazily, so that decorated classes can be registered in the container
+        from core.ioc import Resolve
+
+        logger = Resolve(Logger)
         t1 = time.perf_counter()
         logger.info("%s execution started", func)
         res = await func(*args, **kwargs)
@@ -46,11 +54,54 @@ def measure_time_async[T](func: Callable[..., Coroutine[Any, Any, T]]):
 
 
 def chunkify[T](seq: Sequence[T], chunk_size: int) -> Generator[Sequence[T]]:
-    if not len(seq):
-        return
-    full_chunks_count, left_unchunked = divmod(len(seq), chunk_size)
-    top = 0
-    for i in range(full_chunks_count):
-        top = i + 1 * chunk_size
-        yield seq[i:top]
-    yield seq[top : top + left_unchunked]
+    for i in range(0, len(seq), chunk_size):
+        yield seq[i : i + chunk_size]
+
+
+async def chunkify_async[T](
+    source: AsyncIterable[T], chunk_size: int
+) -> AsyncGenerator[list[T]]:
+    chunk: list[T] = []
+    async for item in source:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class _SourceFailed:
+    error: Exception
+
+
+_source_exhausted = object()
+
+
+async def buffered[T](source: AsyncGenerator[T], maxsize: int) -> AsyncGenerator[T]:
+    """Consumes source in a background task, so that it runs ahead of the consumer
+    by up to maxsize items. Used as a bounded queue between stages of a pipeline"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def produce():
+        try:
+            async with aclosing(source):
+                async for item in source:
+                    await queue.put(item)
+        except Exception as e:
+            await queue.put(_SourceFailed(e))
+            return
+        await queue.put(_source_exhausted)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _source_exhausted:
+                return
+            if isinstance(item, _SourceFailed):
+                raise item.error
+            yield item
+    finally:
+        task.cancel()
@@ -1,5 +1,8 @@
+import asyncio
 from contextlib import contextmanager
+from dataclasses import dataclass
 from logging import Logger, getLogger
+import time
 import httpx
 from typing import Any
 
@@ -41,6 +44,95 @@ class JWTAuth(httpx.Auth):
         request.headers["Authorization"] = f"Bearer {self._token}"
 
 
+class TokenBucket:
+    """Allows up to `burst` acquisitions at once, refilling at `rate_per_sec`.
+    Waiters are served in FIFO order"""
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        self._rate = rate_per_sec
+        self._capacity = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated_at) * self._rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Throttles requests using a separate token bucket for every host"""
+
+    def __init__(
+        self,
+        rate_per_sec: float,
+        burst: int,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._rate = rate_per_sec
+        self._burst = burst
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self._rate, self._burst)
+        await bucket.acquire()
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+@dataclass(frozen=True)
+class CacheValidators:
+    """Validators of the previously received response, used to make conditional requests"""
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @classmethod
+    def from_response(cls, resp: httpx.Response) -> "CacheValidators":
+        return cls(resp.headers.get("etag"), resp.headers.get("last-modified"))
+
+    def to_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+async def conditional_get(
+    client: httpx.AsyncClient,
+    url: str,
+    validators: CacheValidators | None = None,
+    **kwargs,
+) -> httpx.Response | None:
+    """Sends GET request which is answered with 304 if resource wasn't modified
+    since validators were received. Returns None in such case"""
+    headers = kwargs.pop("headers", {})
+    if validators is not None:
+        headers = {**headers, **validators.to_headers()}
+    resp = await client.get(url, headers=headers, **kwargs)
+    if resp.status_code == httpx.codes.NOT_MODIFIED:
+        return None
+    resp.raise_for_status()
+    return resp
+
+
 @contextmanager
 def log_request(prefix: str, logger: Logger):
     from core.services.exceptions import ExternalGatewayError
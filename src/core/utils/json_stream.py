@@ -0,0 +1,96 @@
+import json
+from collections.abc import AsyncGenerator, AsyncIterable
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+# consumed part of the buffer is dropped once it's larger
+_COMPACT_THRESHOLD = 64 * 1024
+
+
+class _JSONStreamReader:
+    """Parses JSON values one by one from the stream of text chunks.
+    Only the current value and the unconsumed chunk are kept in memory"""
+
+    def __init__(self, chunks: AsyncIterable[str]):
+        self._chunks = aiter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    async def _read_more(self) -> bool:
+        if self._exhausted:
+            return False
+        try:
+            chunk = await anext(self._chunks)
+        except StopAsyncIteration:
+            self._exhausted = True
+            return False
+        if self._pos > _COMPACT_THRESHOLD:
+            self._buffer, self._pos = self._buffer[self._pos :], 0
+        self._buffer += chunk
+        return True
+
+    async def peek(self) -> str:
+        """Returns next non whitespace char without consuming it, empty at the end"""
+        while True:
+            buffer = self._buffer
+            while self._pos < len(buffer) and buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._read_more():
+                return ""
+
+    async def expect(self, chars: str) -> str:
+        char = await self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} at {self._pos}, got {char or 'end'!r}"
+            )
+        self._pos += 1
+        return char
+
+    async def value(self) -> Any:
+        await self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # value is cut by the end of the chunk
+                if await self._read_more():
+                    continue
+                raise
+            # number at the end of the chunk may continue in the next one
+            if end < len(self._buffer) or not await self._read_more():
+                self._pos = end
+                return value
+
+
+async def _object_keys(reader: _JSONStreamReader) -> AsyncGenerator[str]:
+    """Yields keys of the object, value of every key should be consumed by the caller"""
+    await reader.expect("{")
+    if await reader.peek() == "}":
+        await reader.expect("}")
+        return
+    while True:
+        key = await reader.value()
+        await reader.expect(":")
+        yield key
+        if await reader.expect(",}") == "}":
+            return
+
+
+async def iter_json_object_items(
+    chunks: AsyncIterable[str], key: str
+) -> AsyncGenerator[tuple[str, Any]]:
+    """Yields items of the object which is stored under the key
+    of the top level object, without loading the whole document in memory.
+    Values of other keys are skipped"""
+    reader = _JSONStreamReader(chunks)
+    async for top_key in _object_keys(reader):
+        if top_key == key:
+            async for item_key in _object_keys(reader):
+                yield item_key, await reader.value()
+        else:
+            await reader.value()
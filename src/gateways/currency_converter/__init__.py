@@ -1,4 +1,8 @@
-from .converter import CurrencyConverter as CurrencyConverter
+from .converter import (
+    CurrencyConverter as CurrencyConverter,
+    ExchangeRatesSnapshot as ExchangeRatesSnapshot,
+    MissingExchangeRateError as MissingExchangeRateError,
+)
 from .schemas import (
     ExchangeRate as ExchangeRate,
     ExchangeRatesMappingDTO as ExchangeRatesMappingDTO,
@@ -1,30 +1,106 @@
+from collections.abc import Mapping, Sequence
 from decimal import Decimal
 from .schemas import PriceUnitDTO, ExchangeRatesMappingDTO, SetExchangeRateDTO
-from gateways.db import RedisClient
+from gateways.db.redis_gateway import HotSettings
+
+
+class MissingExchangeRateError(ValueError):
+    def __init__(self, pairs: Sequence[tuple[str, str]]):
+        self.pairs = pairs
+        super().__init__(
+            "Exchange rates for exchanging %s weren't found"
+            % ", ".join(f"{from_} to {to}" for from_, to in pairs)
+        )
+
+
+def _build_key(rate_from: str, rate_to: str) -> str:
+    return f"{rate_from}/{rate_to}".lower()
+
+
+class ExchangeRatesSnapshot:
+    """Exchange rates loaded at once. Used to convert many prices
+    in memory with consistent rates instead of querying storage for every price"""
+
+    def __init__(self, rates: Mapping[str, str]):
+        self._rates = {key.lower(): Decimal(rate) for key, rate in rates.items()}
+
+    def _find_rate(
+        self, rate_from: str, rate_to: str
+    ) -> tuple[Decimal, bool] | None:
+        """Returns rate and flag which indicates whether rate is reversed"""
+        rate = self._rates.get(_build_key(rate_from, rate_to))
+        if rate is not None:
+            return rate, False
+        rate = self._rates.get(_build_key(rate_to, rate_from))
+        if rate is not None:
+            return rate, True
+        return None
+
+    def convert_many(
+        self, prices: Sequence[PriceUnitDTO], to_curr: str = "rub"
+    ) -> list[PriceUnitDTO]:
+        """Raises MissingExchangeRateError before converting anything
+        if rate for any of the prices is missing"""
+        rates: dict[str, tuple[Decimal, bool] | None] = {}
+        missing: list[tuple[str, str]] = []
+        for price in prices:
+            curr = price.currency_code.lower()
+            if curr == to_curr.lower() or curr in rates:
+                continue
+            rates[curr] = self._find_rate(curr, to_curr)
+            if rates[curr] is None:
+                missing.append((curr, to_curr.lower()))
+        if missing:
+            raise MissingExchangeRateError(missing)
+        res: list[PriceUnitDTO] = []
+        for price in prices:
+            found = rates.get(price.currency_code.lower())
+            if found is None:  # the same currency
+                res.append(price)
+                continue
+            rate, is_reversed = found
+            value = price.value / rate if is_reversed else price.value * rate
+            res.append(
+                PriceUnitDTO.model_validate({"value": value, "currency_code": to_curr})
+            )
+        return res
+
+    def convert_price(
+        self, price: PriceUnitDTO, to_curr: str = "rub"
+    ) -> PriceUnitDTO:
+        return self.convert_many([price], to_curr)[0]
 
 
 class CurrencyConverter:
-    def __init__(self, redis: RedisClient) -> None:
-        self._db = redis
+    def __init__(self, settings: HotSettings) -> None:
+        # rates are cached in process, so conversions don't query redis
+        self._db = settings
         self._name = "exchange_rates"
 
-    def _build_key(self, rate_from: str, rate_to: str) -> str:
-        return f"{rate_from}/{rate_to}".lower()
-
     async def get_exchange_rates(self) -> ExchangeRatesMappingDTO:
         res = await self._db.hgetall(self._name)
         return ExchangeRatesMappingDTO.model_validate(res)
 
+    async def snapshot(self) -> ExchangeRatesSnapshot:
+        """Loads all exchange rates in a single request"""
+        return ExchangeRatesSnapshot(await self._db.hgetall(self._name))
+
+    async def convert_many(
+        self, prices: Sequence[PriceUnitDTO], to_curr: str = "rub"
+    ) -> list[PriceUnitDTO]:
+        snapshot = await self.snapshot()
+        return snapshot.convert_many(prices, to_curr)
+
     async def get_rate_for(
         self, rate_from: str, rate_to: str = "rub"
     ) -> Decimal | None:
-        key = self._build_key(rate_from, rate_to)
+        key = _build_key(rate_from, rate_to)
         res = await self._db.hget(self._name, key)
         return Decimal(res) if res else None
 
     async def set_exchange_rate(self, dto: SetExchangeRateDTO):
         await self._db.hset(
-            self._name, self._build_key(dto.from_, dto.to), str(dto.new_rate)
+            self._name, _build_key(dto.from_, dto.to), str(dto.new_rate)
         )
 
     async def convert_price(
@@ -36,9 +112,8 @@ class CurrencyConverter:
         if exchange_rate is None:
             reversed_rate = await self.get_rate_for(to_curr, price.currency_code)
             if reversed_rate is None:
-                raise ValueError(
-                    "Exchange rate for exchanging %s to %s wasn't found"
-                    % (price.currency_code, to_curr)
+                raise MissingExchangeRateError(
+                    [(price.currency_code.lower(), to_curr.lower())]
                 )
             return PriceUnitDTO.model_validate(
                 {
@@ -26,6 +26,12 @@ class OperationRestrictedByRefError(ForeignKeyViolationError): ...
 class RelatedResourceNotFoundError(ForeignKeyViolationError): ...
 
 
+class QueryTimeoutError(DatabaseError): ...
+
+
+class LockTimeoutError(DatabaseError): ...
+
+
 class AbstractDatabaseExceptionMapper[K: Exception](
     AbstractExceptionMapper[K, DatabaseError]
 ): ...
@@ -35,6 +41,10 @@ class PostgresExceptionsMapper(AbstractDatabaseExceptionMapper[pg_exc.Error]):
     EXCEPTION_MAPPING: Mapping[type[pg_exc.Error], type[DatabaseError]] = {
         pg_exc.NoData: NotFoundError,
         pg_exc.UniqueViolation: AlreadyExistsError,
+        # raised when statement_timeout is exceeded
+        pg_exc.QueryCanceled: QueryTimeoutError,
+        # raised when lock_timeout is exceeded
+        pg_exc.LockNotAvailable: LockTimeoutError,
     }
 
     def get_default_exc(self) -> type[DatabaseError]:
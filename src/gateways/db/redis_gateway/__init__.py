@@ -1,3 +1,11 @@
+from .lease import LeaseLostError, RedisLease
 from .main import RedisClient, AvailableIndexes
+from .settings import HotSettings
 
-__all__ = ["RedisClient", "AvailableIndexes"]
+__all__ = [
+    "RedisClient",
+    "AvailableIndexes",
+    "RedisLease",
+    "LeaseLostError",
+    "HotSettings",
+]
@@ -0,0 +1,78 @@
+import asyncio
+from collections.abc import Coroutine
+from contextlib import suppress
+from typing import Any
+
+from redis.asyncio import Redis
+
+# value of the key is compared with owner, so that lease taken over by
+# someone else (after expiration) isn't extended or released by mistake
+_EXTEND_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLostError(Exception):
+    def __init__(self, key: str):
+        super().__init__("Lease %s was lost" % key)
+        self.key = key
+
+
+class RedisLease:
+    """Lock which expires unless it's owner extends it with heartbeats,
+    so that lock of the crashed process doesn't stay forever"""
+
+    def __init__(self, redis: Redis, key: str, ttl_sec: float):
+        self._redis = redis
+        self._key = key
+        self._ttl_ms = int(ttl_sec * 1000)
+        self._extend = redis.register_script(_EXTEND_SCRIPT)
+        self._release = redis.register_script(_RELEASE_SCRIPT)
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    async def acquire(self, owner: str) -> bool:
+        return bool(await self._redis.set(self._key, owner, nx=True, px=self._ttl_ms))
+
+    async def extend(self, owner: str) -> bool:
+        return bool(await self._extend(keys=[self._key], args=[owner, self._ttl_ms]))
+
+    async def release(self, owner: str) -> bool:
+        return bool(await self._release(keys=[self._key], args=[owner]))
+
+    async def owner(self) -> str | None:
+        return await self._redis.get(self._key)
+
+    async def run_while_held[T](
+        self,
+        owner: str,
+        coro: Coroutine[Any, Any, T],
+        heartbeat_interval_sec: float,
+    ) -> T:
+        """Runs coroutine extending the lease every heartbeat interval.
+        If lease can't be extended (it's expired or deleted), coroutine is cancelled
+        and LeaseLostError is raised. Lease should be already acquired"""
+        task = asyncio.ensure_future(coro)
+        try:
+            while True:
+                done, _ = await asyncio.wait([task], timeout=heartbeat_interval_sec)
+                if done:
+                    return task.result()
+                if not await self.extend(owner):
+                    raise LeaseLostError(self._key)
+        finally:
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
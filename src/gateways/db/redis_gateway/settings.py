@@ -0,0 +1,98 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping
+from contextlib import suppress
+from logging import Logger
+from typing import Any
+
+from redis.asyncio import Redis
+
+_INVALIDATION_CHANNEL = "hot_settings:invalidated"
+
+
+class HotSettings:
+    """Registry of the small settings stored in redis, which are read on hot paths.
+    Values are cached in process while it's subscribed to invalidations.
+    Every write through the registry publishes the changed key,
+    so that caches of all processes are dropped. While subscription
+    isn't established (or lost) values are read from redis"""
+
+    def __init__(self, redis: Redis, logger: Logger, resubscribe_delay_sec: float = 1):
+        self._redis = redis
+        self._logger = logger
+        self._resubscribe_delay_sec = resubscribe_delay_sec
+        self._cache: dict[str, Any] = {}
+        # incremented on every invalidation, so that value which was read
+        # concurrently with the change isn't cached
+        self._generation = 0
+        self._subscribed = False
+        self._listener: asyncio.Task | None = None
+
+    def _invalidate(self, key: str | None = None) -> None:
+        self._generation += 1
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(_INVALIDATION_CHANNEL)
+                    async for msg in pubsub.listen():
+                        if msg["type"] == "subscribe":
+                            # changes could be missed while connection was lost
+                            self._invalidate()
+                            self._subscribed = True
+                        elif msg["type"] == "message":
+                            self._invalidate(msg["data"])
+            except Exception as e:
+                self._logger.warning("Settings invalidation subscription failed: %s", e)
+            finally:
+                self._subscribed = False
+                self._invalidate()
+            await asyncio.sleep(self._resubscribe_delay_sec)
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _read[T](self, key: str, load: Callable[[], Awaitable[T]]) -> T:
+        self._ensure_listener()
+        if key in self._cache:
+            return self._cache[key]
+        generation = self._generation
+        value = await load()
+        if self._subscribed and generation == self._generation:
+            self._cache[key] = value
+        return value
+
+    async def _write(self, key: str, command: Callable[[Any], Any]) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            command(pipe)
+            pipe.publish(_INVALIDATION_CHANNEL, key)
+            await pipe.execute()
+        # own cache is dropped without waiting for the message
+        self._invalidate(key)
+
+    async def get(self, key: str) -> str | None:
+        return await self._read(key, lambda: self._redis.get(key))
+
+    async def hgetall(self, key: str) -> Mapping[str, str]:
+        return await self._read(key, lambda: self._redis.hgetall(key))  # type: ignore
+
+    async def hget(self, key: str, field: str) -> str | None:
+        return (await self.hgetall(key)).get(field)
+
+    async def set(self, key: str, value: str | int) -> None:
+        await self._write(key, lambda pipe: pipe.set(key, value))
+
+    async def hset(self, key: str, field: str, value: str) -> None:
+        await self._write(key, lambda pipe: pipe.hset(key, field, value))
+
+    async def aclose(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
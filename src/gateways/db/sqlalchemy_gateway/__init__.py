@@ -2,3 +2,4 @@ from .main import SqlAlchemyClient  # noqa
 from .column_types import *  # noqa
 from .models import *  # noqa
 from .repository import SqlAlchemyRepository, AbstractRepository, PaginationRepository  # noqa
+from .slow_queries import SlowQueryLog, SlowQueryEntry  # noqa
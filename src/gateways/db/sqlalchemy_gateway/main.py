@@ -2,7 +2,12 @@ from gateways.db.exceptions import AbstractDatabaseExceptionMapper
 from gateways.db.exceptions import DBConnectionError
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import OperationalError
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
 
 
 class SqlAlchemyClient:
@@ -31,3 +36,7 @@ class SqlAlchemyClient:
             self._engine, class_=AsyncSession, expire_on_commit=False
         )
         self.exception_mapper = exception_mapper
+
+    @property
+    def engine(self) -> AsyncEngine:
+        return self._engine
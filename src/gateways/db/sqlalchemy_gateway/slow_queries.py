@@ -0,0 +1,154 @@
+import asyncio
+import random
+import sys
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from decimal import Decimal
+from logging import Logger
+from typing import Any
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .repository import AbstractRepository
+
+# execution option which turns off logging for statements executed by the log itself
+_SKIP_OPTION = "skip_slow_query_log"
+_START_TIME_KEY = "slow_query_log_start_time"
+_MAX_LOGGED_PARAMS_SETS = 3
+
+
+@dataclass
+class SlowQueryEntry:
+    statement: str
+    params: Any
+    duration_ms: float
+    repo_method: str | None
+    route: str | None
+    occurred_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    plan: Any = None
+
+
+def _redact_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+def _redact_params(params: Any) -> Any:
+    """Hides values which may contain sensitive data (emails, hashes, tokens, etc...)
+    leaving only numbers as is"""
+    if isinstance(params, dict):
+        return {key: _redact_value(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if params and isinstance(params[0], (dict, list, tuple)):  # executemany
+            return [_redact_params(p) for p in params[:_MAX_LOGGED_PARAMS_SETS]]
+        return [_redact_value(value) for value in params]
+    return _redact_value(params)
+
+
+def _find_repo_method() -> str | None:
+    """Walks up the stack to find repository method which executed the statement.
+    Async statements are executed in a child greenlet,
+    so stack of the parent greenlet (where coroutines live) is inspected"""
+    current = greenlet.getcurrent()
+    frame = current.parent.gr_frame if current.parent else sys._getframe()
+    while frame is not None:
+        obj = frame.f_locals.get("self")
+        if isinstance(obj, AbstractRepository):
+            return f"{type(obj).__name__}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """Logs statements which took longer than threshold and keeps recent ones in a bounded buffer.
+    Plans of sampled slow SELECT statements are captured in background"""
+
+    def __init__(
+        self,
+        logger: Logger,
+        threshold_ms: int,
+        buffer_size: int,
+        explain_sample_rate: float,
+        route_getter: Callable[[], str | None],
+    ):
+        self._logger = logger
+        self._threshold_sec = threshold_ms / 1000
+        self._entries: deque[SlowQueryEntry] = deque(maxlen=buffer_size)
+        self._explain_sample_rate = explain_sample_rate
+        self._get_route = route_getter
+        self._engine: AsyncEngine | None = None
+        self._bg_tasks: set[asyncio.Task] = set()
+
+    def attach(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_execute)
+
+    def recent(self) -> Sequence[SlowQueryEntry]:
+        return list(reversed(self._entries))
+
+    def _before_execute(
+        self, conn: Connection, cursor, statement, params, context, executemany
+    ):
+        conn.info.setdefault(_START_TIME_KEY, []).append(time.perf_counter())
+
+    def _after_execute(
+        self,
+        conn: Connection,
+        cursor,
+        statement: str,
+        params: Any,
+        context: ExecutionContext,
+        executemany: bool,
+    ):
+        duration = time.perf_counter() - conn.info[_START_TIME_KEY].pop()
+        if duration < self._threshold_sec or context.execution_options.get(
+            _SKIP_OPTION
+        ):
+            return
+        entry = SlowQueryEntry(
+            statement=statement,
+            params=_redact_params(params),
+            duration_ms=round(duration * 1000, 2),
+            repo_method=_find_repo_method(),
+            route=self._get_route(),
+        )
+        self._entries.append(entry)
+        self._logger.warning(
+            "Slow query (%.2f ms) from %s, route: %s. Statement: %s, params: %s",
+            entry.duration_ms,
+            entry.repo_method,
+            entry.route,
+            statement,
+            entry.params,
+        )
+        if (
+            not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self._explain_sample_rate
+        ):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(entry, statement, params)
+            )
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+
+    async def _explain(self, entry: SlowQueryEntry, statement: str, params: Any):
+        assert self._engine is not None
+        try:
+            async with self._engine.connect() as conn:
+                conn = await conn.execution_options(**{_SKIP_OPTION: True})
+                res = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, params
+                )
+                entry.plan = res.scalar_one()
+                await conn.rollback()
+        except Exception as e:
+            self._logger.warning("Failed to capture plan for slow query: %s", e)
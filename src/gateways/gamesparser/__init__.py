@@ -1 +1,10 @@
-from .client import SalesParser as SalesParser
+from .client import (
+    FetchPolicy as FetchPolicy,
+    SalesParser as SalesParser,
+    ShardingPolicy as ShardingPolicy,
+)
+from .progress import SalesProgressTracker as SalesProgressTracker
+from .shards import ShardedParsingPool as ShardedParsingPool
+from .snapshot import SalesSnapshot as SalesSnapshot, SnapshotMode as SnapshotMode
+from .updater import SalesUpdater as SalesUpdater
+from .worker import SalesWorker as SalesWorker
@@ -1,29 +1,57 @@
-from collections.abc import Awaitable, Callable
-from dataclasses import asdict
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
+from enum import Enum, auto
+import hashlib
 from logging import Logger
+import math
+import random
+import re
 import time
 import asyncio
-from typing import Literal, NamedTuple
+from typing import Literal, NamedTuple, cast
 
+from bs4 import BeautifulSoup, Tag
+from bs4.element import NavigableString
 from gamesparser.models import PsnParsedItem, XboxParsedItem
-from gamesparser.psn import PsnItemDetails
-from gamesparser.xbox import XboxItemDetails
 
-from core.uow import AbstractUnitOfWork
-from core.utils import measure_time_async
-from products.domain.interfaces import ParsedUrlsMapping
+# details parsers aren't public, gamesparser is pinned to the version they're taken from
+from gamesparser.psn import _ItemDetailsParser as PsnDetailsParser
+from gamesparser.xbox import _ItemDetailsParser as XboxDetailsParser
+
+from core.uow import AbstractUnitOfWork, TimeoutsProfile
+from core.utils import (
+    CacheValidators,
+    buffered,
+    chunkify,
+    conditional_get,
+    measure_time_async,
+)
+from products.domain.interfaces import DetailsPagesMapping
 from products.domain.services import ProductsService
 
-from httpx import AsyncClient
+from httpx import AsyncClient, HTTPStatusError, TransportError
 from gamesparser import ParsedItem, PsnParser, XboxParser
 
 from products.models import (
+    ProductKey,
     ProductPlatform,
     PsnParseRegions,
     XboxParseRegions,
 )
-from products.schemas import PsnGameParsedDTO, XboxGameParsedDTO
+from products.schemas import (
+    BaseParsedGameDTO,
+    DetailsPageState,
+    PricedParsedGame,
+    PsnGameParsedDTO,
+    SalesUpdateStage,
+    XboxGameParsedDTO,
+)
+
+from .progress import SalesProgressTracker
+from .shards import ShardedParsingPool, parse_psn_pages, parse_xbox_items
+from .snapshot import SalesSnapshot, SnapshotMode
 
 type PsnUpdateRows = list[tuple[int, str, datetime | None]]
 type XboxUpdateRows = list[tuple[int, str]]
@@ -33,27 +61,129 @@ class PsnRowForUpdate(NamedTuple):
     id: int
     description: str
     deal_until: datetime | None
+    details_hash: str
+    details_etag: str | None
+    details_last_modified: str | None
 
 
 class XboxRowForUpdate(NamedTuple):
     id: int
     description: str
+    details_hash: str
+    details_etag: str | None
+    details_last_modified: str | None
+
+
+type RowForUpdate = PsnRowForUpdate | XboxRowForUpdate
+
+
+class _DetailsFetchResult(Enum):
+    NOT_CHANGED = auto()
+    FAILED = auto()
+
+
+# headers which psn parser of the pinned gamesparser version sends
+_PSN_HEADERS = {
+    "accept-language": "ru-UA",
+    "user-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
+}
+
+
+def _hash_content(tag: Tag | NavigableString | None) -> str:
+    return hashlib.blake2b(str(tag).encode(), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class FetchPolicy:
+    concurrency: int
+    max_retries: int
+    backoff_base_sec: float
+    backoff_max_sec: float
+
+
+def _is_retryable(e: Exception) -> bool:
+    # psn parser wraps 403 (rate limit) responses into plain exception
+    if isinstance(e.__cause__, HTTPStatusError):
+        e = e.__cause__
+    if isinstance(e, HTTPStatusError):
+        status = e.response.status_code
+        return status in (403, 429) or status >= 500
+    return isinstance(e, TransportError)
+
+
+@dataclass(frozen=True)
+class ShardingPolicy:
+    pool: ShardedParsingPool
+    psn_pages_per_shard: int
+    xbox_items_per_shard: int
+    # psn pages requests rate of all processes
+    psn_rate_per_sec: float
+    psn_burst: int
+
+    def psn_process_rate(self) -> tuple[float, int]:
+        """Rate and burst of a single process"""
+        processes = self.pool.processes
+        return self.psn_rate_per_sec / processes, max(self.psn_burst // processes, 1)
+
+
+def _psn_locale(region: PsnParseRegions) -> str:
+    lang_mapping = {"ua": "ru"}
+    region_code = region.value.lower()
+    return f"{lang_mapping.get(region_code, 'en')}-{region_code}"
+
+
+def _take_psn_items(
+    items: Iterable[PsnParsedItem], emitted: set[str], limit: int | None
+) -> list[PsnParsedItem]:
+    """Items which were emitted before are taken again (with prices of another region),
+    new ones are taken until limit is reached"""
+    batch = []
+    for item in items:
+        if item.id not in emitted:
+            if limit is not None and len(emitted) >= limit:
+                continue
+            emitted.add(item.id)
+        batch.append(item)
+    return batch
 
 
 class SalesParser:
+    """Details clients are expected to be rate limited (see RateLimitedTransport)"""
+
     def __init__(
         self,
         logger: Logger,
         client: AsyncClient,
         products_service: ProductsService,
         uow: AbstractUnitOfWork,
+        progress: SalesProgressTracker,
+        xbox_details_client: AsyncClient,
+        psn_details_client: AsyncClient,
+        xbox_fetch_policy: FetchPolicy,
+        psn_fetch_policy: FetchPolicy,
+        update_chunk_size: int,
+        import_batch_size: int,
+        pipeline_queue_size: int,
+        snapshot: SalesSnapshot | None = None,
+        sharding: ShardingPolicy | None = None,
     ):
         self._logger = logger
         self._client = client
         self._service = products_service
         self._uow = uow
+        self._progress = progress
         self._xbox_parser = XboxParser(self._client)
         self._psn_parser = PsnParser(self._client)
+        self._xbox_details_client = xbox_details_client
+        self._psn_details_client = psn_details_client
+        self._xbox_details_parser = XboxParser(xbox_details_client)
+        self._xbox_fetch_policy = xbox_fetch_policy
+        self._psn_fetch_policy = psn_fetch_policy
+        self._update_chunk_size = update_chunk_size
+        self._import_batch_size = import_batch_size
+        self._pipeline_queue_size = pipeline_queue_size
+        self._snapshot = snapshot
+        self._sharding = sharding
 
     def _parsed_to_dict(self, parsed: ParsedItem):
         return {
@@ -77,113 +207,459 @@ class SalesParser:
     def _parsed_psn_to_dto(self, product: PsnParsedItem) -> PsnGameParsedDTO:
         return PsnGameParsedDTO.model_validate(self._parsed_to_dict(product))
 
+    async def _add_parse_total(self, platform: ProductPlatform, count: int):
+        # every parsed item is saved, so both stages have the same amount of items
+        await self._progress.add_total(platform, SalesUpdateStage.PARSE, count)
+        await self._progress.add_total(platform, SalesUpdateStage.SAVE, count)
+
+    async def _parse_xbox_batches(
+        self, limit: int | None
+    ) -> AsyncGenerator[list[XboxParsedItem]]:
+        # the whole deal list is a single page, so items are parsed from it in batches.
+        # Internals of the parser are used to avoid keeping all parsed items in memory,
+        # that's why version of gamesparser is pinned exactly
+        parser = self._xbox_parser
+        parser._regions = parser._normalize_regions([XboxParseRegions.US])
+        soup = await parser._load_page("/deal-list")
+        tags = soup.select(
+            "div.content-wrapper section.content div.box-body.comparison-table-entry",
+            limit=limit or 0,
+        )
+        soup.decompose()
+        await self._add_parse_total(ProductPlatform.XBOX, len(tags))
+        for chunk in chunkify(tags, self._import_batch_size):
+            batch = parser._parse_items(chunk)
+            await self._progress.advance(
+                ProductPlatform.XBOX, SalesUpdateStage.PARSE, len(batch)
+            )
+            yield batch
+
+    async def _parse_xbox_sharded(
+        self, limit: int | None
+    ) -> AsyncGenerator[list[XboxParsedItem]]:
+        """Same as _parse_xbox_batches, but items are parsed in the process pool.
+        Tags are passed to the pool as html, so the deal list page is parsed once"""
+        assert self._sharding is not None
+        parser = self._xbox_parser
+        regions = parser._normalize_regions([XboxParseRegions.US])
+        soup = await parser._load_page("/deal-list")
+        tags = soup.select(
+            "div.content-wrapper section.content div.box-body.comparison-table-entry",
+            limit=limit or 0,
+        )
+        await self._add_parse_total(ProductPlatform.XBOX, len(tags))
+        shards = [
+            ("".join(str(tag) for tag in chunk), regions)
+            for chunk in chunkify(tags, self._sharding.xbox_items_per_shard)
+        ]
+        soup.decompose()
+        async for items in self._sharding.pool.run(parse_xbox_items, shards):
+            await self._progress.advance(
+                ProductPlatform.XBOX, SalesUpdateStage.PARSE, len(items)
+            )
+            for chunk in chunkify(items, self._import_batch_size):
+                yield list(chunk)
+
+    async def _parse_psn_batches(
+        self, limit: int | None
+    ) -> AsyncGenerator[list[PsnParsedItem]]:
+        """Yields items parsed from a few pages at a time. The same item may be yielded
+        again for another region with prices of that region only"""
+        parser = self._psn_parser
+        emitted: set[str] = set()
+        for region in PsnParseRegions:
+            parser._curr_locale = _psn_locale(region)
+            last_page_num, page_size = await parser._get_last_page_num_with_page_size()
+            if limit is not None:
+                last_page_num = min(last_page_num, math.ceil(limit / page_size))
+            # approximate, since the last page may be incomplete
+            await self._add_parse_total(ProductPlatform.PSN, last_page_num * page_size)
+            pages_per_batch = max(1, self._import_batch_size // page_size)
+            for first_page in range(1, last_page_num + 1, pages_per_batch):
+                last_page = min(first_page + pages_per_batch, last_page_num + 1)
+                # parsed items are accumulated in the parser's mapping
+                await asyncio.gather(
+                    *(parser._parse_single_page(i) for i in range(first_page, last_page))
+                )
+                batch = _take_psn_items(parser._items_mapping.values(), emitted, limit)
+                parser._items_mapping.clear()
+                await self._progress.advance(
+                    ProductPlatform.PSN, SalesUpdateStage.PARSE, len(batch)
+                )
+                yield batch
+
+    async def _parse_psn_sharded(
+        self, limit: int | None
+    ) -> AsyncGenerator[list[PsnParsedItem]]:
+        """Same as _parse_psn_batches, but page ranges of all regions
+        are parsed in the process pool concurrently"""
+        assert self._sharding is not None
+        parser = self._psn_parser
+        rate_per_sec, burst = self._sharding.psn_process_rate()
+        shards: list[tuple[str, int, int, float, int]] = []
+        for region in PsnParseRegions:
+            locale = parser._curr_locale = _psn_locale(region)
+            last_page_num, page_size = await parser._get_last_page_num_with_page_size()
+            if limit is not None:
+                last_page_num = min(last_page_num, math.ceil(limit / page_size))
+            await self._add_parse_total(ProductPlatform.PSN, last_page_num * page_size)
+            pages_per_shard = self._sharding.psn_pages_per_shard
+            shards.extend(
+                (
+                    locale,
+                    first_page,
+                    min(first_page + pages_per_shard, last_page_num + 1),
+                    rate_per_sec,
+                    burst,
+                )
+                for first_page in range(1, last_page_num + 1, pages_per_shard)
+            )
+        emitted: set[str] = set()
+        async for items in self._sharding.pool.run(parse_psn_pages, shards):
+            batch = _take_psn_items(items, emitted, limit)
+            await self._progress.advance(
+                ProductPlatform.PSN, SalesUpdateStage.PARSE, len(batch)
+            )
+            for chunk in chunkify(batch, self._import_batch_size):
+                yield list(chunk)
+
+    async def _replay_batches(
+        self, platform: ProductPlatform, limit: int | None
+    ) -> AsyncGenerator[list[ParsedItem]]:
+        assert self._snapshot is not None
+        async for batch in self._snapshot.replay_items(
+            platform, self._import_batch_size, limit
+        ):
+            await self._add_parse_total(platform, len(batch))
+            await self._progress.advance(platform, SalesUpdateStage.PARSE, len(batch))
+            yield batch
+
+    def recording_snapshot(
+        self, platform: ProductPlatform
+    ) -> AbstractContextManager[None]:
+        """Details responses of the platform are written to the snapshot
+        (if it's recorded) within the block"""
+        if self._snapshot is None:
+            return nullcontext()
+        return self._snapshot.recording_details(platform)
+
+    def _sales_batches[T: ParsedItem](
+        self,
+        platform: ProductPlatform,
+        parse: Callable[[int | None], AsyncGenerator[list[T]]],
+        limit: int | None,
+    ) -> AsyncGenerator[list[T]]:
+        """Sales are scraped unless snapshot is replayed"""
+        if self._snapshot is None:
+            return parse(limit)
+        if self._snapshot.mode == SnapshotMode.REPLAY:
+            self._logger.info("Replaying %s sales from snapshot", str(platform.value))
+            return cast(AsyncGenerator[list[T]], self._replay_batches(platform, limit))
+        return self._snapshot.record_items(platform, parse(limit))
+
+    async def _import_sales[T: ParsedItem](
+        self,
+        platform: ProductPlatform,
+        batches: AsyncGenerator[list[T]],
+        to_dto: Callable[[T], BaseParsedGameDTO],
+        is_full_run: bool,
+    ) -> list[int]:
+        """Pipeline of parse -> validate -> price -> save stages connected with bounded queues.
+        Only the difference with the current catalog is saved.
+        Every batch is saved in a separate transaction, so progress isn't lost if parsing fails.
+        Products which weren't parsed are deactivated if all items were parsed (full run)"""
+        rates = await self._service.get_exchange_rates_snapshot()
+        sync = await self._service.start_parsed_catalog_sync(platform)
+        queue_size = self._pipeline_queue_size
+
+        async def validate() -> AsyncGenerator[list[BaseParsedGameDTO]]:
+            async for batch in buffered(batches, queue_size):
+                yield [to_dto(item) for item in batch]
+
+        async def price() -> AsyncGenerator[list[PricedParsedGame]]:
+            async for dtos in buffered(validate(), queue_size):
+                yield self._service.price_parsed_products(dtos, rates)
+
+        inserted: dict[ProductKey, int] = {}
+        saved_count = 0
+        async for priced in buffered(price(), queue_size):
+            inserted.update(await self._service.sync_priced_products(priced, sync))
+            saved_count += len(priced)
+            self._logger.info(
+                "%s %d sales saved: %d new, %d updated, %d unchanged",
+                str(platform.value),
+                saved_count,
+                sync.inserted_count,
+                len(sync.updated_ids),
+                sync.unchanged_count,
+            )
+            await self._progress.advance(platform, SalesUpdateStage.SAVE, len(priced))
+        if is_full_run:
+            deactivated_count = await self._service.finish_parsed_catalog_sync(sync)
+            self._logger.info(
+                "%s %d disappeared sales deactivated",
+                str(platform.value),
+                deactivated_count,
+            )
+        await self._progress.finish_stage(platform, SalesUpdateStage.PARSE)
+        await self._progress.finish_stage(platform, SalesUpdateStage.SAVE)
+        # details of the changed products are refreshed as well
+        return list(inserted.values()) + sync.updated_ids
+
     @measure_time_async
-    async def parse_and_save_xbox(self, parse_limit: int | None = None):
-        xbox_sales = await self._xbox_parser.parse([XboxParseRegions.US], parse_limit)
-        self._logger.info("Xbox %d sales parsed. Saving...", len(xbox_sales))
-        mapped_to_dto = [self._parsed_xbox_to_dto(product) for product in xbox_sales]
-        res = await self._service.save_parsed_products(mapped_to_dto)
-        return res
+    async def parse_and_save_xbox(self, parse_limit: int | None = None) -> list[int]:
+        return await self._import_sales(
+            ProductPlatform.XBOX,
+            self._sales_batches(
+                ProductPlatform.XBOX,
+                self._parse_xbox_sharded if self._sharding else self._parse_xbox_batches,
+                parse_limit,
+            ),
+            self._parsed_xbox_to_dto,
+            is_full_run=parse_limit is None,
+        )
 
     @measure_time_async
-    async def parse_and_save_psn(self, parse_limit: int | None = None):
-        psn_sales = await self._psn_parser.parse(
-            [el.value for el in PsnParseRegions], parse_limit
+    async def parse_and_save_psn(self, parse_limit: int | None = None) -> list[int]:
+        return await self._import_sales(
+            ProductPlatform.PSN,
+            self._sales_batches(
+                ProductPlatform.PSN,
+                self._parse_psn_sharded if self._sharding else self._parse_psn_batches,
+                parse_limit,
+            ),
+            self._parsed_psn_to_dto,
+            is_full_run=parse_limit is None,
         )
-        self._logger.info("Psn %d sales parsed. Saving...", len(psn_sales))
-        mapped_to_dto = [self._parsed_psn_to_dto(product) for product in psn_sales]
-        res = await self._service.save_parsed_products(mapped_to_dto)
-        return res
 
-    async def _update_parsed_details[T](
+    async def _fetch_with_retries[T](
         self,
-        products_urls: ParsedUrlsMapping,
+        product_id: int,
+        page: DetailsPageState,
+        fetch_func: Callable[[int, DetailsPageState], Awaitable[T]],
+        policy: FetchPolicy,
+    ) -> T | Literal[_DetailsFetchResult.FAILED]:
+        for attempt in range(policy.max_retries + 1):
+            try:
+                return await fetch_func(product_id, page)
+            except Exception as e:
+                if attempt == policy.max_retries or not _is_retryable(e):
+                    self._logger.exception(
+                        "Error during parsing details for id: %d, url: %s. Error: %s",
+                        product_id,
+                        page.url,
+                        e,
+                    )
+                    return _DetailsFetchResult.FAILED
+                # exponential backoff with full jitter
+                delay = random.uniform(
+                    0,
+                    min(policy.backoff_max_sec, policy.backoff_base_sec * 2**attempt),
+                )
+                self._logger.warning(
+                    "Failed to parse details for id: %d (%s). Retrying in %.2f seconds",
+                    product_id,
+                    e,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+        return _DetailsFetchResult.FAILED
+
+    async def _save_rows_in_chunks(
+        self,
+        rows_queue: asyncio.Queue[RowForUpdate | None],
+        for_platform: ProductPlatform,
+    ) -> int:
+        """Consumes rows until None is received, every chunk is saved in a separate transaction"""
+        total = 0
+        chunk: list[RowForUpdate] = []
+        while True:
+            row = await rows_queue.get()
+            if row is not None:
+                chunk.append(row)
+            if chunk and (row is None or len(chunk) >= self._update_chunk_size):
+                async with self._uow(TimeoutsProfile.BATCH) as uow:
+                    await uow.products_repo.update_from_rows(chunk)
+                total += len(chunk)
+                await self._progress.advance(
+                    for_platform, SalesUpdateStage.DETAILS, len(chunk)
+                )
+                self._logger.info(
+                    "%s %d rows updated", str(for_platform.value), total
+                )
+                chunk = []
+            if row is None:
+                return total
+
+    async def _update_parsed_details(
+        self,
+        pages: DetailsPagesMapping,
         for_platform: Literal[ProductPlatform.XBOX, ProductPlatform.PSN],
-        parse_func: Callable[[str], Awaitable[T | None]],
-        row_extracter: Callable[[int, T], NamedTuple],
-        *,
-        timeout: int | None = None,
+        fetch_row: Callable[
+            [int, DetailsPageState], Awaitable[RowForUpdate | _DetailsFetchResult]
+        ],
+        policy: FetchPolicy,
     ):
+        """Fetches details concurrently (up to policy.concurrency requests at a time)
+        and streams rows of the changed details into the database in chunks"""
         self._logger.info(
             "Start updating %s details for %d products",
             str(for_platform.value),
-            len(products_urls),
+            len(pages),
         )
-        if not len(products_urls):
+        if not len(pages):
             self._logger.info("Nothing to update. Exiting...")
             return
         t1 = time.perf_counter()
-        rows: list[NamedTuple] = []
-        for id, url in products_urls.items():
-            try:
-                data = await parse_func(url)
-            except Exception as e:
-                self._logger.exception(
-                    "Error during parsing details for id: %d, url: %s. Error: %s",
-                    id,
-                    url,
-                    e,
-                )
-                continue
-            if data is None:
-                self._logger.warning(
-                    "Failed to parse details for id: %d. Left unchaged",
-                    id,
-                )
-                continue
-            rows.append(row_extracter(id, data))
-            if timeout:
-                await asyncio.sleep(timeout)
-        self._logger.info(
-            "%s Parsed %d rows for update. Updating...",
-            str(for_platform.value),
-            len(rows),
+        items = iter(pages.items())
+        unchanged_count = 0
+        rows_queue: asyncio.Queue[RowForUpdate | None] = asyncio.Queue(
+            maxsize=self._update_chunk_size
         )
-        async with self._uow() as uow:
-            await uow.products_repo.update_from_rows(rows)
+
+        async def fetch_worker():
+            nonlocal unchanged_count
+            # iterator is shared between workers, so every page is fetched once
+            for id, page in items:
+                res = await self._fetch_with_retries(id, page, fetch_row, policy)
+                if res is _DetailsFetchResult.FAILED:
+                    self._logger.warning(
+                        "Failed to parse details for id: %d. Left unchaged",
+                        id,
+                    )
+                    await self._progress.advance(
+                        for_platform, SalesUpdateStage.DETAILS, errors=1
+                    )
+                elif res is _DetailsFetchResult.NOT_CHANGED:
+                    unchanged_count += 1
+                    await self._progress.advance(
+                        for_platform, SalesUpdateStage.DETAILS, processed=1
+                    )
+                else:
+                    await rows_queue.put(res)
+
+        async def fetch_all():
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(policy.concurrency):
+                    tg.create_task(fetch_worker())
+            await rows_queue.put(None)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(fetch_all())
+            saver = tg.create_task(self._save_rows_in_chunks(rows_queue, for_platform))
         self._logger.info(
-            "%s update completed. Which took: %.2f seconds",
+            "%s update completed. Updated %d rows, %d left unchanged, which took: %.2f seconds",
             str(for_platform.value),
+            saver.result(),
+            unchanged_count,
             time.perf_counter() - t1,
         )
 
-    async def _update_psn_details(self, products_urls: ParsedUrlsMapping):
-        def row_extracter(id: int, data: PsnItemDetails) -> PsnRowForUpdate:
-            """Forms set of fields to be used for updating row.
-            Sets deal_until to be expired if data.deal_until is None
-            because it means that product is not discounted anymore and should be cleaned up"""
-
-            deal_until = data.deal_until
-            if deal_until is None:
-                deal_until = datetime.now() - timedelta(days=1)
-            return PsnRowForUpdate(id, data.description, deal_until)
-
-        await self._update_parsed_details(
-            products_urls,
-            ProductPlatform.PSN,
-            self._psn_parser.parse_item_details,
-            row_extracter,
-            timeout=1,
+    async def _fetch_psn_row(
+        self, id: int, page: DetailsPageState
+    ) -> PsnRowForUpdate | _DetailsFetchResult:
+        resp = await conditional_get(
+            self._psn_details_client,
+            page.url,
+            page.validators,
+            follow_redirects=True,
+            headers=_PSN_HEADERS,
+        )
+        if resp is None:
+            return _DetailsFetchResult.NOT_CHANGED
+        item_container = BeautifulSoup(resp.text, "html.parser").find("main")
+        details_hash = _hash_content(item_container)
+        if details_hash == page.content_hash:
+            return _DetailsFetchResult.NOT_CHANGED
+        try:
+            data = PsnDetailsParser(item_container).parse()
+        except AssertionError as e:
+            self._logger.warning(
+                "Failed to parse details for url: %s. Error: %s", page.url, e
+            )
+            return _DetailsFetchResult.FAILED
+        deal_until = data.deal_until
+        if deal_until is None:
+            # product is not discounted anymore and should be cleaned up
+            deal_until = datetime.now() - timedelta(days=1)
+        validators = CacheValidators.from_response(resp)
+        return PsnRowForUpdate(
+            id,
+            data.description,
+            deal_until,
+            details_hash,
+            validators.etag,
+            validators.last_modified,
         )
 
-    async def _update_xbox_details(self, products_urls: ParsedUrlsMapping):
-        def row_extracter(id: int, data: XboxItemDetails) -> XboxRowForUpdate:
-            return XboxRowForUpdate(id, data.description)
-
-        await self._update_parsed_details(
-            products_urls,
-            ProductPlatform.XBOX,
-            self._xbox_parser.parse_item_details,
-            row_extracter,
+    async def _fetch_xbox_row(
+        self, id: int, page: DetailsPageState
+    ) -> XboxRowForUpdate | _DetailsFetchResult:
+        # deal page refers to the store page, which details are parsed from.
+        # Hash and validators belong to the store page
+        soup = await self._xbox_details_parser._load_page(page.url)
+        store_link_tag = soup.find(
+            "a",
+            attrs={
+                "rel": "nofollow noopener",
+                "target": "_blank",
+                "title": re.compile(r".+"),
+            },
+        )
+        if not isinstance(store_link_tag, Tag):
+            self._logger.warning("Store link wasn't found on page: %s", page.url)
+            return _DetailsFetchResult.FAILED
+        store_url = str(store_link_tag.get("href")).replace("en-us", "ru-RU")
+        try:
+            resp = await conditional_get(
+                self._xbox_details_client,
+                store_url,
+                page.validators,
+                follow_redirects=True,
+            )
+        except HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            self._logger.warning("Details page for url: %s not found", page.url)
+            return _DetailsFetchResult.FAILED
+        if resp is None:
+            return _DetailsFetchResult.NOT_CHANGED
+        item_container = BeautifulSoup(resp.text, "html.parser").find(
+            "div", role="main", id="PageContent"
+        )
+        details_hash = _hash_content(item_container)
+        if details_hash == page.content_hash:
+            return _DetailsFetchResult.NOT_CHANGED
+        try:
+            assert item_container, "Page content wasn't found"
+            data = XboxDetailsParser(item_container).parse()
+        except AssertionError as e:
+            self._logger.warning(
+                "Failed to parse details for url: %s. Error: %s", page.url, e
+            )
+            return _DetailsFetchResult.FAILED
+        validators = CacheValidators.from_response(resp)
+        return XboxRowForUpdate(
+            id,
+            data.description,
+            details_hash,
+            validators.etag,
+            validators.last_modified,
         )
 
     async def update_for_platform(
-        self, platform: ProductPlatform, products_urls: ParsedUrlsMapping
+        self, platform: ProductPlatform, pages: DetailsPagesMapping
     ):
+        """Updates details of the products. Details are fetched with conditional requests
+        and aren't parsed and saved if the page hasn't changed since the last update"""
         match platform:
             case ProductPlatform.XBOX:
-                await self._update_xbox_details(products_urls)
+                await self._update_parsed_details(
+                    pages, platform, self._fetch_xbox_row, self._xbox_fetch_policy
+                )
             case ProductPlatform.PSN:
-                await self._update_psn_details(products_urls)
+                await self._update_parsed_details(
+                    pages, platform, self._fetch_psn_row, self._psn_fetch_policy
+                )
             case _:
                 raise ValueError("Unsupported platform: %s" % platform)
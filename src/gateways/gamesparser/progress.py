@@ -0,0 +1,92 @@
+import time
+from datetime import UTC, datetime
+from logging import Logger
+
+from products.domain.interfaces import SalesJobsQueueI
+from products.models import ProductPlatform
+from products.schemas import SalesProgressDTO, SalesStageProgressDTO, SalesUpdateStage
+
+
+def _update_rate(stage: SalesStageProgressDTO, now: datetime) -> None:
+    elapsed = ((stage.finished_at or now) - stage.started_at).total_seconds()
+    if not stage.processed or elapsed <= 0:
+        return
+    stage.items_per_sec = round(stage.processed / elapsed, 2)
+    if stage.finished_at is not None:
+        stage.eta_sec = 0
+    elif stage.total is not None:
+        remaining = max(0, stage.total - stage.processed - stage.errors)
+        stage.eta_sec = round(remaining / stage.items_per_sec, 1)
+
+
+class SalesProgressTracker:
+    """Collects progress of every stage of the sales update per platform.
+    Progress is published at most once per flush interval (and when stage is finished),
+    so that reporting doesn't slow the update down"""
+
+    def __init__(
+        self, logger: Logger, sales_jobs: SalesJobsQueueI, flush_interval_sec: float
+    ):
+        self._logger = logger
+        self._sales_jobs = sales_jobs
+        self._flush_interval = flush_interval_sec
+        self._progress: dict[ProductPlatform, SalesProgressDTO] = {}
+        self._flushed_at: dict[ProductPlatform, float] = {}
+
+    def start(self, platform: ProductPlatform) -> None:
+        """Resets progress of the platform. Called when update of the platform begins"""
+        now = datetime.now(UTC)
+        self._progress[platform] = SalesProgressDTO(
+            platform=platform, started_at=now, updated_at=now, stages={}
+        )
+        self._flushed_at[platform] = 0
+
+    def _get_stage(
+        self, platform: ProductPlatform, stage: SalesUpdateStage
+    ) -> SalesStageProgressDTO:
+        if platform not in self._progress:
+            self.start(platform)
+        stages = self._progress[platform].stages
+        if stage not in stages:
+            stages[stage] = SalesStageProgressDTO(started_at=datetime.now(UTC))
+        return stages[stage]
+
+    async def add_total(
+        self, platform: ProductPlatform, stage: SalesUpdateStage, count: int
+    ) -> None:
+        progress = self._get_stage(platform, stage)
+        progress.total = (progress.total or 0) + count
+        await self._flush(platform)
+
+    async def advance(
+        self,
+        platform: ProductPlatform,
+        stage: SalesUpdateStage,
+        processed: int = 0,
+        errors: int = 0,
+    ) -> None:
+        progress = self._get_stage(platform, stage)
+        progress.processed += processed
+        progress.errors += errors
+        await self._flush(platform)
+
+    async def finish_stage(
+        self, platform: ProductPlatform, stage: SalesUpdateStage
+    ) -> None:
+        self._get_stage(platform, stage).finished_at = datetime.now(UTC)
+        await self._flush(platform, force=True)
+
+    async def _flush(self, platform: ProductPlatform, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._flushed_at[platform] < self._flush_interval:
+            return
+        self._flushed_at[platform] = now
+        progress = self._progress[platform]
+        progress.updated_at = datetime.now(UTC)
+        for stage in progress.stages.values():
+            _update_rate(stage, progress.updated_at)
+        try:
+            await self._sales_jobs.save_progress(progress)
+        except Exception as e:
+            # update shouldn't fail because of reporting
+            self._logger.warning("Failed to publish sales update progress: %s", e)
@@ -0,0 +1,86 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import AsyncGenerator, Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+from bs4 import BeautifulSoup
+from gamesparser import PsnParser, XboxParser
+from gamesparser.models import PsnParsedItem, XboxParsedItem
+
+from core.utils import RateLimitedTransport
+
+
+def parse_psn_pages(
+    locale: str,
+    first_page: int,
+    last_page: int,
+    rate_per_sec: float,
+    burst: int,
+) -> list[PsnParsedItem]:
+    """Parses pages [first_page, last_page) of the psn sales for the locale.
+    Pages are loaded one by one and requests are throttled,
+    rate is expected to be the share of the process"""
+
+    async def parse() -> list[PsnParsedItem]:
+        transport = RateLimitedTransport(rate_per_sec, burst)
+        async with httpx.AsyncClient(transport=transport) as client:
+            # internals of the pinned gamesparser version are used to parse a range
+            parser = PsnParser(client)
+            parser._curr_locale = locale
+            for page_num in range(first_page, last_page):
+                await parser._parse_single_page(page_num)
+            return list(parser._items_mapping.values())
+
+    return asyncio.run(parse())
+
+
+def parse_xbox_items(html: str, regions: list[str]) -> list[XboxParsedItem]:
+    """Parses items of the xbox deal list. Html consists of the item tags only"""
+    soup = BeautifulSoup(html, "html.parser")
+    tags = soup.find_all("div", class_="comparison-table-entry", recursive=False)
+    # client isn't used, since nothing is loaded
+    parser = XboxParser(None)  # type: ignore[arg-type]
+    parser._regions = regions
+    items = parser._parse_items(tags)
+    soup.decompose()
+    return items
+
+
+class ShardedParsingPool:
+    """Process pool which parses shards of sales (eg.: pages of a region), so that
+    CPU-bound parsing isn't serialized on a single core.
+    Processes are started with the first run and kept warm between runs"""
+
+    def __init__(self, processes: int | None):
+        self.processes = processes or os.cpu_count() or 1
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # forking a process with running event loop and threads isn't safe
+            self._executor = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run[T](
+        self, func: Callable[..., list[T]], shards: Sequence[tuple]
+    ) -> AsyncGenerator[list[T]]:
+        """Yields results of the shards in order of their completion"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        futures = [loop.run_in_executor(executor, func, *args) for args in shards]
+        try:
+            for future in asyncio.as_completed(futures):
+                yield await future
+        finally:
+            # shards which weren't started yet are dropped if consumer stops early
+            for future in futures:
+                future.cancel()
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
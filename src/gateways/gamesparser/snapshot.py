@@ -0,0 +1,193 @@
+import gzip
+import json
+from collections.abc import AsyncGenerator, Iterator
+from contextlib import contextmanager
+from enum import StrEnum, auto
+from itertools import batched, islice
+from pathlib import Path
+from typing import IO, Any
+
+import httpx
+from gamesparser import ParsedItem
+from gamesparser.models import PsnParsedItem, XboxParsedItem
+from pydantic import TypeAdapter
+
+from products.models import ProductPlatform
+
+_ITEM_ADAPTERS: dict[ProductPlatform, TypeAdapter[Any]] = {
+    ProductPlatform.XBOX: TypeAdapter(XboxParsedItem),
+    ProductPlatform.PSN: TypeAdapter(PsnParsedItem),
+}
+# body is stored decoded, so encoding headers of the original response don't apply
+_SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+# requests are recorded without validators, so that full responses are stored
+_CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+
+class SnapshotMode(StrEnum):
+    RECORD = auto()
+    REPLAY = auto()
+
+
+def _request_key(request: httpx.Request) -> str:
+    return f"{request.method} {request.url}"
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Writes every response received while recording into gzipped JSONL file.
+    File is created (or truncated) by every start of the recording,
+    responses received outside of it are passed through"""
+
+    def __init__(self, path: Path, transport: httpx.AsyncBaseTransport):
+        self._path = path
+        self._transport = transport
+        self._file: IO[str] | None = None
+
+    def start(self) -> None:
+        self.stop()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self._path, "wt", encoding="utf-8")
+
+    def stop(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._file is None:
+            return await self._transport.handle_async_request(request)
+        for header in _CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+        resp = await self._transport.handle_async_request(request)
+        try:
+            content = await resp.aread()
+        finally:
+            await resp.aclose()
+        headers = [
+            (name, value)
+            for name, value in resp.headers.multi_items()
+            if name.lower() not in _SKIPPED_HEADERS
+        ]
+        record = {
+            "key": _request_key(request),
+            "status_code": resp.status_code,
+            "headers": headers,
+            "body": content.decode("utf-8", errors="replace"),
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return httpx.Response(
+            resp.status_code, headers=headers, content=content, request=request
+        )
+
+    async def aclose(self) -> None:
+        self.stop()
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves responses written by RecordingTransport without network access.
+    Requests which weren't recorded are answered with 404.
+    Conditional requests are answered with 304 if validators match the recorded ones"""
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._records: dict[str, dict[str, Any]] | None = None
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        records = {}
+        if self._path.exists():
+            with gzip.open(self._path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    records[record["key"]] = record
+        return records
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._records is None:
+            self._records = self._load()
+        record = self._records.get(_request_key(request))
+        if record is None:
+            return httpx.Response(404, request=request)
+        headers = httpx.Headers(record["headers"])
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        if (etag and request.headers.get("if-none-match") == etag) or (
+            last_modified and request.headers.get("if-modified-since") == last_modified
+        ):
+            return httpx.Response(304, headers=headers, request=request)
+        return httpx.Response(
+            record["status_code"],
+            headers=headers,
+            content=record["body"].encode(),
+            request=request,
+        )
+
+
+class SalesSnapshot:
+    """Snapshot of the parsed sales and responses of their details pages.
+    In record mode parsed sales and details responses are written to the snapshot,
+    in replay mode they are read from it instead of being scraped,
+    so that the import can be run without network access"""
+
+    def __init__(self, path: Path, mode: SnapshotMode):
+        self._path = path
+        self._mode = mode
+        self._recorders: dict[ProductPlatform, RecordingTransport] = {}
+
+    @property
+    def mode(self) -> SnapshotMode:
+        return self._mode
+
+    def _items_path(self, platform: ProductPlatform) -> Path:
+        return self._path / f"{platform.value}_items.jsonl.gz"
+
+    def _details_path(self, platform: ProductPlatform) -> Path:
+        return self._path / f"{platform.value}_details.jsonl.gz"
+
+    def details_transport(
+        self, platform: ProductPlatform, transport: httpx.AsyncBaseTransport
+    ) -> httpx.AsyncBaseTransport:
+        """Wraps transport of the details client. Passed transport isn't used in replay mode"""
+        if self._mode == SnapshotMode.REPLAY:
+            return ReplayTransport(self._details_path(platform))
+        recorder = RecordingTransport(self._details_path(platform), transport)
+        self._recorders[platform] = recorder
+        return recorder
+
+    @contextmanager
+    def recording_details(self, platform: ProductPlatform) -> Iterator[None]:
+        """Details responses are recorded within the block, so that they're
+        taken from the same run as the items. File is completed when it's left"""
+        recorder = self._recorders.get(platform)
+        if recorder is None:
+            yield
+            return
+        recorder.start()
+        try:
+            yield
+        finally:
+            recorder.stop()
+
+    async def record_items[T: ParsedItem](
+        self, platform: ProductPlatform, batches: AsyncGenerator[list[T]]
+    ) -> AsyncGenerator[list[T]]:
+        """Passes batches through, writing their items to the snapshot"""
+        adapter = _ITEM_ADAPTERS[platform]
+        path = self._items_path(platform)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wb") as f:
+            async for batch in batches:
+                f.writelines(adapter.dump_json(item) + b"\n" for item in batch)
+                yield batch
+
+    async def replay_items(
+        self, platform: ProductPlatform, batch_size: int, limit: int | None = None
+    ) -> AsyncGenerator[list[ParsedItem]]:
+        adapter = _ITEM_ADAPTERS[platform]
+        path = self._items_path(platform)
+        if not path.exists():
+            raise FileNotFoundError(
+                "Snapshot of %s sales not found: %s" % (platform, path)
+            )
+        with gzip.open(path, "rb") as f:
+            for chunk in batched(islice(f, limit), batch_size):
+                yield [adapter.validate_json(line) for line in chunk]
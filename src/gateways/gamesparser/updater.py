@@ -0,0 +1,123 @@
+import asyncio
+import math
+from collections.abc import Sequence
+from logging import Logger
+
+from core.utils import chunkify
+from gateways.db import RedisClient
+from products.domain.services import ProductsService
+from products.models import ProductPlatform
+from products.schemas import SalesUpdateStage
+
+from .client import SalesParser
+from .progress import SalesProgressTracker
+
+_UNPROCESSED_IDS_KEYS = {
+    ProductPlatform.XBOX: "parsed_xbox",
+    ProductPlatform.PSN: "parsed_psn",
+}
+
+
+class SalesUpdater:
+    """Parses and saves sales, then updates their details.
+    Ids of sales which details aren't updated yet are kept in redis,
+    so that interrupted update can be resumed"""
+
+    def __init__(
+        self,
+        logger: Logger,
+        parser: SalesParser,
+        products_service: ProductsService,
+        redis_client: RedisClient,
+        progress: SalesProgressTracker,
+        update_chunk_size: int,
+    ):
+        self._logger = logger
+        self._parser = parser
+        self._products_service = products_service
+        self._redis_client = redis_client
+        self._progress = progress
+        # unprocessed ids are saved after every chunk
+        self._update_chunk_size = update_chunk_size
+
+    async def save_unprocessed_ids(self, platform: ProductPlatform, ids: Sequence[int]):
+        key = _UNPROCESSED_IDS_KEYS[platform]
+        await self._redis_client.delete(key)
+        if not ids:
+            self._logger.info("No unprocessed ids to save")
+            return
+        await self._redis_client.lpush(key, *ids)  # type: ignore
+        self._logger.info(
+            "Succesfully saved %s lastly inserted ids under key: %s", len(ids), key
+        )
+
+    async def has_unprocessed_ids(self, platforms: Sequence[ProductPlatform]) -> bool:
+        res = await asyncio.gather(
+            *[
+                self._redis_client.llen(_UNPROCESSED_IDS_KEYS[platform])  # type: ignore
+                for platform in platforms
+            ]
+        )
+        return any(res)
+
+    async def update_details(self, platform: ProductPlatform, ids: Sequence[int]):
+        pages = await self._products_service.get_details_pages(ids)
+        # overwrite ids with those from pages mapping to ensure they are in corresponding order
+        ids = list(pages.keys())
+        # pages are updated in chunks, total is set once for all of them
+        await self._progress.add_total(platform, SalesUpdateStage.DETAILS, len(pages))
+        chunk_size = self._update_chunk_size
+        total_chunks = math.ceil(len(pages) / chunk_size)
+        total_updated = 0
+        for i, chunk in enumerate(chunkify(list(pages.items()), chunk_size), 1):
+            pages_chunk = dict(chunk)
+            await self._parser.update_for_platform(platform, pages_chunk)
+            self._logger.info(
+                "Chunk %d out of %d chunks updated. Platform: %s",
+                i,
+                total_chunks,
+                platform,
+            )
+            await self.save_unprocessed_ids(platform, ids[chunk_size * i :])
+            total_updated += len(pages_chunk)
+        await self._progress.finish_stage(platform, SalesUpdateStage.DETAILS)
+        self._logger.info("Chunked update completed. Totaly updated: %d", total_updated)
+
+    async def update_last_parsed(self, platform: ProductPlatform) -> bool:
+        """Resumes update of details for sales left unprocessed by the previous run.
+        Returns False if there is nothing to update"""
+        ids: list[str] = await self._redis_client.lrange(  # type: ignore
+            _UNPROCESSED_IDS_KEYS[platform], 0, -1
+        )
+        if not ids:
+            return False
+        self._progress.start(platform)
+        await self.update_details(platform, [int(id) for id in ids])
+        return True
+
+    async def _update_platform(
+        self, platform: ProductPlatform, parse_limit: int | None
+    ):
+        self._progress.start(platform)
+        with self._parser.recording_snapshot(platform):
+            match platform:
+                case ProductPlatform.XBOX:
+                    inserted_ids = await self._parser.parse_and_save_xbox(parse_limit)
+                case ProductPlatform.PSN:
+                    inserted_ids = await self._parser.parse_and_save_psn(parse_limit)
+                case _:
+                    raise ValueError("Unsupported platform: %s" % platform)
+            await self.save_unprocessed_ids(platform, inserted_ids)
+            await self.update_details(platform, inserted_ids)
+
+    async def run(
+        self, platform: ProductPlatform | None = None, parse_limit: int | None = None
+    ):
+        """Updates sales for the platform. None means all platforms"""
+        if platform is not None:
+            await self._update_platform(platform, parse_limit)
+            return
+        limit_per_platform = parse_limit // 2 if parse_limit else None
+        async with asyncio.TaskGroup() as tg:
+            for platform in _UNPROCESSED_IDS_KEYS:
+                tg.create_task(self._update_platform(platform, limit_per_platform))
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import socket
+from datetime import UTC, datetime, timedelta
+from logging import Logger
+
+from core.api.schemas import MessageDTO, MessageSeverity
+from gateways.db.redis_gateway import LeaseLostError, RedisClient, RedisLease
+from products.domain.interfaces import SalesJobsQueueI
+from products.domain.services import ProductsService
+from products.schemas import SalesJobDTO
+
+from .updater import SalesUpdater
+
+_RUNNER_LEASE_KEY = "sales_worker:lease"
+
+
+class SalesWorker:
+    """Long-running consumer of sales update jobs.
+    Only the worker which holds the runner lease consumes jobs, others stay on standby.
+    HTTP and database pools stay warm between jobs"""
+
+    def __init__(
+        self,
+        logger: Logger,
+        updater: SalesUpdater,
+        products_service: ProductsService,
+        sales_jobs: SalesJobsQueueI,
+        redis_client: RedisClient,
+        lease_ttl_sec: int,
+        heartbeat_interval_sec: int,
+        poll_timeout_sec: int,
+        run_every: timedelta | None,
+    ):
+        self._logger = logger
+        self._updater = updater
+        self._products_service = products_service
+        self._sales_jobs = sales_jobs
+        self._runner_lease = RedisLease(redis_client, _RUNNER_LEASE_KEY, lease_ttl_sec)
+        self._heartbeat_interval = heartbeat_interval_sec
+        self._poll_timeout = poll_timeout_sec
+        self._run_every = run_every
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def run(self):
+        self._logger.info("Sales worker %s started", self._worker_id)
+        while True:
+            if not await self._runner_lease.acquire(self._worker_id):
+                await asyncio.sleep(self._heartbeat_interval)
+                continue
+            self._logger.info("Sales worker %s acquired runner lease", self._worker_id)
+            try:
+                await self._runner_lease.run_while_held(
+                    self._worker_id, self._consume(), self._heartbeat_interval
+                )
+            except LeaseLostError:
+                self._logger.warning(
+                    "Sales worker %s lost runner lease", self._worker_id
+                )
+            except Exception as e:
+                self._logger.exception("Sales worker failed: %s", e)
+                await self._runner_lease.release(self._worker_id)
+                await asyncio.sleep(self._heartbeat_interval)
+            except asyncio.CancelledError:
+                await self._runner_lease.release(self._worker_id)
+                raise
+
+    async def _consume(self):
+        while True:
+            job = await self._sales_jobs.pop(self._poll_timeout)
+            if job is not None:
+                await self._process(job)
+            elif self._run_every is not None:
+                await self._schedule_periodic_run()
+
+    async def _schedule_periodic_run(self):
+        assert self._run_every is not None
+        last_update_at = (
+            await self._products_service.get_sales_update_date()
+        ).last_update_at
+        if last_update_at and datetime.now(UTC) - last_update_at < self._run_every:
+            return
+        job = await self._sales_jobs.enqueue(None)
+        if job is not None:
+            self._logger.info("Periodic sales update job %s enqueued", job.id)
+
+    async def _process(self, job: SalesJobDTO):
+        lease = self._sales_jobs.job_lease(job.platform)
+        # pending job is turned into running one only if it wasn't cancelled or expired
+        if not await lease.extend(job.id):
+            self._logger.info("Sales update job %s is cancelled, skipping", job.id)
+            return
+        platform_name = str(job.platform) if job.platform else "All platform"
+        self._logger.info("Sales update job %s started", job.id)
+        try:
+            await lease.run_while_held(
+                job.id, self._updater.run(job.platform), self._heartbeat_interval
+            )
+        except LeaseLostError:
+            self._logger.info("Sales update job %s cancelled", job.id)
+            await self._sales_jobs.publish_message(
+                MessageDTO(
+                    text=f"Sales update for platform {platform_name} was cancelled",
+                    severity=MessageSeverity.WARNING,
+                )
+            )
+            return
+        except Exception as e:
+            self._logger.exception("Sales update job %s failed: %s", job.id, e)
+            await self._sales_jobs.publish_message(
+                MessageDTO(
+                    text=f"Failed to update sales for platform: {platform_name}. Please try again",
+                    severity=MessageSeverity.ERROR,
+                )
+            )
+            return
+        finally:
+            await lease.release(job.id)
+        await self._products_service.set_sales_update_date(job.platform)
+        self._logger.info("Sales update job %s completed", job.id)
+        await self._sales_jobs.publish_message(
+            MessageDTO(
+                text=f"Sales for platform {platform_name} were succesfully updated",
+                severity=MessageSeverity.SUCCESS,
+            )
+        )
@@ -1,24 +1,40 @@
-from collections.abc import Sequence
+from collections.abc import AsyncGenerator
 from decimal import Decimal
 from logging import Logger
 import uuid
-from httpx import AsyncClient
-from core.utils import JWTAuth
+from httpx import AsyncClient, Timeout
+from pydantic import ValidationError
+from core.api.schemas import EMPTY_REGION
+from core.utils import JWTAuth, chunkify_async, iter_json_object_items
 from core.utils.httpx_utils import log_request, log_response
 from orders.schemas import CreateSteamGiftOrderDTO, CreateSteamTopUpOrderDTO
 from products.domain.services import ProductsService
+from products.models import ProductPlatform
 from products.schemas import SteamGameParsedDTO
 from gateways.currency_converter import ExchangeRatesMappingDTO
 
+# read timeout applies to every chunk of the stream, so that the sync
+# fails on stalled upstream instead of blocking the job forever
+_GOODS_STREAM_TIMEOUT = Timeout(30, connect=10)
+
 
 class GamesForFarmAPIClient:
+    """Syncs steam catalog from GamesForFarm goods. The goods document is parsed
+    from the response stream item by item and saved in batches, so that memory usage
+    doesn't depend on the size of the catalog"""
+
     def __init__(
-        self, client: AsyncClient, products_service: ProductsService, logger: Logger
+        self,
+        client: AsyncClient,
+        products_service: ProductsService,
+        logger: Logger,
+        import_batch_size: int = 200,
     ) -> None:
         self._url = "https://gamesforfarm.com/api?key=GamesInStock_Gamesforfarm"
         self._client = client
         self._service = products_service
         self._logger = logger
+        self._import_batch_size = import_batch_size
 
     def _good_to_dto(self, good: dict) -> SteamGameParsedDTO:
         return SteamGameParsedDTO.model_validate(
@@ -27,24 +43,53 @@ class GamesForFarmAPIClient:
                 "price_rub": good["price_wmr"],  # price in rubs
                 "discount": 0,
                 "image_url": good["icon"],
+                "prices": [
+                    {
+                        "region": EMPTY_REGION,
+                        "currency_code": "rub",
+                        "value": good["price_wmr"],
+                    }
+                ],
             }
         )
 
-    async def _fetch_goods_without_bundle(self) -> Sequence[SteamGameParsedDTO]:
+    async def _stream_goods_without_bundle(
+        self,
+    ) -> AsyncGenerator[SteamGameParsedDTO]:
         self._logger.info("Fetching goods from api...")
-        resp = await self._client.get(self._url)
-        data = resp.json()["goods"]
-        goods = list(data.values())
-        goods_no_bundle = [
-            good for good in goods if "bundle" not in good["name"].lower()
-        ]
-        self._logger.info("Goods succesfully fetched and filtered")
-        return [self._good_to_dto(good) for good in goods_no_bundle]
-
-    # async def fetch_and_save(self):
-    #     goods = await self._fetch_goods_without_bundle()
-    #     await self._service.load_new_steam_items(goods)
-    #     self._logger.info("Fetched goods succesfully loaded")
+        skipped_count = 0
+        async with self._client.stream(
+            "GET", self._url, timeout=_GOODS_STREAM_TIMEOUT
+        ) as resp:
+            resp.raise_for_status()
+            async for _, good in iter_json_object_items(resp.aiter_text(), "goods"):
+                if "bundle" in good["name"].lower():
+                    continue
+                try:
+                    yield self._good_to_dto(good)
+                except ValidationError as e:
+                    skipped_count += 1
+                    self._logger.warning("Invalid good %s: %s", good["name"], e)
+        self._logger.info("Goods fetched, %d invalid goods skipped", skipped_count)
+
+    async def fetch_and_save(self) -> None:
+        """Saves the difference between goods and the steam catalog in batches.
+        Games which disappeared from goods are deactivated"""
+        rates = await self._service.get_exchange_rates_snapshot()
+        sync = await self._service.start_parsed_catalog_sync(ProductPlatform.STEAM)
+        async for batch in chunkify_async(
+            self._stream_goods_without_bundle(), self._import_batch_size
+        ):
+            priced = self._service.price_parsed_products(batch, rates)
+            await self._service.sync_priced_products(priced, sync)
+        deactivated_count = await self._service.finish_parsed_catalog_sync(sync)
+        self._logger.info(
+            "Steam goods saved: %d new, %d updated, %d unchanged, %d deactivated",
+            sync.inserted_count,
+            len(sync.updated_ids),
+            sync.unchanged_count,
+            deactivated_count,
+        )
 
 
 class NSGiftsAPIClient:
@@ -1,4 +1,5 @@
 import asyncio
+from datetime import timedelta
 import sentry_sdk
 from fastapi.encoders import jsonable_encoder
 from functools import partial
@@ -12,7 +13,16 @@ from core.exception_mappers import HTTPExceptionsMapper
 from core.ioc import Resolve, cleanup_list
 from config import Config
 import uvicorn
-from core.api.router import router
+from core.api.router import api_router, router
+from core.api.admission import (
+    AdmissionLimiter,
+    AdmissionMiddleware,
+    RouteClass,
+    RouteClassLimits,
+    route_classifier,
+)
+from core.api.profiling import ProfilingMiddleware
+from core.api.context import RequestContextMiddleware
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
@@ -86,6 +96,7 @@ def app_factory() -> FastAPI:
             session_creator=Resolve(SessionCreatorI),
         )
     )
+    app.add_middleware(RequestContextMiddleware)
     app.openapi = partial(custom_openapi, app, cfg.api_version)
     if cfg.debug:
         allow_origins = [
@@ -98,6 +109,37 @@ def app_factory() -> FastAPI:
             for prefix in ["https://", "http://", "https://www.", "http://www."]
         ]
 
+    if cfg.profiling.enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            trigger_header=cfg.profiling.trigger_header,
+            sampling_interval=timedelta(milliseconds=cfg.profiling.sampling_interval_ms),
+            ttl=cfg.profiling.ttl,
+            storage=Resolve(RedisClient),
+            logger=Resolve(Logger),
+        )
+    if cfg.admission.enabled:
+        adm_cfg = cfg.admission
+        limiter = AdmissionLimiter(
+            max_in_flight=adm_cfg.max_in_flight,
+            limits={
+                route_class: RouteClassLimits(
+                    **getattr(adm_cfg, route_class.name.lower()).model_dump()
+                )
+                for route_class in RouteClass
+            },
+            queue_timeout_sec=adm_cfg.queue_timeout_ms / 1000,
+        )
+        # added after other middlewares, so excess requests are shed
+        # before any work (eg.: session lookup) is done for them
+        app.add_middleware(
+            AdmissionMiddleware,
+            limiter=limiter,
+            classifier=route_classifier(api_router.prefix),
+            retry_after_sec=adm_cfg.retry_after_sec,
+            logger=Resolve(Logger),
+        )
+    # CORS is the outermost one, so that shed responses have CORS headers too
     app.add_middleware(
         CORSMiddleware,
         allow_origins=allow_origins,
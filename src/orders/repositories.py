@@ -12,7 +12,7 @@ from sqlalchemy.orm import (
 from core.api.pagination import PaginationParams, PaginationResT
 from core.api.schemas import OrderByOption
 from gateways.db.exceptions import NotFoundError
-from gateways.db import RedisClient
+from gateways.db.redis_gateway import HotSettings
 from gateways.db.sqlalchemy_gateway import PaginationRepository, SqlAlchemyRepository
 from orders.models import (
     BaseOrder,
@@ -201,8 +201,8 @@ class SteamGiftsRepository(OrdersRepoMixin[SteamGiftOrder]):
 
 
 class TopUpFeeManager:
-    def __init__(self, db: RedisClient):
-        self._db = db
+    def __init__(self, settings: HotSettings):
+        self._db = settings
         self._key = "steam_top_up_fee"
 
     async def set_current_fee(self, percent_fee: int) -> None:
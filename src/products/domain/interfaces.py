@@ -1,32 +1,56 @@
-from collections.abc import Sequence
+from collections.abc import AsyncGenerator, Sequence
+from datetime import datetime
 from decimal import Decimal
 import typing as t
 
 from core.api.pagination import PaginationResT
+from core.api.schemas import MessageDTO
 from gateways.currency_converter.schemas import (
     ExchangeRatesMappingDTO,
     SetExchangeRateDTO,
 )
+from gateways.db.redis_gateway import RedisLease
 from products.models import (
+    PriceRescale,
     Product,
+    ProductKey,
     ProductPlatform,
     RegionalPrice,
 )
 from products.schemas import (
     CreateProductDTO,
+    DetailsPageState,
     ListProductsParamsDTO,
+    ParsedCatalogEntry,
+    PriceColumns,
+    PriceInputs,
     PriceUnitDTO,
+    SalesJobDTO,
+    SalesProgressDTO,
     UpdateProductDTO,
 )
 
-# mapping of product_id with corresponding orig_url
-type ParsedUrlsMapping = dict[int, str]
+# mapping of product_id with corresponding details page
+type DetailsPagesMapping = dict[int, DetailsPageState]
+
+
+class ExchangeRatesSnapshotI(t.Protocol):
+    def convert_price(
+        self, price: PriceUnitDTO, to_curr: str = "rub"
+    ) -> PriceUnitDTO: ...
+    def convert_many(
+        self, prices: Sequence[PriceUnitDTO], to_curr: str = "rub"
+    ) -> list[PriceUnitDTO]: ...
 
 
 class CurrencyConverterI(t.Protocol):
     async def convert_price(
         self, price: PriceUnitDTO, to_curr: str = "rub"
     ) -> PriceUnitDTO: ...
+    async def convert_many(
+        self, prices: Sequence[PriceUnitDTO], to_curr: str = "rub"
+    ) -> list[PriceUnitDTO]: ...
+    async def snapshot(self) -> ExchangeRatesSnapshotI: ...
     async def set_exchange_rate(self, dto: SetExchangeRateDTO): ...
     async def get_exchange_rates(self) -> ExchangeRatesMappingDTO: ...
     async def get_rate_for(
@@ -41,11 +65,9 @@ class ProductsRepositoryI(t.Protocol):
         base_price: Decimal,
         original_curr: str | None = None,
     ) -> Product: ...
-    async def save_on_conflict_update_discount(
-        self, product: Product
-    ) -> int | None: ...
-
-    async def save_ignore_conflict(self, product: Product) -> int | None: ...
+    async def bulk_save_ignore_conflict(
+        self, products: Sequence[Product], chunk_size: int = 500
+    ) -> dict[ProductKey, int]: ...
 
     async def update_by_id_with_image(
         self, product_id: int, dto: UpdateProductDTO, image_url: str | None
@@ -72,16 +94,41 @@ class ProductsRepositoryI(t.Protocol):
 
     async def get_all_in_stock(self) -> list[Product]: ...
 
-    async def update_where_expired_discount(self, **values) -> int: ...
-    async def delete_parsed_without_discount(self) -> int: ...
+    async def get_ids_bounds(self) -> tuple[int, int] | None: ...
+    async def update_where_expired_discount(
+        self, limit: int | None = None, **values
+    ) -> list[int]: ...
+    async def get_next_deal_expiry(self) -> datetime | None: ...
+    async def get_parsed_catalog(
+        self, platform: ProductPlatform
+    ) -> dict[ProductKey, ParsedCatalogEntry]: ...
+    async def deactivate_by_ids(self, ids: Sequence[int]) -> int: ...
+    async def deactivate_parsed_without_discount(
+        self, ids_range: tuple[int, int] | None = None
+    ) -> int: ...
     async def update_from_rows(self, rows: Sequence[t.NamedTuple]): ...
 
 
 class PricesRepositoryI(t.Protocol):
     async def add_price(self, for_product_id: int, base_price: Decimal) -> None: ...
+    async def bulk_upsert_changed(self, prices: Sequence[dict]) -> None: ...
+    async def list_ids_with_rate(
+        self, for_currency: str, after: int | None, limit: int
+    ) -> list[int]: ...
     async def update_all_with_rate(
-        self, for_currency: str, new_rate: Decimal, old_rate: Decimal
+        self,
+        for_currency: str,
+        new_rate: Decimal,
+        old_rate: Decimal,
+        products_ids: Sequence[int] | None = None,
+    ) -> None: ...
+    async def upsert_exchange_rate(self, currency: str, rate: Decimal) -> None: ...
+    async def get_rescale(self, rate_key: str) -> PriceRescale | None: ...
+    async def save_rescale(
+        self, rate_key: str, old_rate: Decimal, new_rate: Decimal
     ) -> None: ...
+    async def update_rescale_progress(self, rate_key: str, after: int) -> None: ...
+    async def delete_rescale(self, rate_key: str) -> None: ...
     async def add_percent_for_products(
         self,
         products_ids: Sequence[int],
@@ -90,8 +137,31 @@ class PricesRepositoryI(t.Protocol):
     async def get_price_for_region(
         self, product_id: int, region: str
     ) -> RegionalPrice | None: ...
-    async def update_for_product(self, product_id: int, new_price: Decimal) -> None: ...
+    async def load_price_columns(
+        self, for_platforms: Sequence[ProductPlatform]
+    ) -> PriceColumns: ...
+    async def list_price_inputs(
+        self,
+        for_platforms: Sequence[ProductPlatform],
+        after: tuple[int, str] | None,
+        limit: int,
+    ) -> list[tuple[int, PriceInputs]]: ...
+    async def update_base_prices(
+        self, prices: Sequence[tuple[int, str, Decimal, Decimal]]
+    ) -> int: ...
 
 
-class CommandExecutorI(t.Protocol):
-    async def subprocess_exec(self, cmd: str): ...
+class SalesJobsQueueI(t.Protocol):
+    def job_lease(self, platform: ProductPlatform | None) -> RedisLease: ...
+    async def in_progress(self, platform: ProductPlatform | None) -> bool: ...
+    async def enqueue(
+        self, platform: ProductPlatform | None, run_at: datetime | None = None
+    ) -> SalesJobDTO | None: ...
+    async def cancel(self, platform: ProductPlatform | None) -> bool: ...
+    async def pop(self, timeout_sec: int) -> SalesJobDTO | None: ...
+    async def publish_message(self, msg: MessageDTO) -> None: ...
+    async def save_progress(self, progress: SalesProgressDTO) -> None: ...
+    async def get_progress(
+        self, platform: ProductPlatform
+    ) -> SalesProgressDTO | None: ...
+    def listen_events(self) -> AsyncGenerator[MessageDTO | SalesProgressDTO]: ...
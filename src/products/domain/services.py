@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Iterable, Mapping, Sequence
 from datetime import UTC, datetime
 from decimal import Decimal
+import heapq
+from itertools import islice
 from logging import Logger
-from typing import cast
+import statistics
+from typing import NamedTuple, cast
 from core.api.pagination import PaginationResT
 from core.services.base import BaseService
 from core.services.exceptions import (
@@ -11,7 +16,8 @@ from core.services.exceptions import (
     EntityNotFoundError,
     EntityOperationRestrictedByRefError,
 )
-from core.uow import AbstractUnitOfWork
+from core.uow import AbstractUnitOfWork, TimeoutsProfile
+from core.utils import CacheValidators
 from gateways.currency_converter import ExchangeRatesMappingDTO, SetExchangeRateDTO
 from gateways.currency_converter.schemas import PriceUnitDTO
 from gateways.db.exceptions import (
@@ -20,10 +26,12 @@ from gateways.db.exceptions import (
     OperationRestrictedByRefError,
 )
 from gateways.db import RedisClient
+from gateways.db.redis_gateway import HotSettings
 from products.domain.interfaces import (
-    CommandExecutorI,
     CurrencyConverterI,
-    ParsedUrlsMapping,
+    ExchangeRatesSnapshotI,
+    DetailsPagesMapping,
+    SalesJobsQueueI,
 )
 
 from orders.domain.interfaces import SteamAPIClientI
@@ -31,6 +39,7 @@ from products.models import (
     Product,
     ProductCategory,
     ProductDeliveryMethod,
+    ProductKey,
     ProductPlatform,
     RegionalPrice,
     SalesCategories,
@@ -41,17 +50,37 @@ from products.schemas import (
     CategoriesListDTO,
     CreateProductDTO,
     DeliveryMethodsListDTO,
+    DetailsPageState,
     ListProductsParamsDTO,
+    ParsedCatalogEntry,
+    ParsedProductRow,
     PlatformsListDTO,
+    PriceChangeStatsDTO,
+    PriceInputs,
+    PriceMoveDTO,
+    PricedParsedGame,
+    PricedRegion,
+    PricesSimulationResDTO,
+    RepriceDTO,
+    SalesJobDTO,
+    SalesProgressDTO,
     SalesUpdateDateDTO,
+    SteamGameParsedDTO,
     XboxGameParsedDTO,
     ShowProduct,
     ShowProductExtended,
+    SimulatePricesDTO,
     UpdatePricesDTO,
     UpdatePricesResDTO,
     UpdateProductDTO,
 )
 
+# tag of the cached product responses, which are dropped when products
+# are changed in background
+PRODUCTS_CACHE_TAG = "products"
+# amount of prices recalculated in a single transaction
+_REPRICE_CHUNK_SIZE = 5000
+
 
 class AbstractPriceCalculator(ABC):
     def __post_init__(self): ...
@@ -66,86 +95,129 @@ class AbstractPriceCalculator(ABC):
         return n + n / 100 * percent
 
 
+class Markup(NamedTuple):
+    percent: int = 0
+    addend: Decimal = Decimal(0)
+    # price isn't included, only addend is charged
+    fixed: bool = False
+
+    def apply(self, price: Decimal) -> Decimal:
+        if self.fixed:
+            return self.addend
+        if self.percent:
+            price = price + price / 100 * self.percent
+        if self.addend:
+            price = price + self.addend
+        return price
+
+
+class PriceTiers:
+    """Markups by price tiers. Bounds are sorted inclusive upper bounds of the tiers,
+    the last markup is applied to prices above the last bound"""
+
+    def __init__(self, bounds: Sequence[Decimal], markups: Sequence[Markup]):
+        assert len(markups) == len(bounds) + 1, "Expected one markup per tier"
+        assert list(bounds) == sorted(bounds), "Bounds must be sorted"
+        self._bounds = list(bounds)
+        self._markups = list(markups)
+
+    @classmethod
+    def from_table(
+        cls, rows: Sequence[tuple[str, Markup]], above: Markup
+    ) -> "PriceTiers":
+        return cls(
+            [Decimal(bound) for bound, _ in rows], [m for _, m in rows] + [above]
+        )
+
+    def lookup(self, price: Decimal) -> Markup:
+        return self._markups[bisect_left(self._bounds, price)]
+
+    def apply_many(
+        self, prices: Iterable[Decimal], lookup_prices: Iterable[Decimal] | None = None
+    ) -> list[Decimal]:
+        """Applies markups to the prices. Tiers are looked up by lookup_prices
+        if they differ from the prices being marked up"""
+        bounds, markups = self._bounds, self._markups
+        if lookup_prices is None:
+            return [markups[bisect_left(bounds, p)].apply(p) for p in prices]
+        return [
+            markups[bisect_left(bounds, lookup)].apply(p)
+            for p, lookup in zip(prices, lookup_prices, strict=True)
+        ]
+
+
+_XBOX_US_RATE = Decimal("0.73")
+_XBOX_GP_ADDEND = Decimal("1")
+_XBOX_US_TIERS = PriceTiers.from_table(
+    [
+        ("2.99", Markup(120)),
+        ("4.99", Markup(70)),
+        ("8.99", Markup(40)),
+        ("12.99", Markup(35)),
+        ("19.99", Markup(28)),
+        ("29.99", Markup(25)),
+        ("34.99", Markup(23)),
+        ("39.99", Markup(22)),
+        ("49.99", Markup(21)),
+    ],
+    above=Markup(20),
+)
+_XBOX_TR_TIERS = PriceTiers.from_table(
+    [
+        ("0.99", Markup(200)),
+        ("1.99", Markup(150)),
+        ("2.99", Markup(80)),
+        ("4.99", Markup(65)),
+        ("7.99", Markup(55)),
+        ("9.99", Markup(40)),
+        ("12.99", Markup(35)),
+        ("15.99", Markup(32)),
+        ("19.99", Markup(28)),
+        ("24.99", Markup(25)),
+        ("29.99", Markup(24)),
+    ],
+    above=Markup(21),
+)
+_XBOX_AR_TIERS = PriceTiers.from_table(
+    [
+        ("0.2", Markup(addend=Decimal("3.4"), fixed=True)),
+        ("2.0", Markup(addend=Decimal(5))),
+        ("5.0", Markup(addend=Decimal(7))),
+        ("15.0", Markup(addend=Decimal(10))),
+        ("25.0", Markup(addend=Decimal(12))),
+    ],
+    above=Markup(addend=Decimal(14)),
+)
+
+
+def _xbox_us_converted(price: Decimal, with_gp: bool) -> Decimal:
+    converted = (price * _XBOX_US_RATE).quantize(Decimal(".001"))
+    if with_gp:
+        converted += _XBOX_GP_ADDEND
+    return converted
+
+
+def _xbox_ar_converted(price: Decimal) -> Decimal:
+    return price * Decimal("1.7") / Decimal("1.1")
+
+
 class XboxPriceCalculator(AbstractPriceCalculator):
     def __init__(self, price: PriceUnitDTO):
         assert price.currency_code.lower() == "usd", "Expected price with usd currency"
         super().__init__(price)
 
     def _calc_for_us(self, with_gp: bool) -> Decimal:
-        calculated = self._price * Decimal("0.73")
-        calculated = calculated.quantize(Decimal(".001"))
-        if with_gp:
-            calculated += Decimal("1")
-
-        if calculated <= Decimal("2.99"):
-            calculated = self._add_percent(calculated, 120)
-        elif calculated <= Decimal("4.99"):
-            calculated = self._add_percent(calculated, 70)
-        elif calculated <= Decimal("8.99"):
-            calculated = self._add_percent(calculated, 40)
-        elif calculated <= Decimal("12.99"):
-            calculated = self._add_percent(calculated, 35)
-        elif calculated <= Decimal("19.99"):
-            calculated = self._add_percent(calculated, 28)
-        elif calculated <= Decimal("29.99"):
-            calculated = self._add_percent(calculated, 25)
-        elif calculated <= Decimal("34.99"):
-            calculated = self._add_percent(calculated, 23)
-        elif calculated <= Decimal("39.99"):
-            calculated = self._add_percent(calculated, 22)
-        elif calculated <= Decimal("49.99"):
-            calculated = self._add_percent(calculated, 21)
-        else:
-            calculated = self._add_percent(calculated, 20)
-
-        return calculated
+        calculated = _xbox_us_converted(self._price, with_gp)
+        return _XBOX_US_TIERS.lookup(calculated).apply(calculated)
 
     def _calc_for_tr(self) -> Decimal:
-        calculated = self._price
-        if self._price <= Decimal("0.99"):
-            calculated = self._add_percent(calculated, 200)
-        elif self._price <= Decimal("1.99"):
-            calculated = self._add_percent(calculated, 150)
-        elif self._price <= Decimal("2.99"):
-            calculated = self._add_percent(calculated, 80)
-        elif self._price <= Decimal("4.99"):
-            calculated = self._add_percent(calculated, 65)
-        elif self._price <= Decimal("7.99"):
-            calculated = self._add_percent(calculated, 55)
-        elif self._price <= Decimal("9.99"):
-            calculated = self._add_percent(calculated, 40)
-        elif self._price <= Decimal("12.99"):
-            calculated = self._add_percent(calculated, 35)
-        elif self._price <= Decimal("15.99"):
-            calculated = self._add_percent(calculated, 32)
-        elif self._price <= Decimal("19.99"):
-            calculated = self._add_percent(calculated, 28)
-        elif self._price <= Decimal("24.99"):
-            calculated = self._add_percent(calculated, 25)
-        elif self._price <= Decimal("29.99"):
-            calculated = self._add_percent(calculated, 24)
-        else:
-            calculated = self._add_percent(calculated, 21)
-        return calculated
+        return _XBOX_TR_TIERS.lookup(self._price).apply(self._price)
 
     def _calc_for_ar(self) -> Decimal:
-        calculated = Decimal(0)
-        addend: int | Decimal
-        if self._price <= Decimal("0.2"):
-            addend = Decimal("3.4")
-        elif self._price <= Decimal("2.0"):
-            addend = 5
-        elif self._price <= Decimal("5.0"):
-            addend = 7
-        elif self._price <= Decimal("15.0"):
-            addend = 10
-        elif self._price <= Decimal("25.0"):
-            addend = 12
-        else:
-            addend = 14
-        if self._price > Decimal("0.2"):
-            calculated = self._price * Decimal("1.7") / Decimal("1.1")
-        return calculated + Decimal(addend)
+        # tier is chosen by the original price
+        return _XBOX_AR_TIERS.lookup(self._price).apply(
+            _xbox_ar_converted(self._price)
+        )
 
     def calc_for_region(self, region_code: str, *args, **kwargs) -> Decimal:
         match region_code.lower():
@@ -158,6 +230,87 @@ class XboxPriceCalculator(AbstractPriceCalculator):
             case _:
                 raise ValueError("Unsupported region: %s" % region_code)
 
+    @staticmethod
+    def calc_many(
+        region_code: str,
+        prices: Sequence[PriceUnitDTO],
+        with_gp: Sequence[bool] | None = None,
+    ) -> list[Decimal]:
+        """Calculates prices of the region at once, without creating calculator per price.
+        with_gp is required for us region"""
+        assert all(
+            price.currency_code.lower() == "usd" for price in prices
+        ), "Expected prices with usd currency"
+        values = [price.value for price in prices]
+        match region_code.lower():
+            case XboxParseRegions.US:
+                if with_gp is None:
+                    raise ValueError("with_gp is required for us region")
+                converted = [
+                    _xbox_us_converted(value, gp)
+                    for value, gp in zip(values, with_gp, strict=True)
+                ]
+                return _XBOX_US_TIERS.apply_many(converted)
+            case XboxParseRegions.TR:
+                return _XBOX_TR_TIERS.apply_many(values)
+            case XboxParseRegions.AR:
+                return _XBOX_AR_TIERS.apply_many(
+                    [_xbox_ar_converted(value) for value in values], values
+                )
+            case _:
+                raise ValueError("Unsupported region: %s" % region_code)
+
+
+class ParsedCatalogSync:
+    """State of the parsed catalog of the platform during a single import run"""
+
+    def __init__(
+        self,
+        platform: ProductPlatform,
+        catalog: Mapping[ProductKey, ParsedCatalogEntry],
+    ):
+        self.platform = platform
+        self.catalog = catalog
+        # ids of the products parsed during the run
+        self.seen: dict[ProductKey, int] = {}
+        self.inserted_count = 0
+        # ids of the products which content has changed
+        self.updated_ids: list[int] = []
+        self.unchanged_count = 0
+
+    def missing_ids(self) -> list[int]:
+        """Ids of the active products which weren't parsed during the run"""
+        return [
+            entry.id
+            for key, entry in self.catalog.items()
+            if entry.in_stock and key not in self.seen
+        ]
+
+
+def _parsed_platform(item: BaseParsedGameDTO) -> ProductPlatform:
+    if isinstance(item, XboxGameParsedDTO):
+        return ProductPlatform.XBOX
+    if isinstance(item, SteamGameParsedDTO):
+        return ProductPlatform.STEAM
+    return ProductPlatform.PSN
+
+
+def _rate_to_rub(dto: SetExchangeRateDTO) -> tuple[str, Decimal] | None:
+    """Returns currency and it's rate to rub if the rate is set against rub"""
+    if dto.to.lower() == "rub":
+        return dto.from_, dto.new_rate
+    if dto.from_.lower() == "rub":
+        return dto.to, 1 / dto.new_rate
+    return None
+
+
+def _stats(values: Sequence[float]) -> PriceChangeStatsDTO:
+    return PriceChangeStatsDTO(
+        min=round(min(values), 2),
+        median=round(statistics.median(values), 2),
+        max=round(max(values), 2),
+    )
+
 
 class ProductsService(BaseService):
     entity_name = "Product"
@@ -168,92 +321,238 @@ class ProductsService(BaseService):
         logger: Logger,
         currency_converter: CurrencyConverterI,
         steam_api: SteamAPIClientI,
-        cmd_executor: CommandExecutorI,
+        sales_jobs: SalesJobsQueueI,
         redis_client: RedisClient,
+        settings: HotSettings,
+        steam_rates_ttl_sec: int = 60 * 30,
     ) -> None:
         super().__init__(uow, logger)
         self._currency_converter = currency_converter
         self._steam_api = steam_api
-        self._cmd_executor = cmd_executor
+        self._sales_jobs = sales_jobs
         self._redis_client = redis_client
+        self._settings = settings
         self._sales_last_update_date_key = (
             lambda platform: f"sales_last_updated:{platform}"
         )
-        self._sales_update_state_key = (
-            lambda platform: f"sales_update_started:{platform}"
-        )
-
-    async def save_parsed_products(
-        self, products: Sequence[BaseParsedGameDTO]
-    ) -> list[int]:
-        """Returns list of ids of INSERTED (not updated) products"""
-        res: list[int] = []
-        async with self._uow() as uow:
-            for item in products:
-                platform = (
-                    ProductPlatform.XBOX
-                    if isinstance(item, XboxGameParsedDTO)
-                    else ProductPlatform.PSN
+        self._steam_rates_key = "steam_exchange_rates"
+        self._rates_rescale_key = lambda from_, to: f"{from_}/{to}".lower()
+        self._steam_rates_ttl_sec = steam_rates_ttl_sec
+
+    async def get_exchange_rates_snapshot(self) -> ExchangeRatesSnapshotI:
+        return await self._currency_converter.snapshot()
+
+    def calc_base_prices(
+        self, prices: Sequence[PriceInputs], rates: ExchangeRatesSnapshotI
+    ) -> list[tuple[Decimal, Decimal]]:
+        """Applies markups of the platforms and converts prices to rub.
+        Returns base prices (before discount) in rub and in original currency
+        in order of the passed prices"""
+        values = [
+            PriceUnitDTO.model_construct(
+                value=price.orig_price, currency_code=price.original_curr
+            )
+            for price in prices
+        ]
+        xbox_prices: dict[str, list[int]] = defaultdict(list)
+        for i, price in enumerate(prices):
+            if price.platform == ProductPlatform.XBOX:
+                xbox_prices[price.region_code].append(i)
+        # xbox prices are calculated in batches per region
+        for region, indexes in xbox_prices.items():
+            calculated = XboxPriceCalculator.calc_many(
+                region,
+                [values[i] for i in indexes],
+                with_gp=[bool(prices[i].with_gp) for i in indexes],
+            )
+            for i, value in zip(indexes, calculated):
+                values[i] = PriceUnitDTO.model_construct(
+                    value=value, currency_code=values[i].currency_code
                 )
-                recalculated_prices: list[RegionalPrice] = []
-                for price_dto in item.prices:
-                    if isinstance(item, XboxGameParsedDTO):
-                        # if src currency != usd - convert it because all computations are done in dollars
-                        if price_dto.currency_code.lower() != "usd":
-                            self._logger.warning(
-                                "Converting price from %s to usd. May cause miscalculation",
-                                price_dto.currency_code,
-                            )
-                            price = await self._currency_converter.convert_price(
-                                price_dto, "usd"
-                            )
-                            price_dto.value = price.value
-                            price_dto.currency_code = price.currency_code
-                        price_dto.value = XboxPriceCalculator(
-                            price_dto
-                        ).calc_for_region(price_dto.region, with_gp=item.with_gp)
-                    price_in_rub = await self._currency_converter.convert_price(
-                        price_dto
+        prices_in_rub = rates.convert_many(values)
+        return [
+            (
+                price_in_rub.value * 100 / (100 - price.discount),
+                value.value * 100 / (100 - price.discount),
+            )
+            for price, value, price_in_rub in zip(prices, values, prices_in_rub)
+        ]
+
+    def price_parsed_products(
+        self, products: Sequence[BaseParsedGameDTO], rates: ExchangeRatesSnapshotI
+    ) -> list[PricedParsedGame]:
+        """Computes base prices in rub. Rates snapshot is used,
+        so that all prices of the run are converted in memory using the same rates"""
+        inputs: list[PriceInputs] = []
+        for item in products:
+            platform = _parsed_platform(item)
+            for price_dto in item.prices:
+                # if src currency != usd - convert it because all computations are done in dollars
+                if (
+                    platform == ProductPlatform.XBOX
+                    and price_dto.currency_code.lower() != "usd"
+                ):
+                    self._logger.warning(
+                        "Converting price from %s to usd. May cause miscalculation",
+                        price_dto.currency_code,
                     )
-                    recalculated_prices.append(
-                        RegionalPrice(
-                            base_price=price_in_rub.value
-                            * 100
-                            / (100 - item.discount),  # compute base price
-                            region_code=price_dto.region,
-                            original_curr=price_dto.currency_code,
-                        )
+                    price = rates.convert_price(price_dto, "usd")
+                    price_dto.value = price.value
+                    price_dto.currency_code = price.currency_code
+                inputs.append(
+                    PriceInputs(
+                        platform=platform,
+                        region_code=price_dto.region,
+                        orig_price=price_dto.value,
+                        original_curr=price_dto.currency_code,
+                        with_gp=getattr(item, "with_gp", None),
+                        discount=item.discount,
                     )
-                if platform == ProductPlatform.XBOX:
-                    delivery_method = ProductDeliveryMethod.KEY
-                    save_func = uow.products_repo.save_on_conflict_update_discount
-                else:
-                    delivery_method = ProductDeliveryMethod.ACCOUNT_PURCHASE
-                    save_func = uow.products_repo.save_ignore_conflict
-
-                product = Product(
-                    **item.model_dump(exclude={"prices"}),
-                    prices=recalculated_prices,
-                    category=ProductCategory.GAMES,
-                    delivery_method=delivery_method,
-                    platform=platform,
                 )
-                inserted_id = await save_func(product)
-                if inserted_id is not None:
-                    res.append(inserted_id)
+        base_prices = iter(self.calc_base_prices(inputs, rates))
+        inputs_iter = iter(inputs)
+        res: list[PricedParsedGame] = []
+        for item in products:
+            res.append(
+                PricedParsedGame(
+                    platform=_parsed_platform(item),
+                    name=item.name,
+                    discount=item.discount,
+                    image_url=item.image_url,
+                    orig_url=item.orig_url,
+                    prices=[
+                        PricedRegion(
+                            price.region_code,
+                            base_price,
+                            price.original_curr,
+                            price.orig_price,
+                            orig_base_price,
+                            price.discount,
+                        )
+                        for price, (base_price, orig_base_price) in zip(
+                            islice(inputs_iter, len(item.prices)), base_prices
+                        )
+                    ],
+                    with_gp=getattr(item, "with_gp", None),
+                    deal_until=getattr(item, "deal_until", None),
+                    sub_id=getattr(item, "sub_id", None),
+                )
+            )
         return res
 
-    async def get_urls_mapping(self, by_ids: Sequence[int]) -> ParsedUrlsMapping:
+    async def start_parsed_catalog_sync(
+        self, platform: ProductPlatform
+    ) -> ParsedCatalogSync:
+        async with self._uow(TimeoutsProfile.BATCH) as uow:
+            catalog = await uow.products_repo.get_parsed_catalog(platform)
+        return ParsedCatalogSync(platform, catalog)
+
+    def _parsed_to_product(self, item: PricedParsedGame, content_hash: str) -> Product:
+        if item.platform == ProductPlatform.XBOX:
+            delivery_method = ProductDeliveryMethod.KEY
+        elif item.platform == ProductPlatform.STEAM:
+            delivery_method = ProductDeliveryMethod.GIFT
+        else:
+            delivery_method = ProductDeliveryMethod.ACCOUNT_PURCHASE
+        return Product(
+            name=item.name,
+            discount=item.discount,
+            image_url=item.image_url,
+            orig_url=item.orig_url,
+            with_gp=item.with_gp,
+            deal_until=item.deal_until,
+            sub_id=item.sub_id,
+            content_hash=content_hash,
+            prices=[RegionalPrice(**price._asdict()) for price in item.prices],
+            category=ProductCategory.GAMES,
+            delivery_method=delivery_method,
+            platform=item.platform,
+        )
+
+    async def sync_priced_products(
+        self, products: Sequence[PricedParsedGame], sync: ParsedCatalogSync
+    ) -> dict[ProductKey, int]:
+        """Saves the difference between parsed products and the catalog in a single transaction:
+        new products are inserted, products with changed content are updated (and reactivated),
+        unchanged products are skipped. Fields of the product are taken from it's first
+        occurrence during the run, later occurrences (psn prices of other regions)
+        only add or update prices.
+        Returns ids of INSERTED products by their unique keys"""
+        new: dict[ProductKey, Product] = {}
+        changed: list[ParsedProductRow] = []
+        prices: list[dict] = []
+        for item in products:
+            assert item.platform == sync.platform, "Unexpected platform of the item"
+            key = item.unique_key
+            if key in new:
+                new[key].prices.extend(
+                    RegionalPrice(**price._asdict()) for price in item.prices
+                )
+                continue
+            product_id = sync.seen.get(key)
+            if product_id is None and (entry := sync.catalog.get(key)) is not None:
+                product_id = sync.seen[key] = entry.id
+                content_hash = item.content_hash()
+                if entry.content_hash != content_hash or not entry.in_stock:
+                    changed.append(
+                        ParsedProductRow(
+                            id=entry.id,
+                            discount=item.discount,
+                            image_url=item.image_url,
+                            orig_url=item.orig_url,
+                            with_gp=item.with_gp,
+                            deal_until=item.deal_until,
+                            content_hash=content_hash,
+                            in_stock=True,
+                            sub_id=item.sub_id,
+                        )
+                    )
+                else:
+                    sync.unchanged_count += 1
+            if product_id is None:
+                new[key] = self._parsed_to_product(item, item.content_hash())
+                continue
+            prices.extend(
+                {**price._asdict(), "product_id": product_id} for price in item.prices
+            )
+        async with self._uow(TimeoutsProfile.BATCH) as uow:
+            inserted = await uow.products_repo.bulk_save_ignore_conflict(
+                list(new.values())
+            )
+            if changed:
+                await uow.products_repo.update_from_rows(changed)
+            if prices:
+                await uow.products_prices_repo.bulk_upsert_changed(prices)
+        sync.seen.update(inserted)
+        sync.inserted_count += len(inserted)
+        sync.updated_ids.extend(row.id for row in changed)
+        return inserted
+
+    async def finish_parsed_catalog_sync(self, sync: ParsedCatalogSync) -> int:
+        """Deactivates products which disappeared from the parsed catalog.
+        Should be called only if all items of the platform were parsed"""
+        missing_ids = sync.missing_ids()
+        if not sync.seen or not missing_ids:
+            # nothing parsed most likely means that parsing is broken
+            return 0
+        async with self._uow(TimeoutsProfile.BATCH) as uow:
+            return await uow.products_repo.deactivate_by_ids(missing_ids)
+
+    async def get_details_pages(self, by_ids: Sequence[int]) -> DetailsPagesMapping:
         async with self._uow() as uow:
             products = await uow.products_repo.list_by_ids(by_ids)
         return {
-            product.id: product.orig_url
+            product.id: DetailsPageState(
+                product.orig_url,
+                product.details_hash,
+                CacheValidators(product.details_etag, product.details_last_modified),
+            )
             for product in products
             if product.orig_url is not None
         }
 
     async def update_prices(self, dto: UpdatePricesDTO) -> UpdatePricesResDTO:
-        async with self._uow() as uow:
+        async with self._uow(TimeoutsProfile.BATCH) as uow:
             products_ids_for_update = await uow.products_repo.fetch_ids_for_platforms(
                 dto.for_platforms,
             )
@@ -262,6 +561,106 @@ class ProductsService(BaseService):
             )
         return UpdatePricesResDTO(updated_count=updated_count)
 
+    async def simulate_prices(self, dto: SimulatePricesDTO) -> PricesSimulationResDTO:
+        """Applies proposed percent and exchange rate to the current prices in memory
+        the same way update_prices and set_exchange_rate would. Nothing is written"""
+        old_rate: Decimal | None = None
+        rate_to_rub: tuple[str, Decimal] | None = None
+        if dto.exchange_rate is not None:
+            old_rate = await self._currency_converter.get_rate_for(
+                dto.exchange_rate.from_, dto.exchange_rate.to
+            )
+            rate_to_rub = _rate_to_rub(dto.exchange_rate)
+        async with self._uow() as uow:
+            columns = await uow.products_prices_repo.load_price_columns(
+                dto.for_platforms
+            )
+        old_prices = columns.prices
+        multiplier = 1 + (dto.percent or 0) / 100
+        new_prices = [price * multiplier for price in old_prices]
+        if dto.exchange_rate is not None:
+            # prices stored in original currency are converted with the new rate
+            if rate_to_rub is not None:
+                currency, rate = rate_to_rub[0].lower(), float(rate_to_rub[1])
+                new_prices = [
+                    orig * multiplier * rate
+                    if orig is not None and curr == currency
+                    else price
+                    for price, orig, curr in zip(
+                        new_prices, columns.orig_base_prices, columns.currencies
+                    )
+                ]
+            # other prices converted from the currency are rescaled
+            if old_rate is not None:
+                currency = dto.exchange_rate.from_.lower()
+                scale = float(dto.exchange_rate.new_rate / old_rate)
+                new_prices = [
+                    price * scale if orig is None and curr == currency else price
+                    for price, orig, curr in zip(
+                        new_prices, columns.orig_base_prices, columns.currencies
+                    )
+                ]
+        changes = [new - old for old, new in zip(old_prices, new_prices)]
+        changes_percent = [
+            change / old * 100 if old else 0.0
+            for old, change in zip(old_prices, changes)
+        ]
+        changed = [i for i, change in enumerate(changes) if abs(change) >= 0.005]
+        bounds = sorted(float(bound) for bound in dto.tier_bounds)
+        crossed_tiers_count = sum(
+            bisect_right(bounds, old_prices[i]) != bisect_right(bounds, new_prices[i])
+            for i in changed
+        )
+        top_movers = heapq.nlargest(
+            dto.top_movers_count, changed, key=lambda i: abs(changes_percent[i])
+        )
+        return PricesSimulationResDTO(
+            total_count=len(old_prices),
+            changed_count=len(changed),
+            change=_stats([changes[i] for i in changed]) if changed else None,
+            change_percent=(
+                _stats([changes_percent[i] for i in changed]) if changed else None
+            ),
+            crossed_tiers_count=crossed_tiers_count,
+            top_movers=[
+                PriceMoveDTO(
+                    product_id=columns.product_ids[i],
+                    region_code=columns.region_codes[i],
+                    old_price=round(old_prices[i], 2),
+                    new_price=round(new_prices[i], 2),
+                    change_percent=round(changes_percent[i], 2),
+                )
+                for i in top_movers
+            ],
+        )
+
+    async def reprice_parsed_products(self, dto: RepriceDTO) -> UpdatePricesResDTO:
+        """Recalculates base prices of the parsed products from the stored parsed prices
+        using current markups and exchange rates. Manual price changes are overwritten.
+        Prices are processed in chunks, every chunk in a separate transaction"""
+        rates = await self._currency_converter.snapshot()
+        updated_count = 0
+        after: tuple[int, str] | None = None
+        while True:
+            async with self._uow(TimeoutsProfile.BATCH) as uow:
+                rows = await uow.products_prices_repo.list_price_inputs(
+                    dto.for_platforms, after, _REPRICE_CHUNK_SIZE
+                )
+                if not rows:
+                    break
+                base_prices = self.calc_base_prices(
+                    [inputs for _, inputs in rows], rates
+                )
+                updated_count += await uow.products_prices_repo.update_base_prices(
+                    [
+                        (product_id, inputs.region_code, *base_price)
+                        for (product_id, inputs), base_price in zip(rows, base_prices)
+                    ]
+                )
+            last_id, last_inputs = rows[-1]
+            after = (last_id, last_inputs.region_code)
+        return UpdatePricesResDTO(updated_count=updated_count)
+
     async def create_product(self, dto: CreateProductDTO) -> ShowProduct:
         base_price = dto.discounted_price / (100 - dto.discount) * 100
         original_curr = None
@@ -323,13 +722,10 @@ class ProductsService(BaseService):
     ) -> ShowProduct:
         try:
             async with self._uow() as uow:
+                # prices are updated in the same statement
                 product = await uow.products_repo.update_by_id_with_image(
                     product_id, dto, cast(str | None, dto.image)
                 )
-                if dto.base_price is not None:
-                    await uow.products_prices_repo.update_for_product(
-                        product.id, dto.base_price
-                    )
         except AlreadyExistsError:
             raise EntityAlreadyExistsError(
                 self.entity_name,
@@ -348,12 +744,98 @@ class ProductsService(BaseService):
         except OperationRestrictedByRefError:
             raise EntityOperationRestrictedByRefError(self.entity_name)
 
+    async def _fetch_steam_exchange_rates(self) -> ExchangeRatesMappingDTO:
+        rates = await self._steam_api.get_currency_rates()
+        await self._redis_client.set(
+            self._steam_rates_key,
+            rates.model_dump_json(),
+            ex=self._steam_rates_ttl_sec,
+        )
+        return rates
+
     async def get_steam_exchange_rates(self) -> ExchangeRatesMappingDTO:
-        return await self._steam_api.get_currency_rates()
+        """Returns cached rates, steam api is requested only if cache is expired"""
+        cached = await self._redis_client.get(self._steam_rates_key)
+        if cached is not None:
+            return ExchangeRatesMappingDTO.model_validate_json(cached)
+        return await self._fetch_steam_exchange_rates()
+
+    async def sync_steam_exchange_rates(
+        self, apply_rates: Sequence[str], threshold_percent: float
+    ) -> list[str]:
+        """Refreshes cached steam rates and applies rates from apply_rates
+        (eg.: "usd/rub") which moved more than threshold percent since they were set.
+        Returns applied rates"""
+        steam_rates = {
+            key.lower(): rate
+            for key, rate in (await self._fetch_steam_exchange_rates()).root.items()
+        }
+        applied: list[str] = []
+        for rate_key in apply_rates:
+            new_rate = steam_rates.get(rate_key.lower())
+            if new_rate is None:
+                self._logger.warning("Rate %s is missing in steam rates", rate_key)
+                continue
+            from_, to = rate_key.split("/")
+            old_rate = await self._currency_converter.get_rate_for(from_, to)
+            # float is converted through str to avoid binary representation artifacts
+            rate = Decimal(str(new_rate))
+            if (
+                old_rate is not None
+                and abs(rate - old_rate)
+                <= old_rate * Decimal(str(threshold_percent)) / 100
+            ):
+                async with self._uow() as uow:
+                    pending = await uow.products_prices_repo.get_rescale(
+                        self._rates_rescale_key(from_, to)
+                    )
+                # rescale of prices to the current rate is resumed
+                if pending is None:
+                    continue
+            await self.set_exchange_rate(
+                SetExchangeRateDTO.model_validate(
+                    {"from": from_, "to": to, "new_rate": rate}
+                )
+            )
+            applied.append(rate_key)
+        return applied
 
     async def set_exchange_rate(self, dto: SetExchangeRateDTO) -> None:
+        """Prices converted with the rate are rescaled in chunks.
+        Progress of the rescale is kept in db, so that rescale which failed
+        midway is resumed by the next call before the new rate is applied"""
+        rate_key = self._rates_rescale_key(dto.from_, dto.to)
         old_rate = await self._currency_converter.get_rate_for(dto.from_, dto.to)
+        async with self._uow() as uow:
+            pending = await uow.products_prices_repo.get_rescale(rate_key)
+        # prices aren't rescaled yet if setting of the rate failed
+        if (
+            pending is not None
+            and old_rate is not None
+            and old_rate == pending.new_rate
+        ):
+            self._logger.info("Resuming rescale of prices for %s", rate_key)
+            await self._rescale_prices(
+                rate_key, dto.from_, pending.old_rate, old_rate, pending.after
+            )
+        if old_rate == dto.new_rate:
+            # nothing to rescale, eg.: rate which was set when rescale failed
+            old_rate = None
+        if old_rate is not None:
+            # saved before the new rate, so that rescale isn't lost if it's set
+            async with self._uow() as uow:
+                await uow.products_prices_repo.save_rescale(
+                    rate_key, old_rate, dto.new_rate
+                )
+        elif pending is not None:
+            async with self._uow() as uow:
+                await uow.products_prices_repo.delete_rescale(rate_key)
         await self._currency_converter.set_exchange_rate(dto)
+        if rate_to_rub := _rate_to_rub(dto):
+            # prices stored in original currency are converted with that rate
+            # at read time, so a single row is updated for them
+            async with self._uow() as uow:
+                await uow.products_prices_repo.upsert_exchange_rate(*rate_to_rub)
         if old_rate is None:
             return
         self._logger.info(
@@ -361,11 +843,37 @@ class ProductsService(BaseService):
             dto.from_ + "/" + dto.to,
             dto.new_rate,
         )
-        # update existing prices with new rate (only that which were converted from original rate)
-        async with self._uow() as uow:
-            await uow.products_prices_repo.update_all_with_rate(
-                dto.from_, dto.new_rate, old_rate
-            )
+        await self._rescale_prices(
+            rate_key, dto.from_, old_rate, dto.new_rate, after=None
+        )
+
+    async def _rescale_prices(
+        self,
+        rate_key: str,
+        currency: str,
+        old_rate: Decimal,
+        new_rate: Decimal,
+        after: int | None,
+    ) -> None:
+        """Updates existing prices with new rate (only that which were converted
+        from original rate and aren't stored in original currency) in chunks,
+        every chunk in a separate transaction. Last rescaled id is saved in
+        the transaction of the chunk, so a committed chunk is never rescaled twice.
+        Progress is dropped with the last chunk"""
+        while True:
+            async with self._uow(TimeoutsProfile.BATCH) as uow:
+                prices_repo = uow.products_prices_repo
+                products_ids = await prices_repo.list_ids_with_rate(
+                    currency, after, _REPRICE_CHUNK_SIZE
+                )
+                if not products_ids:
+                    await prices_repo.delete_rescale(rate_key)
+                    return
+                await prices_repo.update_all_with_rate(
+                    currency, new_rate, old_rate, products_ids
+                )
+                after = products_ids[-1]
+                await prices_repo.update_rescale_progress(rate_key, after)
 
     async def get_exchange_rates(self) -> ExchangeRatesMappingDTO:
         return await self._currency_converter.get_exchange_rates()
@@ -373,31 +881,56 @@ class ProductsService(BaseService):
     async def check_sales_update_in_progress(
         self, platform: ProductPlatform | None = None
     ) -> bool:
-        if await self._redis_client.get(self._sales_update_state_key(platform)):
-            return True
-        return False
-
-    async def update_sales(self, platform: ProductPlatform | None = None):
-        assert not await self.check_sales_update_in_progress(
-            platform
-        ), "Ensure that sales update is not started yet before calling this function"
-        try:
-            await self._redis_client.set(self._sales_update_state_key(platform), 1)
-            cmd = "poetry run python scripts/sales/parse_and_save.py"
-            if platform is not None:
-                cmd += f" -p {str(platform.value)}"
-            self._logger.info("Launching sales update on user demand")
-            await self._cmd_executor.subprocess_exec(cmd)
-            await self._redis_client.set(
-                self._sales_last_update_date_key(platform), str(datetime.now(UTC))
+        return await self._sales_jobs.in_progress(platform)
+
+    async def update_sales(
+        self, platform: ProductPlatform | None = None, run_at: datetime | None = None
+    ) -> SalesJobDTO | None:
+        """Enqueues sales update job for the sales worker.
+        Returns None if update for the platform is already pending or running"""
+        job = await self._sales_jobs.enqueue(platform, run_at)
+        if job is not None:
+            self._logger.info(
+                "Sales update job %s enqueued on user demand, run at: %s",
+                job.id,
+                job.run_at,
             )
-            await self._redis_client.delete(self._sales_update_state_key(platform))
-            self._logger.info("Sales update completed")
-        finally:
-            await self._redis_client.delete(self._sales_update_state_key(platform))
+        return job
+
+    async def cancel_sales_update(
+        self, platform: ProductPlatform | None = None
+    ) -> bool:
+        return await self._sales_jobs.cancel(platform)
+
+    async def get_sales_progress(
+        self, platform: ProductPlatform | None = None
+    ) -> list[SalesProgressDTO]:
+        """Returns progress of the last update of the platform (all parsed platforms if None)"""
+        platforms = (
+            [ProductPlatform.XBOX, ProductPlatform.PSN]
+            if platform is None
+            else [platform]
+        )
+        res: list[SalesProgressDTO] = []
+        for platform in platforms:
+            progress = await self._sales_jobs.get_progress(platform)
+            if progress is not None:
+                res.append(progress)
+        return res
+
+    async def set_sales_update_date(self, platform: ProductPlatform | None = None):
+        await self._settings.set(
+            self._sales_last_update_date_key(platform), str(datetime.now(UTC))
+        )
 
     async def get_sales_update_date(
         self, platform: ProductPlatform | None = None
     ) -> SalesUpdateDateDTO:
-        res = await self._redis_client.get(self._sales_last_update_date_key(platform))
-        return SalesUpdateDateDTO(last_update_at=res)
+        res = await self._settings.get(self._sales_last_update_date_key(platform))
+        if res is None:
+            return SalesUpdateDateDTO(last_update_at=None)
+        last_update_at = datetime.fromisoformat(res)
+        if last_update_at.tzinfo is None:
+            # compared with the current time in utc by the sales worker
+            last_update_at = last_update_at.replace(tzinfo=UTC)
+        return SalesUpdateDateDTO(last_update_at=last_update_at)
@@ -1,20 +1,16 @@
-from logging import Logger
+from datetime import datetime
 import typing as t
 
 from core.api.caching import cache
-from core.api.sse import send_message
 from core.ioc import Inject
 from core.api.schemas import (
     EntityIDParam,
-    MessageDTO,
-    MessageSeverity,
     require_dto_not_empty,
 )
 from core.api.pagination import PaginatedResponse
 from core.api.dependencies import restrict_content_type
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Body,
     Form,
     Depends,
@@ -27,7 +23,7 @@ from gateways.currency_converter import (
     SetExchangeRateDTO,
 )
 from products import schemas
-from products.domain.services import ProductsService
+from products.domain.services import PRODUCTS_CACHE_TAG, ProductsService
 from products.models import ProductPlatform
 from users.dependencies import require_admin
 
@@ -45,7 +41,7 @@ async def list_all_products(
 
 
 @router.get("/")
-@cache()
+@cache(tag=PRODUCTS_CACHE_TAG)
 async def list_products(
     products_service: ProductsServiceDep,
     dto: t.Annotated[schemas.ListProductsParamsDTO, Query()] = None,  # type: ignore
@@ -55,7 +51,7 @@ async def list_products(
 
 
 @router.get("/detail/{product_id}")
-@cache()
+@cache(tag=PRODUCTS_CACHE_TAG)
 async def get_product(
     product_id: EntityIDParam, products_service: ProductsServiceDep
 ) -> schemas.ShowProductExtended:
@@ -69,6 +65,20 @@ async def update_prices(
     return await products_service.update_prices(dto)
 
 
+@router.post("/simulate-prices", dependencies=[Depends(require_admin)])
+async def simulate_prices(
+    dto: schemas.SimulatePricesDTO, products_service: ProductsServiceDep
+) -> schemas.PricesSimulationResDTO:
+    return await products_service.simulate_prices(dto)
+
+
+@router.post("/reprice", dependencies=[Depends(require_admin)])
+async def reprice_parsed_products(
+    dto: schemas.RepriceDTO, products_service: ProductsServiceDep
+) -> schemas.UpdatePricesResDTO:
+    return await products_service.reprice_parsed_products(dto)
+
+
 @router.post(
     "/create",
     status_code=status.HTTP_201_CREATED,
@@ -172,38 +182,37 @@ type SalesPlatformDep = t.Annotated[ProductPlatform | None, Body()]
 @router.post("/sales/update", dependencies=[Depends(require_admin)], status_code=202)
 async def update_sales(
     products_service: ProductsServiceDep,
-    logger: t.Annotated[Logger, Inject(Logger)],
-    background_tasks: BackgroundTasks,
     platform: SalesPlatformDep = None,
-) -> None:
-    if await products_service.check_sales_update_in_progress(platform):
+    run_at: datetime | None = None,
+) -> schemas.SalesJobDTO:
+    """Enqueues sales update job which is started at run_at (as soon as possible by default).
+    Result of the job is sent to the SSE stream"""
+    job = await products_service.update_sales(platform, run_at)
+    if job is None:
         raise HTTPException(
             409, "Sales update for selected platform has been already started"
         )
+    return job
 
-    async def bg_task():
-        platform_name = str(platform) if platform else "All platform"
-        try:
-            await products_service.update_sales(platform)
-        except Exception as e:
-            logger.exception(
-                "Unexpected exception during sales update in background", e
-            )
-            await send_message(
-                MessageDTO(
-                    text=f"Failed to update sales for platform: {platform_name}. Please try again",
-                    severity=MessageSeverity.ERROR,
-                )
-            )
-            return
-        await send_message(
-            MessageDTO(
-                text=f"Sales for platform {platform_name} were succesfully updated",
-                severity=MessageSeverity.SUCCESS,
-            )
-        )
 
-    background_tasks.add_task(bg_task)
+@router.post("/sales/cancel", dependencies=[Depends(require_admin)])
+async def cancel_sales_update(
+    products_service: ProductsServiceDep,
+    platform: SalesPlatformDep = None,
+):
+    if not await products_service.cancel_sales_update(platform):
+        raise HTTPException(404, "Sales update for selected platform isn't started")
+    return {"success": True}
+
+
+@router.get("/sales/progress", dependencies=[Depends(require_admin)])
+async def get_sales_progress(
+    products_service: ProductsServiceDep,
+    platform: ProductPlatform | None = None,
+) -> list[schemas.SalesProgressDTO]:
+    """Progress of the last sales update per platform.
+    Live updates are sent to the SSE stream as sales_progress events"""
+    return await products_service.get_sales_progress(platform)
 
 
 @router.get("/sales/last-update-date", dependencies=[Depends(require_admin)])
@@ -8,11 +8,22 @@ from core.utils.enums import IntWithLabel
 from gateways.db.sqlalchemy_gateway import (
     int_pk_type,
     timestamptz,
+    updated_at_type,
     SqlAlchemyBaseModel,
     TimestampMixin,
 )
-from sqlalchemy import CHAR, CheckConstraint, ForeignKey, UniqueConstraint, text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    CHAR,
+    CheckConstraint,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 from enum import Enum, auto
 
 from core.utils import CIEnum, LabeledEnum
@@ -55,6 +66,10 @@ class XboxParseRegions(CIEnum):
     TR = auto()
 
 
+# values of Product.unique_fields
+type ProductKey = tuple[str, ProductCategory, ProductPlatform]
+
+
 class Product(SqlAlchemyBaseModel, TimestampMixin):
     unique_fields = ("name", "category", "platform")
     __table_args__ = (
@@ -64,6 +79,12 @@ class Product(SqlAlchemyBaseModel, TimestampMixin):
                 "(platform = 'STEAM' AND category = 'GAMES' AND sub_id IS NOT NULL) OR (platform != 'STEAM' OR category != 'GAMES' AND sub_id IS NULL)"
             )
         ),
+        # queue of the deals ordered by expiration, used to reset expired discounts
+        Index(
+            "ix_product_deal_until",
+            "deal_until",
+            postgresql_where=text("deal_until IS NOT NULL"),
+        ),
     )
 
     id: Mapped[int_pk_type]
@@ -86,6 +107,17 @@ class Product(SqlAlchemyBaseModel, TimestampMixin):
     # used for products parsed from external websites to determine their original page
     # this field can also be used to determine whether product is manually added
     orig_url: Mapped[str | None]
+    # hash of the parsed content, used to skip writes of unchanged parsed products
+    content_hash: Mapped[str | None] = mapped_column(String(32))
+    # hash and cache validators of the page which details were parsed from,
+    # used to skip parsing of the unchanged details
+    details_hash: Mapped[str | None] = mapped_column(String(32))
+    details_etag: Mapped[str | None]
+    details_last_modified: Mapped[str | None]
+
+    @property
+    def unique_key(self) -> ProductKey:
+        return (self.name, self.category, self.platform)
 
     @property
     def is_discount_expired(self) -> bool:
@@ -103,6 +135,28 @@ class Product(SqlAlchemyBaseModel, TimestampMixin):
         return discount
 
 
+class ExchangeRate(SqlAlchemyBaseModel):
+    """Rate of the currency to rub, which prices stored in original currency
+    are converted with at read time"""
+
+    # lowercase currency code
+    currency: Mapped[str] = mapped_column(CHAR(3), primary_key=True)
+    rate: Mapped[Decimal]  # amount of rub for a single unit of the currency
+    updated_at: Mapped[updated_at_type]
+
+
+class PriceRescale(SqlAlchemyBaseModel):
+    """Rescale of prices converted with the rate, which isn't finished yet.
+    Progress is saved in the transaction of every rescaled chunk"""
+
+    # lowercase key of the rate, eg.: "usd/rub"
+    rate_key: Mapped[str] = mapped_column(String(7), primary_key=True)
+    old_rate: Mapped[Decimal]
+    new_rate: Mapped[Decimal]
+    # id of the last product which prices are rescaled
+    after: Mapped[int | None]
+
+
 class RegionalPrice(SqlAlchemyBaseModel):
     __allow_unmapped__ = True
     discounted_price: Decimal  # calculated dynamically from base_price and discount
@@ -111,20 +165,47 @@ class RegionalPrice(SqlAlchemyBaseModel):
         ForeignKey("product.id", ondelete="CASCADE"), primary_key=True
     )
     product: Mapped[Product] = relationship(back_populates="prices")
-    base_price: Mapped[Decimal]  # price in rub
+    base_price: Mapped[Decimal] = mapped_column()  # price in rub
     # use empty string instead of nullable field to create primary key on that field
     region_code: Mapped[str] = mapped_column(
         CHAR(3), primary_key=True, server_default=text(EMPTY_REGION)
     )
     original_curr: Mapped[str | None] = mapped_column(CHAR(3))
+    # parsed (discounted) price in original_curr before markup,
+    # base_price is recalculated from it
+    orig_price: Mapped[Decimal | None]
+    # discount of the product when orig_price was parsed, so that base price
+    # is recalculated correctly after the discount is reset
+    orig_discount: Mapped[int | None]
+    # base price in original_curr. If it's set, price in rub is computed at read time
+    # with the current exchange rate, and base_price is only a fallback for the case
+    # when rate is missing
+    orig_base_price: Mapped[Decimal | None] = mapped_column()
+    rub_base_price: Mapped[Decimal] = column_property(
+        func.coalesce(
+            orig_base_price.column
+            * select(ExchangeRate.rate)
+            .where(
+                ExchangeRate.currency == func.lower(func.trim(original_curr.column))
+            )
+            .scalar_subquery(),
+            base_price.column,
+        )
+    )
+
+    @property
+    def price_in_rub(self) -> Decimal:
+        # converted price isn't loaded for the rows which were just inserted
+        price = self.__dict__.get("rub_base_price")
+        return self.base_price if price is None else price
 
     @property
     def total_price(self) -> Decimal:
-        total = self.base_price - (
-            Decimal(self.product.total_discount / 100) * self.base_price
-        )
+        price = self.price_in_rub
+        total = price - (Decimal(self.product.total_discount / 100) * price)
         return total.quantize(Decimal("0.01"), ROUND_HALF_UP)
 
     def calc_discounted_price(self, discount: int):
-        self.discounted_price = self.base_price - self.base_price / 100 * discount
+        price = self.price_in_rub
+        self.discounted_price = price - price / 100 * discount
         return self.discounted_price
@@ -1,28 +1,36 @@
 from typing import NamedTuple
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.sql.expression import cast
+from collections import defaultdict
 from collections.abc import Sequence
+from datetime import datetime
 from decimal import Decimal
 import sqlalchemy as sa
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 from core.api.pagination import PaginationResT
 from core.api.schemas import OrderByOption
 from core.utils import normalize_s
+from gateways.db.exceptions import DatabaseError, NotFoundError
 from gateways.db.sqlalchemy_gateway import PaginationRepository
 
 from gateways.db.sqlalchemy_gateway.repository import SqlAlchemyRepository
 from products.models import (
+    ExchangeRate,
+    PriceRescale,
     Product,
+    ProductKey,
     ProductPlatform,
     RegionalPrice,
 )
 from products.schemas import (
     CreateProductDTO,
     ListProductsParamsDTO,
+    ParsedCatalogEntry,
+    PriceColumns,
+    PriceInputs,
     UpdateProductDTO,
 )
 
-
 class ProductsRepository(PaginationRepository[Product]):
     model = Product
 
@@ -55,7 +63,7 @@ class ProductsRepository(PaginationRepository[Product]):
                 params.price_ordering
             ]
             stmt = stmt.join(self.model.prices).order_by(
-                option(RegionalPrice.base_price)
+                option(RegionalPrice.rub_base_price)
             )
         if params.query:
             stmt = stmt.where(self.model.name.ilike(f"%{params.query}%"))
@@ -70,6 +78,12 @@ class ProductsRepository(PaginationRepository[Product]):
             stmt = stmt.where(base_cond if params.discounted else sa.not_(base_cond))
         if params.in_stock is not None:
             stmt = stmt.filter_by(in_stock=params.in_stock)
+        else:
+            # parsed products are deactivated when their sale ends
+            # and stay hidden until it's on sale again
+            stmt = stmt.where(
+                sa.or_(self.model.orig_url.is_(None), self.model.in_stock.is_(True))
+            )
         if params.categories:
             stmt = stmt.where(Product.category.in_(params.categories))
         if params.platforms:
@@ -129,16 +143,36 @@ class ProductsRepository(PaginationRepository[Product]):
     async def update_by_id_with_image(
         self, product_id: int, dto: UpdateProductDTO, image_url: str | None
     ) -> Product:
+        """Updates product and it's prices (if base price is provided)
+        in a single statement"""
         data = dto.model_dump(
             exclude={"image", "base_price"},
             exclude_unset=True,
         )
         if image_url:
             data["image_url"] = image_url
-        product = await super().update(
-            data,
-            id=product_id,
+        if not data and dto.base_price is None:
+            raise DatabaseError("No data to update. Provided data is empty")
+        stmt = (
+            sa.update(self.model)
+            .filter_by(id=product_id)
+            # no-op assignment keeps statement valid when only price is updated
+            .values(**(data or {"id": Product.id}))
+            .returning(self.model)
+            .options(noload(Product.prices))
         )
+        if dto.base_price is not None:
+            stmt = stmt.add_cte(
+                sa.update(RegionalPrice)
+                .filter_by(product_id=product_id)
+                # manually set price isn't converted from original currency anymore
+                .values(base_price=dto.base_price, orig_base_price=None)
+                .cte("updated_prices")
+            )
+        res = await self._session.execute(stmt)
+        product = res.scalars().one_or_none()
+        if product is None:
+            raise NotFoundError()
         return product
 
     async def delete_by_id(self, product_id: int) -> None:
@@ -165,78 +199,147 @@ class ProductsRepository(PaginationRepository[Product]):
         if not rows:
             raise ValueError("Nothing to update")
         assert "id" in rows[0]._fields, "Id must be present in the row"
-        columns = [sa.column(name) for name in rows[0]._fields]
+        columns = [
+            sa.column(name, self.model.__table__.c[name].type)
+            for name in rows[0]._fields
+        ]
         p2 = sa.values(*columns).data(rows).alias("p2")
-        values = dict(p2.c)
+        # type of the column which has only NULLs in VALUES is resolved as text
+        values = {name: cast(col, col.type) for name, col in p2.c.items()}
         values.pop("id")
         stmt = sa.update(self.model).values(**values).where(self.model.id == p2.c.id)
         await self._session.execute(stmt)
 
-    async def save_ignore_conflict(self, product: Product) -> int | None:
-        product_data = {k: v for k, v in product.dump().items() if v is not None}
-        res = await self._session.execute(
-            insert(self.model)
-            .values(**product_data)
-            .on_conflict_do_nothing(index_elements=Product.unique_fields)
-            .returning(Product.id)
-        )
-        product_id = res.scalar_one_or_none()
-        if product_id is not None:  # inserted
-            await self._session.execute(
-                insert(RegionalPrice),
-                [
-                    {**price.dump(), "product_id": product_id}
-                    for price in product.prices
-                ],
-            )
-            return product_id
-        return None
-
-    async def save_on_conflict_update_discount(self, product: Product) -> int | None:
-        product_data = {k: v for k, v in product.dump().items() if v is not None}
-        res = await self._session.execute(
-            insert(self.model)
-            .values(**product_data)
-            .on_conflict_do_update(
-                index_elements=Product.unique_fields,
-                set_={"discount": product.discount, "deal_until": product.deal_until},
-            )
-            .returning(
-                Product.id, sa.text("xmax=0")
-            ),  # xmax is a postgres specific field, which indicates whether row was deleted (updated)
-        )
-        product_id, inserted = res.all()[0]
-        if inserted:
+    async def bulk_save_ignore_conflict(
+        self, products: Sequence[Product], chunk_size: int = 500
+    ) -> dict[ProductKey, int]:
+        """Inserts products in chunks using multi-row inserts, existing products
+        are skipped. Then inserts prices of the inserted products in bulk.
+        Returns ids of the inserted products by their unique keys in order of passed products"""
+        # duplicates are dropped, the same row can't be inserted twice by one statement
+        unique: dict[ProductKey, Product] = {}
+        for product in products:
+            unique.setdefault(product.unique_key, product)
+        inserted: dict[ProductKey, int] = {}
+        items = list(unique.values())
+        for i in range(0, len(items), chunk_size):
+            # multi-row insert requires the same set of columns for every row
+            groups: dict[frozenset[str], list[dict]] = defaultdict(list)
+            for product in items[i : i + chunk_size]:
+                data = {k: v for k, v in product.dump().items() if v is not None}
+                groups[frozenset(data)].append(data)
+            for rows in groups.values():
+                # skipped rows aren't returned
+                stmt = (
+                    insert(self.model)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=Product.unique_fields)
+                    .returning(
+                        Product.id, Product.name, Product.category, Product.platform
+                    )
+                )
+                res = await self._session.execute(stmt)
+                for product_id, name, category, platform in res.all():
+                    inserted[(name, category, platform)] = product_id
+        prices = [
+            {**price.dump(), "product_id": inserted[key]}
+            for key, product in unique.items()
+            if key in inserted
+            for price in product.prices
+        ]
+        if prices:
+            # executed as executemany with batched multi-row VALUES under the hood
             await self._session.execute(
-                insert(RegionalPrice),
-                [
-                    {**price.dump(), "product_id": product_id}
-                    for price in product.prices
-                ],
+                insert(RegionalPrice).on_conflict_do_nothing(), prices
             )
-            return product_id
-        return None
+        return {key: inserted[key] for key in unique if key in inserted}
+
+    async def get_parsed_catalog(
+        self, platform: ProductPlatform
+    ) -> dict[ProductKey, ParsedCatalogEntry]:
+        """Returns all parsed products of the platform (including inactive ones)"""
+        stmt = sa.select(
+            Product.id,
+            Product.name,
+            Product.category,
+            Product.platform,
+            Product.content_hash,
+            Product.in_stock,
+        ).where(Product.platform == platform, Product.orig_url.isnot(None))
+        res = await self._session.execute(stmt)
+        return {
+            (name, category, platform): ParsedCatalogEntry(id, content_hash, in_stock)
+            for id, name, category, platform, content_hash, in_stock in res.all()
+        }
 
-    async def update_where_expired_discount(self, **values) -> int:
+    async def deactivate_by_ids(self, ids: Sequence[int]) -> int:
         stmt = (
             sa.update(self.model)
             .where(
-                sa.and_(
-                    self.model.deal_until.isnot(None),
-                    self._is_deal_until_expired_stmt(),
-                ),
+                self.model.id == sa.any_(sa.literal(list(ids), ARRAY(sa.Integer))),
+                self.model.in_stock.is_(True),
             )
-            .values(**values)
+            .values(in_stock=False)
         )
         res = await self._session.execute(stmt)
         return res.rowcount
 
-    async def delete_parsed_without_discount(self) -> int:
-        stmt = sa.delete(self.model).where(
-            sa.and_(
-                self.model.orig_url.isnot(None),  # parsed only
-                self.model.discount == 0,
-            ),
+    def _in_ids_range(
+        self, ids_range: tuple[int, int] | None
+    ) -> sa.ColumnElement[bool]:
+        if ids_range is None:
+            return sa.true()
+        start, end = ids_range
+        return sa.and_(self.model.id >= start, self.model.id < end)
+
+    async def get_ids_bounds(self) -> tuple[int, int] | None:
+        """Returns min and max ids of the products, None if there are no products"""
+        stmt = sa.select(sa.func.min(self.model.id), sa.func.max(self.model.id))
+        min_id, max_id = (await self._session.execute(stmt)).one()
+        return None if min_id is None else (min_id, max_id)
+
+    async def update_where_expired_discount(
+        self, limit: int | None = None, **values
+    ) -> list[int]:
+        """Returns ids of the updated products.
+        Only limit of the earliest expired products is updated if it's passed"""
+        # comparison with timestamptz column as is allows to use the deal_until index
+        expired = sa.select(self.model.id).where(self.model.deal_until <= sa.func.now())
+        if limit is not None:
+            expired = expired.order_by(self.model.deal_until).limit(limit)
+        stmt = (
+            sa.update(self.model)
+            .where(self.model.id.in_(expired.scalar_subquery()))
+            .values(**values)
+            .returning(self.model.id)
+        )
+        res = await self._session.execute(stmt)
+        return list(res.scalars().all())
+
+    async def get_next_deal_expiry(self) -> datetime | None:
+        stmt = sa.select(sa.func.min(self.model.deal_until))
+        res = await self._session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    async def deactivate_parsed_without_discount(
+        self, ids_range: tuple[int, int] | None = None
+    ) -> int:
+        """Products are kept, so that their ids stay valid for carts and wishlists
+        and are reused if they're on sale again.
+        Only ids within half-open range are updated if it's passed"""
+        stmt = (
+            sa.update(self.model)
+            .where(
+                sa.and_(
+                    self.model.orig_url.isnot(None),  # parsed only
+                    self.model.discount == 0,
+                    self.model.in_stock.is_(True),
+                    # steam catalog is synced as a whole, it's games aren't sales
+                    self.model.platform != ProductPlatform.STEAM,
+                ),
+                self._in_ids_range(ids_range),
+            )
+            .values(in_stock=False)
         )
         res = await self._session.execute(stmt)
         return res.rowcount
@@ -248,17 +351,123 @@ class PricesRepository(SqlAlchemyRepository[RegionalPrice]):
     async def add_price(self, for_product_id: int, base_price: Decimal) -> None:
         await super().create(product_id=for_product_id, base_price=base_price)
 
+    async def bulk_upsert_changed(self, prices: Sequence[dict]) -> None:
+        """Inserts new regional prices and updates changed ones.
+        Rows of unchanged prices aren't rewritten"""
+        stmt = insert(RegionalPrice)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RegionalPrice.product_id, RegionalPrice.region_code],
+            set_={
+                "base_price": stmt.excluded.base_price,
+                "original_curr": stmt.excluded.original_curr,
+                "orig_price": stmt.excluded.orig_price,
+                "orig_base_price": stmt.excluded.orig_base_price,
+                "orig_discount": stmt.excluded.orig_discount,
+            },
+            where=sa.or_(
+                RegionalPrice.base_price.is_distinct_from(stmt.excluded.base_price),
+                RegionalPrice.original_curr.is_distinct_from(
+                    stmt.excluded.original_curr
+                ),
+                RegionalPrice.orig_price.is_distinct_from(stmt.excluded.orig_price),
+                RegionalPrice.orig_base_price.is_distinct_from(
+                    stmt.excluded.orig_base_price
+                ),
+                RegionalPrice.orig_discount.is_distinct_from(
+                    stmt.excluded.orig_discount
+                ),
+            ),
+        )
+        await self._session.execute(stmt, prices)
+
+    def _converted_with_rate_clause(self, for_currency: str):
+        """Prices in rub converted from the currency, which aren't stored in it"""
+        return sa.and_(
+            sa.func.lower(self.model.original_curr) == for_currency.lower(),
+            self.model.orig_base_price.is_(None),
+        )
+
+    async def list_ids_with_rate(
+        self, for_currency: str, after: int | None, limit: int
+    ) -> list[int]:
+        """Returns ordered ids of the products, which prices in rub are converted
+        from the currency. Pagination is done with the last returned id"""
+        stmt = (
+            sa.select(self.model.product_id)
+            .distinct()
+            .where(self._converted_with_rate_clause(for_currency))
+            .order_by(self.model.product_id)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(self.model.product_id > after)
+        res = await self._session.execute(stmt)
+        return list(res.scalars().all())
+
     async def update_all_with_rate(
-        self, for_currency: str, new_rate: Decimal, old_rate: Decimal
+        self,
+        for_currency: str,
+        new_rate: Decimal,
+        old_rate: Decimal,
+        products_ids: Sequence[int] | None = None,
     ) -> None:
+        """Rescales prices in rub, which aren't stored in original currency.
+        Only prices of the passed products are rescaled if products_ids is provided"""
         update_price_clause = RegionalPrice.base_price / old_rate * new_rate
         stmt = (
             sa.update(self.model)
             .values(base_price=update_price_clause)
-            .where(sa.func.lower(self.model.original_curr) == for_currency.lower())
+            .where(self._converted_with_rate_clause(for_currency))
+        )
+        if products_ids is not None:
+            stmt = stmt.where(self.model.product_id.in_(products_ids))
+        await self._session.execute(stmt)
+
+    async def upsert_exchange_rate(self, currency: str, rate: Decimal) -> None:
+        """Sets rate of the currency to rub, which is used to convert prices
+        stored in original currency at read time"""
+        stmt = insert(ExchangeRate).values(currency=currency.lower(), rate=rate)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExchangeRate.currency],
+            set_={
+                "rate": stmt.excluded.rate,
+                "updated_at": sa.func.now().op("at time zone")("UTC"),
+            },
+        )
+        await self._session.execute(stmt)
+
+    async def get_rescale(self, rate_key: str) -> PriceRescale | None:
+        return await self._session.get(PriceRescale, rate_key)
+
+    async def save_rescale(
+        self, rate_key: str, old_rate: Decimal, new_rate: Decimal
+    ) -> None:
+        """Starts rescale of prices, progress of the previous one is dropped"""
+        stmt = insert(PriceRescale).values(
+            rate_key=rate_key, old_rate=old_rate, new_rate=new_rate, after=None
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PriceRescale.rate_key],
+            set_={
+                "old_rate": stmt.excluded.old_rate,
+                "new_rate": stmt.excluded.new_rate,
+                "after": None,
+            },
         )
         await self._session.execute(stmt)
 
+    async def update_rescale_progress(self, rate_key: str, after: int) -> None:
+        await self._session.execute(
+            sa.update(PriceRescale)
+            .values(after=after)
+            .where(PriceRescale.rate_key == rate_key)
+        )
+
+    async def delete_rescale(self, rate_key: str) -> None:
+        await self._session.execute(
+            sa.delete(PriceRescale).where(PriceRescale.rate_key == rate_key)
+        )
+
     async def add_percent_for_products(
         self, products_ids: Sequence[int], percent: int
     ) -> int:
@@ -266,12 +475,127 @@ class PricesRepository(SqlAlchemyRepository[RegionalPrice]):
             sa.update(self.model)
             .where(self.model.product_id.in_(products_ids))
             .values(
-                base_price=self.model.base_price + self.model.base_price / 100 * percent
+                base_price=self.model.base_price
+                + self.model.base_price / 100 * percent,
+                orig_base_price=self.model.orig_base_price
+                + self.model.orig_base_price / 100 * percent,
+            )
+        )
+        res = await self._session.execute(stmt)
+        return res.rowcount
+
+    async def list_price_inputs(
+        self,
+        for_platforms: Sequence[ProductPlatform],
+        after: tuple[int, str] | None,
+        limit: int,
+    ) -> list[tuple[int, PriceInputs]]:
+        """Returns ids of the products with inputs of their parsed prices,
+        ordered by the primary key. Pagination is done with the key of the last price"""
+        region_code = sa.func.trim(RegionalPrice.region_code)
+        stmt = (
+            sa.select(
+                RegionalPrice.product_id,
+                Product.platform,
+                region_code,
+                RegionalPrice.orig_price,
+                sa.func.trim(RegionalPrice.original_curr),
+                Product.with_gp,
+                # orig_price is discounted with the discount it was parsed with,
+                # current discount may be reset since then.
+                # Prices parsed before it was stored fall back to the current one
+                sa.func.coalesce(RegionalPrice.orig_discount, Product.discount),
+            )
+            .join(Product, Product.id == RegionalPrice.product_id)
+            .where(
+                Product.platform.in_(for_platforms),
+                RegionalPrice.orig_price.is_not(None),
+                RegionalPrice.original_curr.is_not(None),
+            )
+            .order_by(RegionalPrice.product_id, RegionalPrice.region_code)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(
+                sa.tuple_(RegionalPrice.product_id, RegionalPrice.region_code)
+                > sa.tuple_(*after)
+            )
+        res = await self._session.execute(stmt)
+        return [
+            (product_id, PriceInputs(platform, region, price, curr, with_gp, discount))
+            for product_id, platform, region, price, curr, with_gp, discount in (
+                res.tuples()
+            )
+            # excluded by the query, checked to narrow the type
+            if price is not None
+        ]
+
+    async def update_base_prices(
+        self, prices: Sequence[tuple[int, str, Decimal, Decimal]]
+    ) -> int:
+        """Updates base prices in rub and in original currency
+        by (product_id, region_code). Returns amount of actually changed prices"""
+        if not prices:
+            return 0
+        values = (
+            sa.values(
+                sa.column("product_id", sa.Integer),
+                sa.column("region_code", RegionalPrice.region_code.type),
+                sa.column("base_price", RegionalPrice.base_price.type),
+                sa.column("orig_base_price", RegionalPrice.base_price.type),
+            )
+            .data(prices)
+            .alias("new_prices")
+        )
+        stmt = (
+            sa.update(RegionalPrice)
+            .values(
+                base_price=values.c.base_price,
+                orig_base_price=values.c.orig_base_price,
+            )
+            .where(
+                RegionalPrice.product_id == values.c.product_id,
+                RegionalPrice.region_code == values.c.region_code,
+                sa.or_(
+                    RegionalPrice.base_price.is_distinct_from(values.c.base_price),
+                    RegionalPrice.orig_base_price.is_distinct_from(
+                        values.c.orig_base_price
+                    ),
+                ),
             )
         )
         res = await self._session.execute(stmt)
         return res.rowcount
 
+    async def load_price_columns(
+        self, for_platforms: Sequence[ProductPlatform]
+    ) -> PriceColumns:
+        """Loads current prices of the platforms in columns,
+        so that changes can be computed over whole arrays in memory"""
+        stmt = (
+            sa.select(
+                RegionalPrice.product_id,
+                sa.func.trim(RegionalPrice.region_code),
+                RegionalPrice.rub_base_price,
+                RegionalPrice.orig_base_price,
+                sa.func.lower(sa.func.trim(RegionalPrice.original_curr)),
+            )
+            .join(Product, Product.id == RegionalPrice.product_id)
+            .where(Product.platform.in_(for_platforms))
+        )
+        res = await self._session.execute(stmt)
+        rows = res.tuples().all()
+        if not rows:
+            return PriceColumns([], [], [], [], [])
+        product_ids, region_codes, prices, orig_base_prices, currencies = zip(*rows)
+        return PriceColumns(
+            product_ids,
+            region_codes,
+            [float(price) for price in prices],
+            [None if price is None else float(price) for price in orig_base_prices],
+            currencies,
+        )
+
     async def get_price_for_region(
         self, product_id: int, region: str
     ) -> RegionalPrice | None:
@@ -284,6 +608,3 @@ class PricesRepository(SqlAlchemyRepository[RegionalPrice]):
         )
         res = await self._session.execute(stmt)
         return res.scalar_one_or_none()
-
-    async def update_for_product(self, product_id: int, new_price: Decimal) -> None:
-        await super().update({"base_price": new_price}, product_id=product_id)
@@ -0,0 +1,121 @@
+import time
+import uuid
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime
+
+from core.api.schemas import MessageDTO
+from gateways.db.redis_gateway import RedisClient, RedisLease
+from products.models import ProductPlatform
+from products.schemas import SalesJobDTO, SalesProgressDTO
+
+_QUEUE_KEY = "sales_jobs:queue"
+_SCHEDULED_KEY = "sales_jobs:scheduled"
+_MESSAGES_CHANNEL = "sales_jobs:messages"
+_PROGRESS_CHANNEL = "sales_jobs:progress"
+_PROGRESS_TTL_SEC = 60 * 60 * 24 * 7
+
+
+def _state_key(platform: ProductPlatform | None) -> str:
+    return f"sales_update_started:{platform}"
+
+
+def _progress_key(platform: ProductPlatform) -> str:
+    return f"sales_progress:{platform}"
+
+
+class SalesJobsQueue:
+    """Queue of sales update jobs consumed by the sales worker.
+    Every platform may have only one pending or running job at a time.
+    Id of such job is stored under the state key: it expires if job wasn't picked up
+    in time, and is turned into a lease with heartbeats when worker starts the job.
+    Deleting the state key cancels the job"""
+
+    def __init__(
+        self, redis_client: RedisClient, lease_ttl_sec: int, pending_job_ttl_sec: int
+    ):
+        self._redis = redis_client
+        self._lease_ttl = lease_ttl_sec
+        self._pending_ttl = pending_job_ttl_sec
+
+    def job_lease(self, platform: ProductPlatform | None) -> RedisLease:
+        return RedisLease(self._redis, _state_key(platform), self._lease_ttl)
+
+    async def in_progress(self, platform: ProductPlatform | None) -> bool:
+        return bool(await self._redis.exists(_state_key(platform)))
+
+    async def enqueue(
+        self, platform: ProductPlatform | None, run_at: datetime | None = None
+    ) -> SalesJobDTO | None:
+        """Returns None if job for the platform is already pending or running"""
+        now = datetime.now(UTC)
+        job = SalesJobDTO(
+            id=uuid.uuid4().hex,
+            platform=platform,
+            run_at=max(run_at, now) if run_at else now,
+            enqueued_at=now,
+        )
+        delay_sec = int((job.run_at - now).total_seconds())
+        if not await self._redis.set(
+            _state_key(platform), job.id, nx=True, ex=self._pending_ttl + delay_sec
+        ):
+            return None
+        if delay_sec > 0:
+            await self._redis.zadd(
+                _SCHEDULED_KEY, {job.model_dump_json(): job.run_at.timestamp()}
+            )
+        else:
+            await self._redis.lpush(_QUEUE_KEY, job.model_dump_json())  # type: ignore
+        return job
+
+    async def cancel(self, platform: ProductPlatform | None) -> bool:
+        """Cancels pending or running job. Running job is stopped by the worker
+        with the next heartbeat. Returns False if there is nothing to cancel"""
+        return bool(await self._redis.delete(_state_key(platform)))
+
+    async def _promote_scheduled(self) -> None:
+        due: list[str] = await self._redis.zrangebyscore(
+            _SCHEDULED_KEY, 0, time.time()
+        )
+        for raw_job in due:
+            # removal succeeds only for one of the competing workers
+            if await self._redis.zrem(_SCHEDULED_KEY, raw_job):
+                await self._redis.lpush(_QUEUE_KEY, raw_job)  # type: ignore
+
+    async def pop(self, timeout_sec: int) -> SalesJobDTO | None:
+        """Waits for the next job which should be started now"""
+        await self._promote_scheduled()
+        res = await self._redis.brpop([_QUEUE_KEY], timeout_sec)  # type: ignore
+        if res is None:
+            return None
+        _, raw_job = res
+        return SalesJobDTO.model_validate_json(raw_job)
+
+    async def publish_message(self, msg: MessageDTO) -> None:
+        await self._redis.publish(_MESSAGES_CHANNEL, msg.model_dump_json())
+
+    async def save_progress(self, progress: SalesProgressDTO) -> None:
+        """Stores progress of the platform update and publishes it to listeners"""
+        raw_progress = progress.model_dump_json()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(
+                _progress_key(progress.platform), raw_progress, ex=_PROGRESS_TTL_SEC
+            )
+            pipe.publish(_PROGRESS_CHANNEL, raw_progress)
+            await pipe.execute()
+
+    async def get_progress(self, platform: ProductPlatform) -> SalesProgressDTO | None:
+        """Returns progress of the last update of the platform"""
+        raw_progress = await self._redis.get(_progress_key(platform))
+        if raw_progress is None:
+            return None
+        return SalesProgressDTO.model_validate_json(raw_progress)
+
+    async def listen_events(self) -> AsyncGenerator[MessageDTO | SalesProgressDTO]:
+        """Yields messages about jobs and progress updates published by workers"""
+        async with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(_MESSAGES_CHANNEL, _PROGRESS_CHANNEL)
+            async for msg in pubsub.listen():
+                if msg["channel"] == _PROGRESS_CHANNEL:
+                    yield SalesProgressDTO.model_validate_json(msg["data"])
+                else:
+                    yield MessageDTO.model_validate_json(msg["data"])
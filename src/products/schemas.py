@@ -1,14 +1,19 @@
+import hashlib
+from dataclasses import dataclass
 from datetime import datetime
+from enum import StrEnum
 from pydantic_extra_types.country import CountryAlpha2
 from decimal import Decimal
-from typing import Any, Annotated
+from collections.abc import Sequence
+from typing import Any, Annotated, Literal, NamedTuple
 
 from core.api import schemas
 import pydantic
 
 from core.api.pagination import PaginationParams
+from core.utils import CacheValidators
 from core.utils.enums import LabeledEnum
-from gateways.currency_converter import PriceUnitDTO
+from gateways.currency_converter import PriceUnitDTO, SetExchangeRateDTO
 from products import models
 
 
@@ -39,7 +44,10 @@ ProductDiscount = Annotated[int, pydantic.AfterValidator(_check_discount)]
 
 
 class RegionalPriceDTO(schemas.BaseDTO):
-    base_price: schemas.RoundedDecimal
+    # price converted with the current exchange rate is shown for the loaded models
+    base_price: schemas.RoundedDecimal = pydantic.Field(
+        validation_alias=pydantic.AliasChoices("price_in_rub", "base_price")
+    )
     region_code: schemas.ProductRegion
 
 
@@ -141,6 +149,7 @@ class BaseParsedGameDTO(schemas.BaseDTO):
 class SteamGameParsedDTO(BaseParsedGameDTO):
     description: str
     price_rub: Decimal
+    sub_id: int
 
 
 class XboxGameParsedDTO(BaseParsedGameDTO):
@@ -151,6 +160,149 @@ class XboxGameParsedDTO(BaseParsedGameDTO):
 class PsnGameParsedDTO(BaseParsedGameDTO): ...
 
 
+class PricedRegion(NamedTuple):
+    region_code: str
+    base_price: Decimal  # in rub
+    original_curr: str
+    orig_price: Decimal  # parsed (discounted) price in original_curr, before markup
+    orig_base_price: Decimal  # base price in original_curr
+    orig_discount: int  # discount which orig_price was parsed with
+
+
+class PriceInputs(NamedTuple):
+    """Everything base price of the parsed product is calculated from"""
+
+    platform: models.ProductPlatform
+    region_code: str
+    orig_price: Decimal
+    original_curr: str
+    with_gp: bool | None
+    discount: int
+
+
+class RepriceDTO(schemas.BaseDTO):
+    # only prices of parsed products can be recalculated
+    for_platforms: list[
+        Literal[models.ProductPlatform.XBOX, models.ProductPlatform.PSN]
+    ]
+
+
+class SimulatePricesDTO(schemas.BaseDTO):
+    for_platforms: list[models.ProductPlatform]
+    # proposed changes, percent is applied before the rate
+    percent: int | None = None
+    exchange_rate: SetExchangeRateDTO | None = None
+    # bounds of the price tiers in rub, prices which move to another tier are counted
+    tier_bounds: list[Decimal] = pydantic.Field(
+        default=[Decimal(500), Decimal(1000), Decimal(2000), Decimal(5000)]
+    )
+    top_movers_count: int = pydantic.Field(default=10, ge=0, le=100)
+
+    @pydantic.model_validator(mode="after")
+    def check_changes(self):
+        if not self.percent and self.exchange_rate is None:
+            raise ValueError("Either percent or exchange_rate should be provided")
+        return self
+
+
+class PriceChangeStatsDTO(schemas.BaseDTO):
+    min: float
+    median: float
+    max: float
+
+
+class PriceMoveDTO(schemas.BaseDTO):
+    product_id: schemas.Base64Int
+    # trimmed when prices are loaded, empty for the prices without region
+    region_code: str
+    old_price: float
+    new_price: float
+    change_percent: float
+
+
+class PricesSimulationResDTO(schemas.BaseDTO):
+    total_count: int
+    changed_count: int
+    # stats of the changed prices, None if nothing is changed
+    change: PriceChangeStatsDTO | None
+    change_percent: PriceChangeStatsDTO | None
+    crossed_tiers_count: int
+    top_movers: list[PriceMoveDTO]
+
+
+class PriceColumns(NamedTuple):
+    """Prices loaded column by column, values of the same price share the index"""
+
+    product_ids: Sequence[int]
+    region_codes: Sequence[str]
+    prices: Sequence[float]  # current price in rub
+    orig_base_prices: Sequence[float | None]
+    currencies: Sequence[str | None]  # lowercase original currency
+
+
+@dataclass(slots=True)
+class PricedParsedGame:
+    """Compact representation of the parsed game with computed prices,
+    which is passed between stages of the sales import"""
+
+    platform: models.ProductPlatform
+    name: str
+    discount: int
+    image_url: str
+    orig_url: str
+    prices: list[PricedRegion]
+    with_gp: bool | None = None
+    deal_until: datetime | None = None
+    sub_id: int | None = None  # steam only
+
+    @property
+    def unique_key(self) -> models.ProductKey:
+        return (self.name, models.ProductCategory.GAMES, self.platform)
+
+    def content_hash(self) -> str:
+        """Hash of the fields stored in the product row.
+        Prices aren't included since psn prices of every region are parsed separately"""
+        content: tuple = (
+            self.discount,
+            self.image_url,
+            self.orig_url,
+            self.with_gp,
+            self.deal_until,
+        )
+        # hashes of the products without sub_id are kept as they were
+        if self.sub_id is not None:
+            content += (self.sub_id,)
+        return hashlib.blake2b(repr(content).encode(), digest_size=16).hexdigest()
+
+
+class ParsedCatalogEntry(NamedTuple):
+    id: int
+    content_hash: str | None
+    in_stock: bool
+
+
+class DetailsPageState(NamedTuple):
+    """Page of the parsed product with the state of it's last fetch"""
+
+    url: str
+    content_hash: str | None
+    validators: CacheValidators
+
+
+class ParsedProductRow(NamedTuple):
+    """Fields of the parsed product which are updated when it's content changes"""
+
+    id: int
+    discount: int
+    image_url: str
+    orig_url: str
+    with_gp: bool | None
+    deal_until: datetime | None
+    content_hash: str
+    in_stock: bool
+    sub_id: int | None
+
+
 class ListProductsParamsDTO(PaginationParams):
     query: str | None = None
     discounted: bool | None = None
@@ -184,3 +336,35 @@ class ProductInCartDTO(ShowProductExtended):
 
 class SalesUpdateDateDTO(schemas.BaseDTO):
     last_update_at: datetime | None
+
+
+class SalesJobDTO(schemas.BaseDTO):
+    id: str
+    # None means all platforms
+    platform: models.ProductPlatform | None
+    run_at: datetime
+    enqueued_at: datetime
+
+
+class SalesUpdateStage(StrEnum):
+    PARSE = "parse"
+    SAVE = "save"
+    DETAILS = "details"
+
+
+class SalesStageProgressDTO(schemas.BaseDTO):
+    processed: int = 0
+    # None if amount of items to process isn't known yet
+    total: int | None = None
+    errors: int = 0
+    started_at: datetime
+    finished_at: datetime | None = None
+    items_per_sec: float | None = None
+    eta_sec: float | None = None
+
+
+class SalesProgressDTO(schemas.BaseDTO):
+    platform: models.ProductPlatform
+    started_at: datetime
+    updated_at: datetime
+    stages: dict[SalesUpdateStage, SalesStageProgressDTO]
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from products.domain.services import ParsedCatalogSync, ProductsService
+from products.models import ProductCategory, ProductPlatform
+from products.schemas import ParsedCatalogEntry, PricedParsedGame, PricedRegion
+
+
+def make_item(name: str, discount: int = 50, region: str = "ua") -> PricedParsedGame:
+    return PricedParsedGame(
+        platform=ProductPlatform.PSN,
+        name=name,
+        discount=discount,
+        image_url="https://example.com/image.png",
+        orig_url=f"https://example.com/{name}",
+        prices=[
+            PricedRegion(
+                region, Decimal(1000), "uah", Decimal(10), Decimal(40), discount
+            )
+        ],
+    )
+
+
+def make_key(name: str):
+    return (name, ProductCategory.GAMES, ProductPlatform.PSN)
+
+
+@pytest.fixture
+def service(uow: MagicMock, make_products_service) -> ProductsService:
+    uow.products_repo.bulk_save_ignore_conflict = AsyncMock(
+        side_effect=lambda products: {
+            product.unique_key: 100 + i for i, product in enumerate(products)
+        }
+    )
+    uow.products_repo.update_from_rows = AsyncMock()
+    uow.products_repo.deactivate_by_ids = AsyncMock(return_value=1)
+    uow.products_prices_repo.bulk_upsert_changed = AsyncMock()
+    return make_products_service()
+
+
+class TestParsedCatalogSync:
+    @pytest.mark.asyncio
+    async def test_only_difference_is_saved(self, uow, service):
+        unchanged, changed, inactive = (
+            make_item("unchanged"),
+            make_item("changed"),
+            make_item("inactive"),
+        )
+        sync = ParsedCatalogSync(
+            ProductPlatform.PSN,
+            {
+                make_key("unchanged"): ParsedCatalogEntry(
+                    1, unchanged.content_hash(), True
+                ),
+                make_key("changed"): ParsedCatalogEntry(
+                    2, make_item("changed", discount=10).content_hash(), True
+                ),
+                make_key("inactive"): ParsedCatalogEntry(
+                    3, inactive.content_hash(), False
+                ),
+                make_key("missing"): ParsedCatalogEntry(4, None, True),
+            },
+        )
+        inserted = await service.sync_priced_products(
+            [unchanged, changed, inactive, make_item("new")], sync
+        )
+        assert inserted == {make_key("new"): 100}
+        (rows,), _ = uow.products_repo.update_from_rows.call_args
+        assert [row.id for row in rows] == [2, 3]
+        (prices,), _ = uow.products_prices_repo.bulk_upsert_changed.call_args
+        assert [price["product_id"] for price in prices] == [1, 2, 3]
+        assert (sync.inserted_count, sync.updated_ids, sync.unchanged_count) == (
+            1,
+            [2, 3],
+            1,
+        )
+        assert sync.missing_ids() == [4]
+        assert await service.finish_parsed_catalog_sync(sync) == 1
+        uow.products_repo.deactivate_by_ids.assert_awaited_once_with([4])
+
+    @pytest.mark.asyncio
+    async def test_other_region_only_updates_prices(self, uow, service):
+        sync = ParsedCatalogSync(ProductPlatform.PSN, {})
+        await service.sync_priced_products([make_item("new")], sync)
+        await service.sync_priced_products(
+            [make_item("new", discount=10, region="tr")], sync
+        )
+        uow.products_repo.update_from_rows.assert_not_awaited()
+        (prices,), _ = uow.products_prices_repo.bulk_upsert_changed.call_args
+        assert [(price["product_id"], price["region_code"]) for price in prices] == [
+            (100, "tr")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_nothing_deactivated_if_nothing_parsed(self, uow, service):
+        sync = ParsedCatalogSync(
+            ProductPlatform.PSN, {make_key("missing"): ParsedCatalogEntry(1, None, True)}
+        )
+        assert await service.finish_parsed_catalog_sync(sync) == 0
+        uow.products_repo.deactivate_by_ids.assert_not_awaited()
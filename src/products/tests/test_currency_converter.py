@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import pytest
+
+from gateways.currency_converter import (
+    ExchangeRatesSnapshot,
+    MissingExchangeRateError,
+    PriceUnitDTO,
+)
+
+
+def new_price(value: str, currency_code: str) -> PriceUnitDTO:
+    return PriceUnitDTO.model_validate(
+        {"value": Decimal(value), "currency_code": currency_code}
+    )
+
+
+class TestExchangeRatesSnapshot:
+    @pytest.fixture
+    def snapshot(self) -> ExchangeRatesSnapshot:
+        return ExchangeRatesSnapshot({"usd/rub": "100", "RUB/TRY": "0.5"})
+
+    def test_convert_many(self, snapshot: ExchangeRatesSnapshot):
+        res = snapshot.convert_many(
+            [new_price("2", "usd"), new_price("3", "rub"), new_price("4", "try")]
+        )
+        assert [price.value for price in res] == [
+            Decimal("200"),
+            Decimal("3"),
+            Decimal("8"),  # reversed rate is used
+        ]
+        assert all(price.currency_code.lower() == "rub" for price in res)
+
+    def test_convert_many_missing_rate(self, snapshot: ExchangeRatesSnapshot):
+        with pytest.raises(MissingExchangeRateError) as exc_info:
+            snapshot.convert_many(
+                [new_price("1", "usd"), new_price("1", "eur"), new_price("1", "uah")]
+            )
+        assert exc_info.value.pairs == [("eur", "rub"), ("uah", "rub")]
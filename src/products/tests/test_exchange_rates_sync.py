@@ -0,0 +1,161 @@
+from collections.abc import Callable
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from gateways.currency_converter import ExchangeRatesMappingDTO
+from gateways.currency_converter.schemas import SetExchangeRateDTO
+from products.domain.services import ProductsService
+from products.models import PriceRescale
+
+_steam_rates = ExchangeRatesMappingDTO.model_validate(
+    {"usd/rub": 90.5, "kzt/rub": 0.19}
+)
+
+
+@pytest.fixture
+def rescales() -> dict[str, PriceRescale]:
+    return {}
+
+
+@pytest.fixture
+def make_service(
+    uow: MagicMock, redis_client, rescales, make_products_service
+) -> Callable[..., ProductsService]:
+    def save_rescale(rate_key: str, old_rate: Decimal, new_rate: Decimal):
+        rescales[rate_key] = PriceRescale(
+            rate_key=rate_key, old_rate=old_rate, new_rate=new_rate, after=None
+        )
+
+    def update_rescale_progress(rate_key: str, after: int):
+        rescales[rate_key].after = after
+
+    uow.products_prices_repo.get_rescale = AsyncMock(side_effect=rescales.get)
+    uow.products_prices_repo.save_rescale = AsyncMock(side_effect=save_rescale)
+    uow.products_prices_repo.update_rescale_progress = AsyncMock(
+        side_effect=update_rescale_progress
+    )
+    uow.products_prices_repo.delete_rescale = AsyncMock(
+        side_effect=lambda rate_key: rescales.pop(rate_key, None)
+    )
+    uow.products_prices_repo.upsert_exchange_rate = AsyncMock()
+    uow.products_prices_repo.list_ids_with_rate = AsyncMock(
+        side_effect=lambda _, after, __: {None: [1, 2], 2: [3]}.get(after, [])
+    )
+    uow.products_prices_repo.update_all_with_rate = AsyncMock()
+
+    def make(
+        current_rates: dict[str, Decimal], cached: str | None = None
+    ) -> ProductsService:
+        async def set_exchange_rate(dto: SetExchangeRateDTO):
+            current_rates[f"{dto.from_}/{dto.to}".lower()] = dto.new_rate
+
+        currency_converter = MagicMock()
+        currency_converter.get_rate_for = AsyncMock(
+            side_effect=lambda from_, to: current_rates.get(f"{from_}/{to}".lower())
+        )
+        currency_converter.set_exchange_rate = AsyncMock(side_effect=set_exchange_rate)
+        steam_api = MagicMock()
+        steam_api.get_currency_rates = AsyncMock(return_value=_steam_rates)
+        if cached is not None:
+            redis_client.store["steam_exchange_rates"] = cached
+        return make_products_service(
+            currency_converter=currency_converter,
+            steam_api=steam_api,
+            steam_rates_ttl_sec=60,
+        )
+
+    return make
+
+
+class TestSteamExchangeRates:
+    @pytest.mark.asyncio
+    async def test_cached_rates_returned(self, make_service):
+        service = make_service({}, cached=_steam_rates.model_dump_json())
+        assert await service.get_steam_exchange_rates() == _steam_rates
+        service._steam_api.get_currency_rates.assert_not_awaited()  # type: ignore
+
+    @pytest.mark.asyncio
+    async def test_rates_cached_with_ttl(self, redis_client, make_service):
+        service = make_service({})
+        assert await service.get_steam_exchange_rates() == _steam_rates
+        key = "steam_exchange_rates"
+        assert redis_client.store[key] == _steam_rates.model_dump_json()
+        assert redis_client.ttls[key] == 60
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ["current_rate", "applied"],
+        [(Decimal(90), []), (Decimal(85), ["usd/rub"]), (None, ["usd/rub"])],
+    )
+    async def test_rate_applied_if_moved_over_threshold(
+        self, uow, make_service, current_rate, applied
+    ):
+        current_rates = {"usd/rub": current_rate} if current_rate else {}
+        service = make_service(current_rates)
+        assert await service.sync_steam_exchange_rates(["usd/rub", "eur/rub"], 1) == (
+            applied
+        )
+        if applied:
+            uow.products_prices_repo.upsert_exchange_rate.assert_awaited_once_with(
+                "USD", Decimal("90.5")
+            )
+        else:
+            uow.products_prices_repo.upsert_exchange_rate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_prices_rescaled_in_chunks(self, uow, make_service):
+        service = make_service({"usd/rub": Decimal(80)})
+        await service.sync_steam_exchange_rates(["usd/rub"], 1)
+        chunks = [
+            call.args[3]
+            for call in uow.products_prices_repo.update_all_with_rate.call_args_list
+        ]
+        assert chunks == [[1, 2], [3]]
+        afters = [
+            call.args[1]
+            for call in uow.products_prices_repo.list_ids_with_rate.call_args_list
+        ]
+        assert afters == [None, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_failed_rescale_resumed_by_next_sync(
+        self, uow, rescales, make_service
+    ):
+        service = make_service({"usd/rub": Decimal(80)})
+        update_all_with_rate = uow.products_prices_repo.update_all_with_rate
+        update_all_with_rate.side_effect = [None, RuntimeError("lock timeout")]
+        with pytest.raises(RuntimeError):
+            await service.sync_steam_exchange_rates(["usd/rub"], 1)
+        update_all_with_rate.reset_mock(side_effect=True)
+        # rate is already set, but prices of the failed chunk aren't rescaled yet
+        assert await service.sync_steam_exchange_rates(["usd/rub"], 1) == ["usd/rub"]
+        [call] = update_all_with_rate.call_args_list
+        assert call.args == ("USD", Decimal("90.5"), Decimal(80), [3])
+        assert rescales == {}
+
+    @pytest.mark.asyncio
+    async def test_progress_saved_with_rescaled_chunk(
+        self, uow, rescales, make_service
+    ):
+        service = make_service({"usd/rub": Decimal(80)})
+        commit_calls = []
+        uow.commit.side_effect = lambda: commit_calls.append(
+            rescales["usd/rub"].after if "usd/rub" in rescales else "deleted"
+        )
+        await service.sync_steam_exchange_rates(["usd/rub"], 1)
+        # progress of every chunk is committed with its prices
+        assert commit_calls[-3:] == [2, 3, "deleted"]
+
+    @pytest.mark.asyncio
+    async def test_rescale_dropped_if_rate_wasnt_set(self, uow, make_service):
+        service = make_service({"usd/rub": Decimal(80)})
+        service._currency_converter.set_exchange_rate.side_effect = ConnectionError
+        with pytest.raises(ConnectionError):
+            await service.sync_steam_exchange_rates(["usd/rub"], 1)
+        service._currency_converter.set_exchange_rate.side_effect = None
+        await service.sync_steam_exchange_rates(["usd/rub"], 1)
+        calls = uow.products_prices_repo.update_all_with_rate.call_args_list
+        # prices are rescaled once
+        assert [call.args[2] for call in calls] == [Decimal(80), Decimal(80)]
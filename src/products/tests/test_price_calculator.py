@@ -3,7 +3,7 @@ from gamesparser.psn import random
 import pytest
 from unittest.mock import patch
 from gateways.currency_converter.schemas import PriceUnitDTO
-from products.domain.services import XboxPriceCalculator
+from products.domain.services import Markup, PriceTiers, XboxPriceCalculator
 
 
 def new_test_price(value: Decimal | None = None, currency_code: str = "usd"):
@@ -139,3 +139,48 @@ class TestXboxPriceCalculator:
 
         expected = calculated + expected_addend
         assert res.quantize(Decimal(".01")) == expected.quantize(Decimal(".01"))
+
+
+class TestPriceTiers:
+    @pytest.mark.parametrize(
+        ["price", "expected"],
+        [
+            (Decimal("0.5"), Markup(10)),
+            (Decimal("1"), Markup(10)),
+            (Decimal("1.01"), Markup(5)),
+            (Decimal("2"), Markup(5)),
+            (Decimal("2.01"), Markup(addend=Decimal(1))),
+        ],
+    )
+    def test_lookup_inclusive_bounds(self, price: Decimal, expected: Markup):
+        tiers = PriceTiers.from_table(
+            [("1", Markup(10)), ("2", Markup(5))], above=Markup(addend=Decimal(1))
+        )
+        assert tiers.lookup(price) == expected
+
+    def test_unsorted_bounds(self):
+        with pytest.raises(AssertionError):
+            PriceTiers([Decimal(2), Decimal(1)], [Markup(), Markup(), Markup()])
+
+
+class TestXboxPriceCalculatorBatch:
+    @pytest.mark.parametrize("region", ["us", "tr", "ar"])
+    def test_same_as_single_price(self, region: str):
+        values = [Decimal(i) / 100 for i in range(0, 10000, 7)]
+        prices = [new_test_price(value) for value in values]
+        with_gp = [i % 2 == 0 for i in range(len(prices))]
+        expected = [
+            XboxPriceCalculator(price).calc_for_region(
+                region, **({"with_gp": gp} if region == "us" else {})
+            )
+            for price, gp in zip(prices, with_gp)
+        ]
+        assert XboxPriceCalculator.calc_many(region, prices, with_gp) == expected
+
+    def test_us_requires_with_gp(self):
+        with pytest.raises(ValueError):
+            XboxPriceCalculator.calc_many("us", [new_test_price()])
+
+    def test_unsupported_region(self):
+        with pytest.raises(ValueError):
+            XboxPriceCalculator.calc_many("unknown", [new_test_price()])
@@ -0,0 +1,85 @@
+from collections.abc import Callable
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from products.domain.services import ProductsService
+from products.models import ProductPlatform
+from products.schemas import PriceColumns, SimulatePricesDTO
+
+_columns = PriceColumns(
+    product_ids=[1, 2, 3, 4],
+    region_codes=["us", "ua", "", "tr"],
+    # converted from usd at read time, converted from uah when stored, manual, rub
+    prices=[900.0, 250.0, 1900.0, 100.0],
+    orig_base_prices=[10.0, None, None, 100.0],
+    currencies=["usd", "uah", "usd", "rub"],
+)
+
+
+@pytest.fixture
+def make_service(
+    uow: MagicMock, make_products_service
+) -> Callable[..., ProductsService]:
+    uow.products_prices_repo.load_price_columns = AsyncMock(return_value=_columns)
+
+    def make(old_rates: dict[str, Decimal]) -> ProductsService:
+        currency_converter = MagicMock()
+        currency_converter.get_rate_for = AsyncMock(
+            side_effect=lambda from_, to: old_rates.get(f"{from_}/{to}".lower())
+        )
+        return make_products_service(currency_converter=currency_converter)
+
+    return make
+
+
+def make_dto(**kwargs) -> SimulatePricesDTO:
+    return SimulatePricesDTO.model_validate(
+        {"for_platforms": [ProductPlatform.XBOX], "tier_bounds": [1000], **kwargs}
+    )
+
+
+class TestPricesSimulation:
+    def test_changes_required(self):
+        with pytest.raises(ValueError):
+            make_dto()
+
+    @pytest.mark.asyncio
+    async def test_percent(self, uow, make_service):
+        service = make_service({})
+        res = await service.simulate_prices(make_dto(percent=10, top_movers_count=2))
+        assert res.total_count == res.changed_count == 4
+        assert res.change and res.change_percent
+        assert (res.change.min, res.change.max) == (10, 190)
+        assert res.change_percent.median == 10
+        assert res.crossed_tiers_count == 0
+        assert len(res.top_movers) == 2
+        uow.products_prices_repo.update_all_with_rate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_exchange_rate(self, make_service):
+        service = make_service({"usd/rub": Decimal(95)})
+        res = await service.simulate_prices(
+            make_dto(
+                exchange_rate={"from": "usd", "new_rate": 110}, top_movers_count=5
+            )
+        )
+        # price stored in usd is converted with the new rate, manual one is rescaled
+        assert res.changed_count == 2
+        moves = {move.product_id: move for move in res.top_movers}
+        assert moves.keys() == {1, 3}
+        assert moves[1].new_price == 1100
+        assert moves[3].new_price == round(1900 / 95 * 110, 2)
+        # 900 -> 1100 crosses the bound, 1900 -> 2200 doesn't
+        assert res.crossed_tiers_count == 1
+
+    @pytest.mark.asyncio
+    async def test_nothing_changed(self, make_service):
+        service = make_service({})
+        res = await service.simulate_prices(
+            make_dto(exchange_rate={"from": "eur", "new_rate": 100})
+        )
+        assert res.changed_count == 0
+        assert res.change is None
+        assert res.top_movers == []
@@ -0,0 +1,27 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from products.repositories import ProductsRepository
+from products.schemas import ListProductsParamsDTO
+
+
+async def compile_listing_where(params: ListProductsParamsDTO) -> str:
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    await ProductsRepository(session).filter_paginated_list(params)
+    [stmt] = session.execute.await_args.args
+    return str(stmt.whereclause.compile(dialect=postgresql.dialect()))
+
+
+class TestProductsListing:
+    @pytest.mark.asyncio
+    async def test_deactivated_parsed_products_hidden_by_default(self):
+        where = await compile_listing_where(ListProductsParamsDTO())
+        assert where == "product.orig_url IS NULL OR product.in_stock IS true"
+
+    @pytest.mark.asyncio
+    async def test_in_stock_filter_passed_explicitly(self):
+        where = await compile_listing_where(ListProductsParamsDTO(in_stock=False))
+        assert where == "product.in_stock = false"
@@ -0,0 +1,168 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pydantic_extra_types.currency_code import Currency
+
+from gateways.currency_converter.converter import ExchangeRatesSnapshot
+from gateways.currency_converter.schemas import PriceUnitDTO, SetExchangeRateDTO
+from products.domain.services import ProductsService, XboxPriceCalculator
+from products.models import ProductPlatform, RegionalPrice
+from products.schemas import (
+    PriceInputs,
+    PsnGameParsedDTO,
+    RegionalPriceDTO,
+    RepriceDTO,
+    XboxGameParsedDTO,
+)
+
+_rates = ExchangeRatesSnapshot({"usd/rub": "90", "uah/rub": "2.5"})
+
+
+@pytest.fixture
+def service(make_products_service) -> ProductsService:
+    currency_converter = MagicMock()
+    currency_converter.snapshot = AsyncMock(return_value=_rates)
+    return make_products_service(currency_converter=currency_converter)
+
+
+def make_parsed() -> list[XboxGameParsedDTO | PsnGameParsedDTO]:
+    common = {"image_url": "https://example.com/image.png", "discount": 50}
+    return [
+        XboxGameParsedDTO.model_validate(
+            {
+                **common,
+                "name": "xbox game",
+                "url": "https://example.com/xbox",
+                "with_gp": True,
+                "deal_until": None,
+                "prices": [
+                    {"region": "us", "currency_code": "usd", "value": "19.99"},
+                    {"region": "tr", "currency_code": "usd", "value": "4.99"},
+                ],
+            }
+        ),
+        PsnGameParsedDTO.model_validate(
+            {
+                **common,
+                "name": "psn game",
+                "url": "https://example.com/psn",
+                "prices": [{"region": "ua", "currency_code": "uah", "value": "400"}],
+            }
+        ),
+    ]
+
+
+class TestRepricing:
+    def test_original_prices_are_kept(self, service):
+        priced = service.price_parsed_products(make_parsed(), _rates)
+        xbox, psn = priced
+        assert [
+            (p.region_code, p.orig_price, p.original_curr) for p in xbox.prices
+        ] == [("us", Decimal("19.99"), "USD"), ("tr", Decimal("4.99"), "USD")]
+        expected_us = XboxPriceCalculator(
+            PriceUnitDTO(value=Decimal("19.99"), currency_code=Currency("USD"))
+        ).calc_for_region("us", with_gp=True)
+        assert xbox.prices[0].base_price == expected_us * 90 * 100 / 50
+        assert psn.prices[0].orig_price == Decimal("400")
+        assert psn.prices[0].base_price == Decimal("400") * Decimal("2.5") * 2
+        # base price in original currency is converted to rub at read time
+        assert xbox.prices[0].orig_base_price == expected_us * 100 / 50
+        assert psn.prices[0].orig_base_price == Decimal("800")
+        assert [p.orig_discount for p in xbox.prices + psn.prices] == [50, 50, 50]
+
+    def test_repricing_from_inputs_is_the_same_as_pricing_parsed(self, service):
+        priced = service.price_parsed_products(make_parsed(), _rates)
+        for item in priced:
+            # discount expired after import, parsed prices are still discounted
+            item.discount = 0
+        inputs = [
+            PriceInputs(
+                item.platform,
+                price.region_code,
+                price.orig_price,
+                price.original_curr,
+                item.with_gp,
+                price.orig_discount,
+            )
+            for item in priced
+            for price in item.prices
+        ]
+        assert service.calc_base_prices(inputs, _rates) == [
+            (price.base_price, price.orig_base_price)
+            for item in priced
+            for price in item.prices
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reprice_in_chunks(self, uow, service):
+        def inputs(region: str, price: int, curr: str, discount: int = 0):
+            return PriceInputs(
+                ProductPlatform.PSN, region, Decimal(price), curr, None, discount
+            )
+
+        chunks = [
+            [(1, inputs("ua", 10, "uah")), (2, inputs("ua", 20, "uah"))],
+            [(3, inputs("tr", 30, "rub", discount=50))],
+            [],
+        ]
+        uow.products_prices_repo.list_price_inputs = AsyncMock(side_effect=chunks)
+        uow.products_prices_repo.update_base_prices = AsyncMock(return_value=2)
+        res = await service.reprice_parsed_products(
+            RepriceDTO(for_platforms=[ProductPlatform.PSN])
+        )
+        assert res.updated_count == 4
+        afters = [
+            call.args[1]
+            for call in uow.products_prices_repo.list_price_inputs.call_args_list
+        ]
+        assert afters == [None, (2, "ua"), (3, "tr")]
+        updated = [
+            call.args[0]
+            for call in uow.products_prices_repo.update_base_prices.call_args_list
+        ]
+        assert updated == [
+            [(1, "ua", Decimal(25), Decimal(10)), (2, "ua", Decimal(50), Decimal(20))],
+            [(3, "tr", Decimal(60), Decimal(60))],
+        ]
+
+
+class TestReadTimeConversion:
+    def test_converted_price_is_shown(self):
+        price = RegionalPrice(
+            region_code="us",
+            base_price=Decimal(900),
+            original_curr="usd",
+            orig_base_price=Decimal(10),
+        )
+        # not loaded yet, stored price in rub is used
+        assert price.price_in_rub == Decimal(900)
+        price.rub_base_price = Decimal(950)
+        assert price.price_in_rub == Decimal(950)
+        assert price.calc_discounted_price(50) == Decimal(475)
+        assert RegionalPriceDTO.model_validate(price).base_price == Decimal(950)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ["pair", "expected"],
+        [
+            (("usd", "rub"), ("usd", Decimal(95))),
+            (("rub", "usd"), ("usd", 1 / Decimal(95))),
+        ],
+    )
+    async def test_set_exchange_rate_updates_single_row(
+        self, uow, service, pair, expected
+    ):
+        uow.products_prices_repo.upsert_exchange_rate = AsyncMock()
+        uow.products_prices_repo.update_all_with_rate = AsyncMock()
+        uow.products_prices_repo.get_rescale = AsyncMock(return_value=None)
+        service._currency_converter.get_rate_for = AsyncMock(return_value=None)
+        service._currency_converter.set_exchange_rate = AsyncMock()
+        from_, to = pair
+        await service.set_exchange_rate(
+            SetExchangeRateDTO.model_validate({"from": from_, "to": to, "new_rate": 95})
+        )
+        [call] = uow.products_prices_repo.upsert_exchange_rate.call_args_list
+        currency, rate = call.args
+        assert (currency.lower(), rate) == expected
+        uow.products_prices_repo.update_all_with_rate.assert_not_awaited()
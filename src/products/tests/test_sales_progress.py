@@ -0,0 +1,95 @@
+from datetime import UTC, datetime, timedelta
+from logging import getLogger
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from gateways.gamesparser import SalesProgressTracker, SalesUpdater
+from products.models import ProductPlatform
+from products.schemas import SalesProgressDTO, SalesUpdateStage
+
+
+class FakeSalesJobs:
+    def __init__(self):
+        self.saved: list[SalesProgressDTO] = []
+
+    async def save_progress(self, progress: SalesProgressDTO) -> None:
+        self.saved.append(progress.model_copy(deep=True))
+
+
+def make_tracker(
+    flush_interval_sec: float = 60,
+) -> tuple[SalesProgressTracker, FakeSalesJobs]:
+    sales_jobs = FakeSalesJobs()
+    tracker = SalesProgressTracker(getLogger(), sales_jobs, flush_interval_sec)  # type: ignore
+    return tracker, sales_jobs
+
+
+class TestSalesProgressTracker:
+    @pytest.mark.asyncio
+    async def test_flushes_are_throttled(self):
+        tracker, sales_jobs = make_tracker()
+        tracker.start(ProductPlatform.XBOX)
+        await tracker.add_total(ProductPlatform.XBOX, SalesUpdateStage.PARSE, 10)
+        for _ in range(5):
+            await tracker.advance(ProductPlatform.XBOX, SalesUpdateStage.PARSE, 1)
+        assert len(sales_jobs.saved) == 1
+        await tracker.finish_stage(ProductPlatform.XBOX, SalesUpdateStage.PARSE)
+        assert len(sales_jobs.saved) == 2
+        stage = sales_jobs.saved[-1].stages[SalesUpdateStage.PARSE]
+        assert (stage.processed, stage.total, stage.eta_sec) == (5, 10, 0)
+
+    @pytest.mark.asyncio
+    async def test_eta_accounts_for_errors(self):
+        tracker, sales_jobs = make_tracker(flush_interval_sec=0)
+        await tracker.add_total(ProductPlatform.PSN, SalesUpdateStage.DETAILS, 100)
+        stage = tracker._get_stage(ProductPlatform.PSN, SalesUpdateStage.DETAILS)
+        stage.started_at = datetime.now(UTC) - timedelta(seconds=10)
+        await tracker.advance(
+            ProductPlatform.PSN, SalesUpdateStage.DETAILS, processed=40, errors=10
+        )
+        saved = sales_jobs.saved[-1].stages[SalesUpdateStage.DETAILS]
+        assert saved.errors == 10
+        assert saved.items_per_sec == pytest.approx(4, rel=0.01)
+        assert saved.eta_sec == pytest.approx(12.5, rel=0.01)
+
+    @pytest.mark.asyncio
+    async def test_start_resets_progress(self):
+        tracker, sales_jobs = make_tracker(flush_interval_sec=0)
+        await tracker.advance(ProductPlatform.XBOX, SalesUpdateStage.SAVE, 3)
+        tracker.start(ProductPlatform.XBOX)
+        await tracker.advance(ProductPlatform.XBOX, SalesUpdateStage.SAVE, 1)
+        assert sales_jobs.saved[-1].stages[SalesUpdateStage.SAVE].processed == 1
+
+    @pytest.mark.asyncio
+    async def test_details_total_set_once_for_all_chunks(self):
+        tracker, sales_jobs = make_tracker()
+        products_service = MagicMock()
+        products_service.get_details_pages = AsyncMock(
+            return_value={i: MagicMock() for i in range(450)}
+        )
+        updater = SalesUpdater(
+            getLogger(),
+            AsyncMock(),
+            products_service,
+            AsyncMock(),
+            tracker,
+            update_chunk_size=200,
+        )
+        await updater.update_details(ProductPlatform.XBOX, list(range(450)))
+        assert updater._parser.update_for_platform.await_count == 3  # type: ignore
+        saved = sales_jobs.saved[-1].stages[SalesUpdateStage.DETAILS]
+        assert saved.total == 450
+
+
+class TestSalesUpdateDate:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "stored", ["2026-10-19 12:00:00+00:00", "2026-10-19 12:00:00"]
+    )
+    async def test_stored_date_parsed_with_utc(self, make_products_service, stored):
+        settings = MagicMock()
+        settings.get = AsyncMock(return_value=stored)
+        service = make_products_service(settings=settings)
+        res = await service.get_sales_update_date(ProductPlatform.PSN)
+        assert res.last_update_at == datetime(2026, 10, 19, 12, tzinfo=UTC)
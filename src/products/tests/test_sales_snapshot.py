@@ -0,0 +1,129 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+import pytest
+from gamesparser.models import Price, XboxParsedItem
+
+from gateways.gamesparser import SalesSnapshot, SnapshotMode
+from products.models import ProductPlatform
+
+
+def _item(i: int) -> XboxParsedItem:
+    return XboxParsedItem(
+        id=str(i),
+        name=f"game {i}",
+        url=f"https://example.com/{i}",
+        preview_img_url=f"https://example.com/{i}.png",
+        discount=50,
+        prices={"us": Price("USD", 9.99 + i)},
+        with_sub=i % 2 == 0,
+        deal_until=datetime(2026, 1, 1, tzinfo=UTC),
+    )
+
+
+async def _batches(items: list[XboxParsedItem], size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class TestSalesSnapshot:
+    @pytest.mark.asyncio
+    async def test_replays_recorded_items(self, tmp_path: Path):
+        items = [_item(i) for i in range(5)]
+        recorder = SalesSnapshot(tmp_path, SnapshotMode.RECORD)
+        passed = [
+            batch
+            async for batch in recorder.record_items(
+                ProductPlatform.XBOX, _batches(items, 2)
+            )
+        ]
+        assert passed == [items[:2], items[2:4], items[4:]]
+
+        replayer = SalesSnapshot(tmp_path, SnapshotMode.REPLAY)
+        replayed = [
+            batch
+            async for batch in replayer.replay_items(ProductPlatform.XBOX, 3)
+        ]
+        assert replayed == [items[:3], items[3:]]
+        limited = [
+            batch
+            async for batch in replayer.replay_items(ProductPlatform.XBOX, 3, limit=2)
+        ]
+        assert limited == [items[:2]]
+
+    @pytest.mark.asyncio
+    async def test_missing_snapshot(self, tmp_path: Path):
+        replayer = SalesSnapshot(tmp_path, SnapshotMode.REPLAY)
+        with pytest.raises(FileNotFoundError):
+            async for _ in replayer.replay_items(ProductPlatform.PSN, 10):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_replays_recorded_responses(self, tmp_path: Path):
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(
+                200, headers={"etag": '"v1"'}, text="<main>page</main>"
+            )
+
+        recorder = SalesSnapshot(tmp_path, SnapshotMode.RECORD)
+        transport = recorder.details_transport(
+            ProductPlatform.PSN, httpx.MockTransport(handler)
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            with recorder.recording_details(ProductPlatform.PSN):
+                resp = await client.get(
+                    "https://example.com/item", headers={"if-none-match": '"v0"'}
+                )
+        assert resp.text == "<main>page</main>"
+        # full response is recorded
+        assert "if-none-match" not in requests[0].headers
+
+        replayer = SalesSnapshot(tmp_path, SnapshotMode.REPLAY)
+        transport = replayer.details_transport(
+            ProductPlatform.PSN, httpx.MockTransport(handler)
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            resp = await client.get("https://example.com/item")
+            assert resp.status_code == 200
+            assert resp.text == "<main>page</main>"
+            assert resp.headers["etag"] == '"v1"'
+            resp = await client.get(
+                "https://example.com/item", headers={"if-none-match": '"v1"'}
+            )
+            assert resp.status_code == 304
+            resp = await client.get("https://example.com/unknown")
+            assert resp.status_code == 404
+        # nothing is requested during replay
+        assert len(requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_responses_recorded_per_run(self, tmp_path: Path):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, text=request.url.path)
+
+        recorder = SalesSnapshot(tmp_path, SnapshotMode.RECORD)
+        transport = recorder.details_transport(
+            ProductPlatform.XBOX, httpx.MockTransport(handler)
+        )
+        replayer = SalesSnapshot(tmp_path, SnapshotMode.REPLAY)
+        async with httpx.AsyncClient(transport=transport) as client:
+            with recorder.recording_details(ProductPlatform.XBOX):
+                await client.get("https://example.com/first")
+            with recorder.recording_details(ProductPlatform.XBOX):
+                await client.get("https://example.com/second")
+            # not recorded outside of the run
+            await client.get("https://example.com/third")
+            # file of the finished run is complete while the client is open
+            replay = replayer.details_transport(
+                ProductPlatform.XBOX, httpx.MockTransport(handler)
+            )
+            async with httpx.AsyncClient(transport=replay) as replay_client:
+                statuses = [
+                    (await replay_client.get(f"https://example.com/{path}")).status_code
+                    for path in ("first", "second", "third")
+                ]
+        assert statuses == [404, 200, 404]
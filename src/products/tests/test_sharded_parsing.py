@@ -0,0 +1,44 @@
+import pytest
+
+from gateways.gamesparser import ShardedParsingPool, ShardingPolicy
+
+
+def _parse_range(first: int, last: int) -> list[int]:
+    if first < 0:
+        raise ValueError("Invalid range")
+    return list(range(first, last))
+
+
+class TestShardedParsingPool:
+    @pytest.mark.asyncio
+    async def test_yields_results_of_all_shards(self):
+        pool = ShardedParsingPool(processes=2)
+        try:
+            results = [
+                items
+                async for items in pool.run(_parse_range, [(0, 3), (3, 5), (5, 9)])
+            ]
+            # pool is reused between runs
+            results += [items async for items in pool.run(_parse_range, [(9, 10)])]
+        finally:
+            await pool.aclose()
+        assert sorted(item for items in results for item in items) == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_shard_error_propagated(self):
+        pool = ShardedParsingPool(processes=1)
+        try:
+            with pytest.raises(ValueError, match="Invalid range"):
+                async for _ in pool.run(_parse_range, [(-1, 0)]):
+                    pass
+        finally:
+            await pool.aclose()
+
+    @pytest.mark.parametrize(
+        ["processes", "expected"], [(1, (4, 4)), (2, (2, 2)), (8, (0.5, 1))]
+    )
+    def test_psn_rate_split_between_processes(
+        self, processes: int, expected: tuple[float, int]
+    ):
+        policy = ShardingPolicy(ShardedParsingPool(processes), 4, 500, 4, 4)
+        assert policy.psn_process_rate() == expected
@@ -0,0 +1,126 @@
+import json
+from collections.abc import Callable
+from logging import getLogger
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from gateways.steam import GamesForFarmAPIClient
+from products.models import (
+    ProductCategory,
+    ProductDeliveryMethod,
+    ProductPlatform,
+)
+from products.schemas import ParsedCatalogEntry
+
+
+def make_good(name: str, sub_id: int | None = 1) -> dict:
+    good = {
+        "name": name,
+        "description": "",
+        "price_wmr": 150.5,
+        "icon": "https://example.com/icon.png",
+        "url": f"https://example.com/{name}",
+    }
+    if sub_id is not None:
+        good["sub_id"] = sub_id
+    return good
+
+
+@pytest.fixture
+def make_client(
+    uow: MagicMock, make_products_service
+) -> Callable[[dict[str, dict]], GamesForFarmAPIClient]:
+    uow.products_repo.get_parsed_catalog = AsyncMock(
+        return_value={
+            ("Removed", ProductCategory.GAMES, ProductPlatform.STEAM): (
+                ParsedCatalogEntry(7, None, True)
+            )
+        }
+    )
+    uow.products_repo.bulk_save_ignore_conflict = AsyncMock(
+        side_effect=lambda products: {
+            product.unique_key: 100 + i for i, product in enumerate(products)
+        }
+    )
+    uow.products_repo.deactivate_by_ids = AsyncMock(return_value=1)
+    rates = MagicMock()
+    rates.convert_many = lambda prices: prices
+    currency_converter = MagicMock()
+    currency_converter.snapshot = AsyncMock(return_value=rates)
+    service = make_products_service(currency_converter=currency_converter)
+
+    def make(goods: dict[str, dict]) -> GamesForFarmAPIClient:
+        body = json.dumps({"status": "ok", "goods": goods}).encode()
+
+        async def stream():
+            for i in range(0, len(body), 16):
+                yield body[i : i + 16]
+
+        http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda _: httpx.Response(200, content=stream())
+            )
+        )
+        return GamesForFarmAPIClient(
+            http_client, service, getLogger(), import_batch_size=1
+        )
+
+    return make
+
+
+class TestSteamCatalogSync:
+    @pytest.mark.asyncio
+    async def test_goods_saved_in_batches(self, uow, make_client):
+        client = make_client(
+            {
+                "1": make_good("Game", sub_id=10),
+                "2": make_good("Game Bundle", sub_id=20),
+                "3": make_good("Without sub", sub_id=None),
+                "4": make_good("Other game", sub_id=40),
+            }
+        )
+        await client.fetch_and_save()
+        saved = [
+            product
+            for call in uow.products_repo.bulk_save_ignore_conflict.call_args_list
+            for product in call.args[0]
+        ]
+        # a transaction per batch, bundles and invalid goods are skipped
+        assert uow.products_repo.bulk_save_ignore_conflict.await_count == 2
+        assert [(product.name, product.sub_id) for product in saved] == [
+            ("Game", 10),
+            ("Other game", 40),
+        ]
+        product = saved[0]
+        assert product.platform == ProductPlatform.STEAM
+        assert product.delivery_method == ProductDeliveryMethod.GIFT
+        [price] = product.prices
+        assert (price.region_code, price.base_price) == ("", 150.5)
+        uow.products_repo.deactivate_by_ids.assert_awaited_once_with([7])
+
+    @pytest.mark.asyncio
+    async def test_nothing_deactivated_when_stream_fails(self, uow, make_client):
+        client = make_client({"1": make_good("Game")})
+        client._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda _: httpx.Response(200, text='{"go'))
+        )
+        with pytest.raises(ValueError):
+            await client.fetch_and_save()
+        uow.products_repo.deactivate_by_ids.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stream_timeout_is_finite(self, make_client):
+        client = make_client({})
+        requests: list[httpx.Request] = []
+
+        def handle(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"status": "ok", "goods": {}})
+
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+        await client.fetch_and_save()
+        [request] = requests
+        timeout = request.extensions["timeout"]
+        assert (timeout["connect"], timeout["read"]) == (10, 30)
@@ -1,6 +1,7 @@
 from typing import Annotated
 from users.domain.services import UsersService
 from core.ioc import Inject
+from core.uow import TimeoutsProfile, current_timeouts_profile
 from config import Config, ConfigMode
 from fastapi import HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
@@ -39,6 +40,8 @@ async def require_admin(
     users_service: UsersServiceDep,
     cfg: Annotated[Config, Inject(Config)],
 ) -> None:
+    # admin operations are allowed to take longer than storefront ones
+    current_timeouts_profile.set(TimeoutsProfile.ADMIN)
     # flag to change, if wanna test require_admin functionallity in local mode
     require_admin_in_debug = False
     if cfg.mode == ConfigMode.LOCAL and not require_admin_in_debug:
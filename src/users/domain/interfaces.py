@@ -25,7 +25,7 @@ class UsersRepositoryI(t.Protocol):
         self, dto: CreateUserDTO, password_hash: bytes, photo_url: str | None
     ) -> User: ...
 
-    async def mark_as_active(self, user_id: int) -> User: ...
+    async def activate_by_token(self, token_hash: bytes) -> User: ...
     async def set_new_password(self, user_id: int, password_hash: bytes) -> None: ...
     async def check_exists_active(self, user_id: int) -> bool: ...
 
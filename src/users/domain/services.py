@@ -286,13 +286,7 @@ class UsersService(BaseService):
         token_hash = await asyncio.to_thread(self._token_hasher.hash, plain_token)
         try:
             async with self._uow() as uow:
-                token = await uow.tokens_repo.get_by_hash(
-                    token_hash, TokenScopes.ACTIVATION
-                )
-                user = await uow.users_repo.mark_as_active(token.user_id)
-                await uow.tokens_repo.delete_all_for_user(
-                    user.id, TokenScopes.ACTIVATION
-                )
+                user = await uow.users_repo.activate_by_token(token_hash)
         except NotFoundError:
             self._logger.info("Supplied activation token not found")
             raise exc.InvalidTokenError()
@@ -1,4 +1,4 @@
-from sqlalchemy import select, update
+from sqlalchemy import delete, select, update
 from core.utils import UnspecifiedType
 from gateways.db.exceptions import NotFoundError
 from gateways.db.sqlalchemy_gateway import SqlAlchemyRepository
@@ -9,8 +9,31 @@ from users.models import Admin, Token, TokenScopes, User
 class UsersRepository(SqlAlchemyRepository[User]):
     model = User
 
-    async def mark_as_active(self, user_id: int) -> User:
-        return await super().update({"is_active": True}, id=user_id)
+    async def activate_by_token(self, token_hash: bytes) -> User:
+        """Marks owner of the activation token as active and deletes all
+        his activation tokens in a single statement"""
+        owner_id = (
+            select(Token.user_id)
+            .filter_by(hash=token_hash, scope=TokenScopes.ACTIVATION)
+            .scalar_subquery()
+        )
+        deleted_tokens = (
+            delete(Token)
+            .filter_by(user_id=owner_id, scope=TokenScopes.ACTIVATION)
+            .returning(Token.user_id)
+            .cte("deleted_tokens")
+        )
+        stmt = (
+            update(User)
+            .where(User.id.in_(select(deleted_tokens.c.user_id)))
+            .values(is_active=True)
+            .returning(User)
+        )
+        res = await self._session.execute(stmt)
+        user = res.scalars().one_or_none()
+        if user is None:
+            raise NotFoundError()
+        return user
 
     async def get_by_email(self, email: str) -> User:
         return await super().get_one(email=email)